@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Benchmark the DataFrame-to-Sample conversion used by collect_data.
+
+This script builds a synthetic telemetry DataFrame shaped like an Arize export
+and compares the previous row-wise conversion (JSON round-trip plus one
+validated model per row) with the column-wise ``telemetry_to_samples``.
+"""
+
+import json
+import time
+
+import pandas as pd
+
+from self_improving_agents.models.state_action import EvalMetrics, Sample
+from self_improving_agents.runners.data_collection_runner import telemetry_to_samples
+
+ROWS = 100_000
+EVALUATOR_NAMES = ["formatting_classify", "helpfulness", "correctness", "tone"]
+
+
+def make_telemetry_df(rows: int) -> pd.DataFrame:
+    """Build a synthetic telemetry DataFrame."""
+    data = {
+        "context.span_id": [f"{i:016x}" for i in range(rows)],
+        "attributes.input.value": [
+            json.dumps(
+                {
+                    "messages": [
+                        {"role": "system", "content": "You are a helpful writer."},
+                        {"role": "user", "content": f"Write an essay about topic {i}"},
+                    ]
+                }
+            )
+            for i in range(rows)
+        ],
+        "attributes.llm.output_messages": [
+            [{"message.role": "assistant", "message.content": f"Essay {i} " * 20}]
+            for i in range(rows)
+        ],
+    }
+    for name in EVALUATOR_NAMES:
+        data[f"eval.{name}.score"] = [
+            float(i % 5) if i % 7 else None for i in range(rows)
+        ]
+        data[f"eval.{name}.label"] = [f"scale{i % 5}" for i in range(rows)]
+        data[f"eval.{name}.explanation"] = [f"Because {i}" for i in range(rows)]
+    return pd.DataFrame(data)
+
+
+def rowwise_to_samples(telemetry_df: pd.DataFrame) -> list:
+    """The previous conversion, kept here for comparison."""
+    telemetry_json = json.loads(telemetry_df.to_json(orient="records"))
+    samples = []
+    for item in telemetry_json:
+        chat_history = json.loads(item.get("attributes.input.value"))["messages"]
+        if chat_history[0].get("role") == "system":
+            chat_history = chat_history[1:]
+        output_generation = item.get("attributes.llm.output_messages")[0].get(
+            "message.content"
+        )
+        evals_metrics = [
+            EvalMetrics(
+                name=name,
+                eval_score=item.get(f"eval.{name}.score"),
+                eval_reasoning=item.get(f"eval.{name}.explanation"),
+                eval_label=item.get(f"eval.{name}.label"),
+            )
+            for name in EVALUATOR_NAMES
+        ]
+        samples.append(
+            Sample(
+                chat_history=chat_history,
+                output_generation=output_generation,
+                evals=evals_metrics,
+            )
+        )
+    return samples
+
+
+def main() -> None:
+    """Time both conversions on the synthetic DataFrame."""
+    telemetry_df = make_telemetry_df(ROWS)
+
+    start = time.perf_counter()
+    rowwise_samples = rowwise_to_samples(telemetry_df)
+    rowwise_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar_samples = telemetry_to_samples(telemetry_df, EVALUATOR_NAMES)
+    columnar_seconds = time.perf_counter() - start
+
+    assert [s.model_dump() for s in rowwise_samples[:1000]] == [
+        s.model_dump() for s in columnar_samples[:1000]
+    ]
+
+    print(f"Rows: {ROWS}, evaluators: {len(EVALUATOR_NAMES)}")
+    for name, seconds in (
+        ("Row-wise:   ", rowwise_seconds),
+        ("Column-wise:", columnar_seconds),
+    ):
+        print(f"{name} {seconds:.2f}s ({ROWS / seconds:,.0f} rows/sec)")
+    print(f"Speedup:     {rowwise_seconds / columnar_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,20 @@ controlled environment, with instrumentation for tracking and analysis.
 Classes:
     LLMEnvironment: Environment for emulating and tracking LLM calls.
     EnvironmentSnapshot: Tracks the state of the environment during LLM calls.
+    BatchReplayer: Submits replays as OpenAI batches and collects their results.
+    LocalBatchClient: In-process stand-in for the OpenAI Batch API.
+    BlobStore: Content-addressed store of compressed snapshot payloads.
 """
 
+from .batch_replay import BatchReplayer, LocalBatchClient
+from .blob_store import BlobStore
 from .llm_environment import LLMEnvironment
 from .snapshot import EnvironmentSnapshot
 
-__all__ = ["LLMEnvironment", "EnvironmentSnapshot"]
+__all__ = [
+    "LLMEnvironment",
+    "EnvironmentSnapshot",
+    "BatchReplayer",
+    "BlobStore",
+    "LocalBatchClient",
+]
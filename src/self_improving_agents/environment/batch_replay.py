@@ -0,0 +1,447 @@
+"""Offline replay through the OpenAI Batch API.
+
+Large replays whose latency does not matter can run at batch pricing: the
+requests are written as JSONL in the Batch API input format, uploaded and
+submitted as batches of at most 50,000 requests (the Batch API limit), and
+the results are merged back into sample order once the batches complete.
+Every submission is recorded in a manifest next to its input files, so the
+process that submitted the batches does not need to stay alive until they
+complete.
+
+``LocalBatchClient`` implements the subset of the OpenAI client used here
+in-process, to exercise batch replays without the network.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from openai.types import Batch, FileObject
+from openai.types.chat import ChatCompletion
+
+from ..utils.file_lock import atomic_write
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Maximum number of requests the Batch API accepts in one batch
+MAX_BATCH_REQUESTS = 50_000
+
+
+def sample_custom_id(index: int) -> str:
+    """Return the batch request ID of the sample at ``index``."""
+    return f"sample-{index}"
+
+
+class BatchReplayer:
+    """Submits replay requests as OpenAI batches and collects their results."""
+
+    def __init__(
+        self,
+        client: Any,
+        work_dir: str = ".sia/batches",
+        poll_interval: float = 60.0,
+        max_batch_requests: int = MAX_BATCH_REQUESTS,
+    ):
+        """Initialize the batch replayer.
+
+        Args:
+            client: OpenAI client (or ``LocalBatchClient``) exposing the
+                ``files`` and ``batches`` resources
+            work_dir: Directory for the JSONL input files and manifests
+            poll_interval: Seconds between status checks while waiting
+            max_batch_requests: Maximum number of requests per batch
+        """
+        if max_batch_requests < 1:
+            raise ValueError("max_batch_requests must be at least 1")
+        self.client = client
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.max_batch_requests = max_batch_requests
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def write_requests(self, requests: Dict[str, Dict[str, Any]], path: str) -> None:
+        """Write chat completion requests as a Batch API JSONL input file.
+
+        Args:
+            requests: Chat completion parameters keyed by custom ID
+            path: Path of the JSONL file to write
+        """
+        with open(path, "w") as f:
+            for custom_id, params in requests.items():
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": params,
+                }
+                f.write(json.dumps(line) + "\n")
+
+    def submit(self, requests: Dict[str, Dict[str, Any]], run_id: str) -> List[str]:
+        """Upload the requests and submit them as batches.
+
+        The requests are split into batches of at most ``max_batch_requests``.
+        Without requests nothing is submitted, and only the (empty) manifest
+        is recorded.
+
+        Args:
+            requests: Chat completion parameters keyed by custom ID
+            run_id: Run the batches belong to, used to name their files
+
+        Returns:
+            IDs of the submitted batches
+        """
+        custom_ids = list(requests)
+        batches: List[Dict[str, Any]] = []
+        for part, offset in enumerate(
+            range(0, len(custom_ids), self.max_batch_requests)
+        ):
+            part_ids = custom_ids[offset : offset + self.max_batch_requests]
+            input_path = os.path.join(self.work_dir, f"{run_id}-{part}.jsonl")
+            self.write_requests(
+                {custom_id: requests[custom_id] for custom_id in part_ids},
+                input_path,
+            )
+            with open(input_path, "rb") as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window="24h",
+                metadata={"run_id": run_id},
+            )
+            batches.append(
+                {
+                    "batch_id": batch.id,
+                    "input_file_id": input_file.id,
+                    "request_count": len(part_ids),
+                }
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(part_ids)} requests")
+
+        self._save_manifest(
+            run_id,
+            {
+                "run_id": run_id,
+                "batches": batches,
+                "request_count": len(requests),
+                "submitted_at": datetime.now().isoformat(),
+            },
+        )
+        return [str(batch["batch_id"]) for batch in batches]
+
+    def load_manifest(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Load the manifest recorded when the batches of a run were submitted.
+
+        Args:
+            run_id: Run the batches belong to
+
+        Returns:
+            The manifest, or None if nothing was submitted for the run
+        """
+        path = os.path.join(self.work_dir, f"{run_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            manifest: Dict[str, Any] = json.load(f)
+        return manifest
+
+    def _save_manifest(self, run_id: str, manifest: Dict[str, Any]) -> None:
+        """Save the manifest of a run's batches."""
+        path = os.path.join(self.work_dir, f"{run_id}.json")
+        atomic_write(path, json.dumps(manifest, indent=2))
+
+    def retrieve(self, batch_id: str) -> Batch:
+        """Fetch the current state of a batch.
+
+        Args:
+            batch_id: ID of the batch
+
+        Returns:
+            The batch
+        """
+        batch: Batch = self.client.batches.retrieve(batch_id)
+        return batch
+
+    def wait(self, batch_id: str, timeout: Optional[float] = None) -> Batch:
+        """Poll a batch until it reaches a terminal status.
+
+        Args:
+            batch_id: ID of the batch
+            timeout: Maximum number of seconds to wait (None to wait until the
+                batch's completion window ends)
+
+        Returns:
+            The batch in its terminal status
+
+        Raises:
+            TimeoutError: If the batch is still running after ``timeout``
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            batch = self.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                logger.info(f"Batch {batch_id} ended with status '{batch.status}'")
+                return batch
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Batch {batch_id} still '{batch.status}' after {timeout}s"
+                )
+            logger.info(f"Batch {batch_id} is '{batch.status}', polling again")
+            time.sleep(self.poll_interval)
+
+    def results(
+        self, batch: Batch
+    ) -> Dict[str, Tuple[Optional[ChatCompletion], Optional[str]]]:
+        """Read the responses and errors of a finished batch.
+
+        Args:
+            batch: The batch in a terminal status
+
+        Returns:
+            Completion or error message keyed by custom ID; requests the batch
+            did not process are missing
+        """
+        results: Dict[str, Tuple[Optional[ChatCompletion], Optional[str]]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or response.get("body", {}).get("error")
+                    results[record["custom_id"]] = (None, json.dumps(error))
+                else:
+                    results[record["custom_id"]] = (
+                        ChatCompletion.model_validate(response["body"]),
+                        None,
+                    )
+        return results
+
+
+class _LocalFile:
+    """Downloaded content of a file stored by ``LocalBatchClient``."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _LocalFiles:
+    """In-memory ``files`` resource of ``LocalBatchClient``."""
+
+    def __init__(self) -> None:
+        """Initialize the files resource without any files."""
+        self.contents: Dict[str, str] = {}
+
+    def create(self, file: Any, purpose: str) -> FileObject:
+        """Store the content of an uploaded file.
+
+        Args:
+            file: Open file (binary or text) to upload
+            purpose: Purpose of the file, e.g. "batch"
+
+        Returns:
+            The stored file
+        """
+        data = file.read()
+        return self.add(data.decode() if isinstance(data, bytes) else data, purpose)
+
+    def add(self, text: str, purpose: str) -> FileObject:
+        """Store a file with the given content under a new ID.
+
+        Args:
+            text: Content of the file
+            purpose: Purpose of the file
+
+        Returns:
+            The stored file
+        """
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.contents[file_id] = text
+        return FileObject(
+            id=file_id,
+            bytes=len(text.encode()),
+            created_at=int(time.time()),
+            filename=f"{file_id}.jsonl",
+            object="file",
+            purpose=purpose,  # type: ignore[arg-type]
+            status="processed",
+        )
+
+    def content(self, file_id: str) -> _LocalFile:
+        """Download the content of a stored file.
+
+        Args:
+            file_id: ID of the file
+
+        Returns:
+            The content of the file
+
+        Raises:
+            KeyError: If no file with this ID is stored
+        """
+        return _LocalFile(self.contents[file_id])
+
+
+class _LocalBatches:
+    """In-memory ``batches`` resource of ``LocalBatchClient``."""
+
+    def __init__(
+        self,
+        files: _LocalFiles,
+        respond: Callable[[Dict[str, Any]], Dict[str, Any]],
+        polls_until_complete: int,
+    ):
+        """Initialize the batches resource.
+
+        Args:
+            files: Files resource holding the input and output files
+            respond: Function returning the chat completion for a request
+            polls_until_complete: Number of ``retrieve`` calls after which a
+                batch completes
+        """
+        self.files = files
+        self.respond = respond
+        self.polls_until_complete = polls_until_complete
+        self.batches: Dict[str, Batch] = {}
+        self.polls: Dict[str, int] = {}
+
+    def create(
+        self,
+        input_file_id: str,
+        endpoint: str,
+        completion_window: str,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Batch:
+        """Create a batch of the requests in an uploaded input file.
+
+        Args:
+            input_file_id: ID of the JSONL input file
+            endpoint: Endpoint the requests are sent to
+            completion_window: Time frame the batch should complete in
+            metadata: Optional metadata of the batch
+
+        Returns:
+            The batch, in the "validating" status
+        """
+        batch = Batch(
+            id=f"batch-{uuid.uuid4().hex}",
+            completion_window=completion_window,
+            created_at=int(time.time()),
+            endpoint=endpoint,
+            input_file_id=input_file_id,
+            object="batch",
+            status="validating",
+            metadata=metadata,
+        )
+        self.batches[batch.id] = batch
+        self.polls[batch.id] = 0
+        return batch
+
+    def retrieve(self, batch_id: str) -> Batch:
+        """Fetch a batch, completing it on the ``polls_until_complete``-th call.
+
+        Args:
+            batch_id: ID of the batch
+
+        Returns:
+            The batch in its current status
+        """
+        batch = self.batches[batch_id]
+        self.polls[batch_id] += 1
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if self.polls[batch_id] < self.polls_until_complete:
+            batch.status = "in_progress"
+            return batch
+        self._complete(batch)
+        return batch
+
+    def _complete(self, batch: Batch) -> None:
+        """Run every request of a batch and store its output file."""
+        outputs = []
+        errors = []
+        for line in self.files.contents[batch.input_file_id].splitlines():
+            request = json.loads(line)
+            record: Dict[str, Any] = {
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request["custom_id"],
+            }
+            try:
+                body = self.respond(request["body"])
+            except Exception as e:
+                record["response"] = None
+                record["error"] = {"code": "local_error", "message": str(e)}
+                errors.append(record)
+                continue
+            record["response"] = {"status_code": 200, "body": body}
+            record["error"] = None
+            outputs.append(record)
+        batch.output_file_id = self.files.add(
+            "".join(json.dumps(record) + "\n" for record in outputs), "batch_output"
+        ).id
+        if errors:
+            batch.error_file_id = self.files.add(
+                "".join(json.dumps(record) + "\n" for record in errors),
+                "batch_output",
+            ).id
+        batch.status = "completed"
+        batch.completed_at = int(time.time())
+
+
+def echo_completion(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Respond to a chat completion request with its last message."""
+    content = str(params["messages"][-1].get("content") or "")
+    tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": params["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": tokens,
+            "completion_tokens": tokens,
+            "total_tokens": 2 * tokens,
+        },
+    }
+
+
+class LocalBatchClient:
+    """In-process stand-in for the Batch API of the OpenAI client.
+
+    Batches complete after a fixed number of status polls, running every
+    request through ``respond``. A request for which ``respond`` raises ends
+    up in the error file of the batch.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[Dict[str, Any]], Dict[str, Any]] = echo_completion,
+        polls_until_complete: int = 1,
+    ):
+        """Initialize the local batch client.
+
+        Args:
+            respond: Function returning the chat completion (as a dict) for the
+                parameters of a request
+            polls_until_complete: Number of ``batches.retrieve`` calls after
+                which a batch completes
+        """
+        self.files = _LocalFiles()
+        self.batches = _LocalBatches(self.files, respond, polls_until_complete)
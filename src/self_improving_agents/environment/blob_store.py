@@ -0,0 +1,151 @@
+"""Content-addressed storage of large snapshot payloads.
+
+Evaluation results and per-sample replay metadata can hold thousands of rows,
+which made snapshot files slow to write and to load. Payloads with many rows
+are stored instead as zstd-compressed sidecar blobs named by the hash of their
+content, Parquet for data frames and JSONL for lists of records, and the
+snapshot keeps only a small reference to them. Identical payloads are stored
+once. References are resolved only when the payload is requested.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+BLOB_REF_KEY = "$blob"
+COMPRESSION = "zstd"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Return whether a metadata value is a reference to a stored blob."""
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+class BlobStore:
+    """Store of zstd-compressed payloads addressed by their SHA-256 hash."""
+
+    def __init__(self, root_dir: str = ".sia/blobs", min_rows: int = 100):
+        """Initialize the blob store.
+
+        Args:
+            root_dir: Directory holding the blobs
+            min_rows: Number of rows from which a payload is stored as a blob
+                instead of inline
+        """
+        self.root_dir = root_dir
+        self.min_rows = min_rows
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def offload(self, value: Any) -> Any:
+        """Replace a large payload by a reference to its blob.
+
+        Data frames and lists of at least ``min_rows`` rows are stored as
+        blobs. Smaller data frames are converted to lists of records, and any
+        other value is returned unchanged.
+
+        Args:
+            value: Metadata value to offload
+
+        Returns:
+            The blob reference, or the value to store inline
+        """
+        if isinstance(value, pd.DataFrame):
+            if len(value) < self.min_rows:
+                return value.to_dict(orient="records")
+            try:
+                return self.put_dataframe(value)
+            except (pa.ArrowException, ValueError) as e:
+                logger.warning(f"Storing data frame as JSONL instead of Parquet: {e}")
+                return self.put_records(value.to_dict(orient="records"))
+        if isinstance(value, list) and len(value) >= self.min_rows:
+            return self.put_records(value)
+        return value
+
+    def put_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Store a data frame as a zstd-compressed Parquet blob.
+
+        Args:
+            df: Data frame to store
+
+        Returns:
+            Reference to the blob
+        """
+        sink = pa.BufferOutputStream()
+        pq.write_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            sink,
+            compression=COMPRESSION,
+        )
+        data = sink.getvalue().to_pybytes()
+        digest = hashlib.sha256(data).hexdigest()
+        self._write(self._path(digest, "parquet"), data)
+        return {BLOB_REF_KEY: digest, "format": "parquet", "rows": len(df)}
+
+    def put_records(self, records: List[Any]) -> Dict[str, Any]:
+        """Store a list of JSON-serializable records as a zstd-compressed JSONL blob.
+
+        Args:
+            records: Records to store
+
+        Returns:
+            Reference to the blob
+        """
+        data = "".join(
+            json.dumps(record, sort_keys=True, default=str) + "\n" for record in records
+        ).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, "jsonl")
+        if not os.path.exists(path):
+            sink = pa.BufferOutputStream()
+            with pa.CompressedOutputStream(sink, COMPRESSION) as compressed:
+                compressed.write(data)
+            self._write(path, sink.getvalue().to_pybytes())
+        return {BLOB_REF_KEY: digest, "format": "jsonl", "rows": len(records)}
+
+    def get(self, ref: Dict[str, Any]) -> List[Any]:
+        """Load the payload of a blob reference.
+
+        Args:
+            ref: Reference returned by ``put_dataframe`` or ``put_records``
+
+        Returns:
+            The stored rows, as a list of records
+
+        Raises:
+            FileNotFoundError: If the blob does not exist
+        """
+        path = self._path(ref[BLOB_REF_KEY], ref["format"])
+        if ref["format"] == "parquet":
+            records: List[Any] = pq.read_table(path).to_pylist()
+            return records
+        with pa.CompressedInputStream(pa.OSFile(path), COMPRESSION) as compressed:
+            data = compressed.read()
+        return [json.loads(line) for line in data.decode().splitlines() if line]
+
+    def resolve(self, value: Any) -> Any:
+        """Load the payload of a metadata value if it is a blob reference."""
+        return self.get(value) if is_blob_ref(value) else value
+
+    def _path(self, digest: str, blob_format: str) -> str:
+        """Path of a blob, sharded by the first two characters of its hash."""
+        extension = "parquet" if blob_format == "parquet" else "jsonl.zst"
+        return os.path.join(self.root_dir, digest[:2], f"{digest}.{extension}")
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Write a blob atomically, unless it is already stored."""
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
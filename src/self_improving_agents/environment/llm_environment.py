@@ -3,25 +3,39 @@
 This module provides a class for emulating LLM calls in a controlled environment,
 with instrumentation for tracking and analysis.
 """
+import asyncio
+import json
 import logging
 import os
-from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
+import pandas as pd
 from arize.otel import register
 from arize.utils.types import Environments
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from openai.types.chat import ChatCompletion
 from openinference.instrumentation.openai import OpenAIInstrumentor
 from phoenix.evals import OpenAIModel
 
 from ..evaluator_handler.eval_pipeline import EvalPipeline
 from ..evaluator_handler.evaluator_saver import EvaluatorSaver
-from ..models.state_action import StateActions
+from ..evaluator_handler.models import EvaluatorData
+from ..instrumentation.span_collector import SpanCollector
+from ..models.state_action import Actions, Sample, StateActions
 from ..policy import LLMPolicyUpdater
 from ..runners.arize_connector import ArizeConnector
 from ..runners.data_collection_runner import DataCollectionRunner
-from .snapshot import EnvironmentSnapshot
+from ..runners.telemetry_context import TelemetryContext
+from ..runners.telemetry_store import TelemetryStore
+from ..utils.cache import ResponseCache
+from ..utils.rate_limiter import RateLimiter, estimate_request_tokens
+from ..utils.run_catalog import TOKEN_KEYS, RunCatalog
+from .batch_replay import BatchReplayer, sample_custom_id
+from .blob_store import BlobStore
+from .snapshot import EnvironmentSnapshot, default_run_id
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +50,12 @@ class LLMEnvironment:
         arize_model_id: Optional[str] = None,
         openai_api_key: Optional[str] = None,
         checkpoint_dir: str = ".sia/checkpoint",
+        rate_limiter: Optional[RateLimiter] = None,
+        response_cache: Optional[ResponseCache] = None,
+        telemetry_store: Optional[TelemetryStore] = None,
+        batch_replayer: Optional[BatchReplayer] = None,
+        run_catalog: Optional[RunCatalog] = None,
+        blob_store: Optional[BlobStore] = None,
     ):
         """Initialize the LLM environment.
 
@@ -45,6 +65,18 @@ class LLMEnvironment:
             arize_model_id: Arize model ID (defaults to ARIZE_MODEL_ID env var)
             openai_api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             checkpoint_dir: Directory for action checkpoints
+            rate_limiter: Rate limiter shared by all OpenAI calls (defaults to a
+                limiter without budgets that only retries with backoff)
+            response_cache: Optional cache of replayed completions. Cached
+                replays are not re-sent to OpenAI and so are not traced again.
+            telemetry_store: Optional local Parquet store read before exporting
+                telemetry from Arize
+            batch_replayer: Replayer used for Batch API replays (defaults to
+                one submitting through the OpenAI client)
+            run_catalog: Catalog recording the snapshots and checkpoints of
+                the runs (defaults to one at ``.sia/catalog.sqlite``)
+            blob_store: Store of the large payloads of run snapshots, such as
+                evaluation results (defaults to one at ``.sia/blobs``)
         """
         # Set up environment variables
         self.arize_space_id = arize_space_id or os.getenv("ARIZE_SPACE_ID")
@@ -52,6 +84,10 @@ class LLMEnvironment:
         self.arize_model_id = arize_model_id or os.getenv("ARIZE_MODEL_ID")
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.checkpoint_dir = checkpoint_dir
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.response_cache = response_cache
+        self.run_catalog = run_catalog or RunCatalog()
+        self.blob_store = blob_store or BlobStore()
 
         # Ensure we have the required environment variables
         if not self.arize_space_id:
@@ -65,8 +101,10 @@ class LLMEnvironment:
                 "OPENAI_API_KEY not set, OpenAI client will use environment variables"
             )
 
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(api_key=self.openai_api_key)
+        # Initialize the OpenAI client; concurrent replays open an async
+        # client per event loop. Retries are handled by the rate limiter.
+        self.openai_client = OpenAI(api_key=self.openai_api_key, max_retries=0)
+        self.batch_replayer = batch_replayer or BatchReplayer(self.openai_client)
 
         # Initialize other components
         self.evaluator_saver = EvaluatorSaver()
@@ -74,6 +112,7 @@ class LLMEnvironment:
             space_id=self.arize_space_id,
             model_id=self.arize_model_id,
             api_key=self.arize_api_key,
+            telemetry_store=telemetry_store,
         )
 
         # Initialize eval pipeline
@@ -82,17 +121,30 @@ class LLMEnvironment:
             arize_connector=self.arize_connector,
         )
 
-        self.policy = LLMPolicyUpdater()  # for retrieving checkpoint
+        self.policy = LLMPolicyUpdater(
+            rate_limiter=self.rate_limiter,
+            catalog=self.run_catalog,
+            checkpoint_dir=self.checkpoint_dir,
+        )  # for retrieving checkpoint
         self.data_collector = DataCollectionRunner(
             evaluator_saver=self.evaluator_saver,
             arize_connector=self.arize_connector,
         )  # for collecting data
 
+        # Tracer provider of the current replay run, if tracing is enabled
+        self.tracer_provider: Optional[Any] = None
+
         # Create checkpoint directory
         os.makedirs(self.checkpoint_dir, exist_ok=True)
 
-    def _initialize_arize_tracking(self) -> OpenAIInstrumentor:
-        """Initialize Arize platform tracing."""
+    def _initialize_arize_tracking(
+        self, span_collector: Optional[SpanCollector] = None
+    ) -> Optional[OpenAIInstrumentor]:
+        """Initialize Arize platform tracing.
+
+        Args:
+            span_collector: Optional collector recording the IDs of traced spans
+        """
         if self.arize_space_id and self.arize_api_key:
             logger.info(
                 f"Registering Arize tracer provider for project '{self.arize_model_id}'"
@@ -103,6 +155,9 @@ class LLMEnvironment:
                 api_key=self.arize_api_key,
                 project_name=self.arize_model_id,
             )
+            if span_collector is not None:
+                tracer_provider.add_span_processor(span_collector)
+            self.tracer_provider = tracer_provider
 
             # Set up OpenAI instrumentation
             logger.info("Instrumenting OpenAI client")
@@ -114,6 +169,19 @@ class LLMEnvironment:
             logger.warning(
                 "Skipping Arize tracer registration due to missing credentials"
             )
+            return None
+
+    def _stop_arize_tracking(self, instrumentor: Optional[OpenAIInstrumentor]) -> None:
+        """Flush pending spans to Arize and remove the OpenAI instrumentation.
+
+        Args:
+            instrumentor: Instrumentor returned by ``_initialize_arize_tracking``
+        """
+        if instrumentor is None:
+            return
+        if self.tracer_provider is not None:
+            self.tracer_provider.force_flush()
+        instrumentor.uninstrument()
 
     def collect_updated_state_actions(
         self,
@@ -121,6 +189,7 @@ class LLMEnvironment:
         end_date: Optional[datetime] = datetime.now(),
         evaluator_names: Optional[List[str]] = None,
         limit: int = 100,
+        telemetry_context: Optional[TelemetryContext] = None,
     ) -> StateActions:
         """Collect samples from the Arize telemetry data.
 
@@ -129,6 +198,8 @@ class LLMEnvironment:
             end_date: End date for data collection
             evaluator_names: Names of evaluators to include
             limit: Maximum number of samples to collect
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize
 
         Returns:
             StateActions containing the collected samples
@@ -151,6 +222,7 @@ class LLMEnvironment:
             end_date=end_date,
             evaluator_names=evaluator_names,
             limit=limit,
+            telemetry_context=telemetry_context,
         )
 
         updated_actions = self.policy.load_checkpoint()
@@ -159,25 +231,210 @@ class LLMEnvironment:
 
         return state_actions
 
+    def _compose_replay_params(
+        self, actions: Actions, sample: Sample
+    ) -> Dict[str, Any]:
+        """Compose the chat completion parameters for replaying a sample.
+
+        Args:
+            actions: Actions (system prompt and model) to replay with
+            sample: Sample whose chat history is replayed
+
+        Returns:
+            Keyword arguments for ``chat.completions.create``
+        """
+        system_message = [
+            {
+                "role": "system",
+                "content": actions.system_prompt,
+            }
+        ]
+        return {
+            "model": actions.model,
+            "messages": system_message + sample.chat_history,
+        }
+
+    def _get_cached_response(self, params: Dict[str, Any]) -> Optional[ChatCompletion]:
+        """Look up a replayed completion in the response cache.
+
+        Args:
+            params: Chat completion parameters of the request
+
+        Returns:
+            The cached completion, or None if caching is disabled or missed
+        """
+        if self.response_cache is None:
+            return None
+        cached = self.response_cache.get(params)
+        return ChatCompletion.model_validate(cached) if cached is not None else None
+
+    def _cache_response(self, params: Dict[str, Any], response: ChatCompletion) -> None:
+        """Store a replayed completion in the response cache if enabled.
+
+        Args:
+            params: Chat completion parameters of the request
+            response: Completion returned for the request
+        """
+        if self.response_cache is not None:
+            self.response_cache.set(params, response.model_dump(mode="json"))
+
+    def _summarize_response(
+        self, response: ChatCompletion, cached: bool = False
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Extract the content and result metadata from a completion.
+
+        Args:
+            response: Completion returned by the OpenAI client
+            cached: Whether the completion was served from the response cache
+
+        Returns:
+            Tuple of the response content and its result metadata
+        """
+        content = response.choices[0].message.content
+        usage = response.usage
+        metadata: Dict[str, Any] = {
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "total_tokens": usage.total_tokens if usage else 0,
+            "response_length": len(content) if content else 0,
+        }
+        if cached:
+            metadata["cached"] = True
+        return content, metadata
+
+    def _compose_replay_metadata(
+        self, results_metadatas: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Compose the snapshot metadata recorded for a replay run.
+
+        Args:
+            results_metadatas: Result metadata in sample order
+
+        Returns:
+            Snapshot metadata with the results, token totals and, if enabled,
+            cache counts
+        """
+        metadata: Dict[str, Any] = {
+            "results_metadatas": results_metadatas,
+            "usage": {
+                key: sum(result.get(key, 0) for result in results_metadatas)
+                for key in TOKEN_KEYS
+            },
+        }
+        if self.response_cache is not None:
+            hits = sum(1 for result in results_metadatas if result.get("cached"))
+            metadata["cache"] = {
+                "hits": hits,
+                "misses": len(results_metadatas) - hits,
+            }
+        return metadata
+
+    def _compose_replay_response(
+        self,
+        model: str,
+        snapshot: EnvironmentSnapshot,
+        contents: List[Optional[str]],
+        results_metadatas: List[Dict[str, Any]],
+        span_collector: SpanCollector,
+    ) -> Dict[str, Any]:
+        """Compose the return value shared by the replay modes.
+
+        Args:
+            model: Model the samples were replayed with
+            snapshot: Snapshot tracking the replay run
+            contents: Response contents in sample order
+            results_metadatas: Result metadata in sample order
+            span_collector: Collector holding the IDs of the traced spans
+
+        Returns:
+            Dict containing the last content, all contents, usage and run info
+        """
+        usage = {
+            key: sum(metadata.get(key, 0) for metadata in results_metadatas)
+            for key in ("completion_tokens", "prompt_tokens", "total_tokens")
+        }
+        return {
+            "content": contents[-1] if contents else None,
+            "contents": contents,
+            "usage": usage,
+            "errors": sum(1 for metadata in results_metadatas if "error" in metadata),
+            "cache_hits": sum(
+                1 for metadata in results_metadatas if metadata.get("cached")
+            ),
+            "model": model,
+            "run_id": snapshot.run_id,
+            "start_time": snapshot.start_time,
+            "duration": snapshot.get_duration(),
+            "span_ids": span_collector.span_ids,
+        }
+
     def emulate_llm_call(
         self,
         state_actions: StateActions,
         run_id: Optional[str] = None,
+        max_concurrency: int = 1,
+        request_timeout: Optional[float] = None,
+        trace: bool = True,
+        batch: bool = False,
+        batch_timeout: Optional[float] = None,
     ) -> Dict[str, Any]:
         """Emulate an LLM call using the specified actions on all provided state action samples.
 
+        With ``max_concurrency`` greater than one the samples are replayed
+        concurrently through :meth:`aemulate_llm_call`. This uses
+        ``asyncio.run`` and therefore must not be called from a running event
+        loop; await :meth:`aemulate_llm_call` directly in that case.
+
+        With ``batch`` the samples are replayed offline through the Batch API
+        and this blocks until the batches end; use
+        :meth:`submit_batch_replay` and :meth:`collect_batch_replay` to avoid
+        keeping the process alive meanwhile.
+
         Args:
             state_actions: StateActions configuration to use
             run_id: Optional run ID for tracking
+            max_concurrency: Maximum number of in-flight requests
+            request_timeout: Optional per-request timeout in seconds
+            trace: Whether to trace the replayed calls to Arize; untraced
+                replays can run concurrently with each other
+            batch: Whether to replay through the Batch API (never traced)
+            batch_timeout: Maximum number of seconds to wait for the batches
 
         Returns:
             Response from the LLM
         """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
 
-        instrumentor = self._initialize_arize_tracking()
+        if batch:
+            run_id = self.submit_batch_replay(state_actions, run_id=run_id)
+            return self.collect_batch_replay(
+                state_actions, run_id, timeout=batch_timeout
+            )
 
-        # Create a snapshot
-        snapshot = EnvironmentSnapshot(run_id=run_id)
+        if max_concurrency > 1:
+            return asyncio.run(
+                self.aemulate_llm_call(
+                    state_actions,
+                    run_id=run_id,
+                    max_concurrency=max_concurrency,
+                    request_timeout=request_timeout,
+                    trace=trace,
+                )
+            )
+
+        span_collector = SpanCollector()
+        instrumentor = (
+            self._initialize_arize_tracking(span_collector) if trace else None
+        )
+
+        # Create a snapshot, recording per-sample progress as appended events
+        snapshot = EnvironmentSnapshot(
+            run_id=run_id,
+            event_log=True,
+            catalog=self.run_catalog,
+            blob_store=self.blob_store,
+        )
 
         # Start tracking
         snapshot.start(
@@ -185,71 +442,556 @@ class LLMEnvironment:
                 "model": state_actions.actions.model,
             }
         )
-        results_metadatas = []
+        contents: List[Optional[str]] = []
+        results_metadatas: List[Dict[str, Any]] = []
         model = state_actions.actions.model
-        # TODO: Run this in parallel
         for index, sample in enumerate(state_actions.samples):
             logger.info(f"Emulating LLM call for sample {index}")
-            system_message = [
-                {
-                    "role": "system",
-                    "content": state_actions.actions.system_prompt,
-                }
-            ]
-            logger.info(f"System message: {system_message}")
-            messages = system_message + sample.chat_history
-
-            params = {
-                "model": model,
-                "messages": messages,
-            }
+            params = self._compose_replay_params(state_actions.actions, sample)
+            request_kwargs = (
+                {"timeout": request_timeout} if request_timeout is not None else {}
+            )
 
             try:
-                # Make the actual call
-                logger.info(f"Making LLM call with model {model}")
-                response: ChatCompletion = self.openai_client.chat.completions.create(
-                    **params
-                )
-
-                # Extract the response content
-                content = response.choices[0].message.content
-
-                # Capture result metadata
-                results_metadatas.append(
-                    {
-                        "completion_tokens": response.usage.completion_tokens,
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "total_tokens": response.usage.total_tokens,
-                        "response_length": len(content) if content else 0,
-                    }
-                )
+                cached_response = self._get_cached_response(params)
+                if cached_response is not None:
+                    content, metadata = self._summarize_response(
+                        cached_response, cached=True
+                    )
+                else:
+                    # Make the actual call
+                    logger.info(f"Making LLM call with model {model}")
+                    response: ChatCompletion = self.rate_limiter.call(
+                        self.openai_client.chat.completions.create,
+                        estimated_tokens=estimate_request_tokens(params["messages"]),
+                        **params,
+                        **request_kwargs,
+                    )
+                    self._cache_response(params, response)
+                    content, metadata = self._summarize_response(response)
+                contents.append(content)
+                results_metadatas.append(metadata)
 
             except Exception as e:
                 logger.error(f"Error in LLM call: {e}")
+                contents.append(None)
                 results_metadatas.append(
                     {
                         "error": str(e),
                     }
                 )
 
-            # End tracking with result metadata
-            snapshot.end(
+            snapshot.progress({"sample_index": index, "result": results_metadatas[-1]})
+
+        # End tracking with result metadata
+        snapshot.end(self._compose_replay_metadata(results_metadatas))
+
+        self._stop_arize_tracking(instrumentor)
+
+        return self._compose_replay_response(
+            model, snapshot, contents, results_metadatas, span_collector
+        )
+
+    def _create_async_client(self) -> AsyncOpenAI:
+        """Create the async OpenAI client of one concurrent replay."""
+        return AsyncOpenAI(api_key=self.openai_api_key, max_retries=0)
+
+    async def aemulate_llm_call(
+        self,
+        state_actions: StateActions,
+        run_id: Optional[str] = None,
+        max_concurrency: int = 8,
+        request_timeout: Optional[float] = None,
+        trace: bool = True,
+    ) -> Dict[str, Any]:
+        """Concurrently emulate LLM calls on all provided state action samples.
+
+        At most ``max_concurrency`` requests are in flight at once and every
+        request is admitted by the shared rate limiter, which retries rate
+        limited and timed out requests. Results are collected in sample order
+        regardless of completion order, and a request that still fails is
+        recorded as an error for its sample only.
+
+        Args:
+            state_actions: StateActions configuration to use
+            run_id: Optional run ID for tracking
+            max_concurrency: Maximum number of in-flight requests
+            request_timeout: Optional per-request timeout in seconds
+            trace: Whether to trace the replayed calls to Arize
+
+        Returns:
+            Response from the LLM
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        span_collector = SpanCollector()
+        instrumentor = (
+            self._initialize_arize_tracking(span_collector) if trace else None
+        )
+
+        snapshot = EnvironmentSnapshot(
+            run_id=run_id, catalog=self.run_catalog, blob_store=self.blob_store
+        )
+        snapshot.start(
+            {
+                "model": state_actions.actions.model,
+                "max_concurrency": max_concurrency,
+            }
+        )
+        model = state_actions.actions.model
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def replay(
+            client: AsyncOpenAI, index: int, sample: Sample
+        ) -> Tuple[Optional[str], Dict[str, Any]]:
+            params = self._compose_replay_params(state_actions.actions, sample)
+            cached_response = self._get_cached_response(params)
+            if cached_response is not None:
+                return self._summarize_response(cached_response, cached=True)
+
+            async def complete() -> ChatCompletion:
+                return await asyncio.wait_for(
+                    client.chat.completions.create(**params),
+                    timeout=request_timeout,
+                )
+
+            async with semaphore:
+                logger.info(f"Emulating LLM call for sample {index}")
+                try:
+                    response = await self.rate_limiter.acall(
+                        complete,
+                        estimated_tokens=estimate_request_tokens(params["messages"]),
+                    )
+                except asyncio.TimeoutError:
+                    logger.error(f"LLM call for sample {index} timed out")
+                    return None, {"error": f"Timed out after {request_timeout}s"}
+                except Exception as e:
+                    logger.error(f"Error in LLM call for sample {index}: {e}")
+                    return None, {"error": str(e)}
+            self._cache_response(params, response)
+            return self._summarize_response(response)
+
+        # The connection pool of an async client is bound to the event loop
+        # it was first used on, so every call (and loop) opens its own
+        async with self._create_async_client() as client:
+            outcomes = await asyncio.gather(
+                *(
+                    replay(client, index, sample)
+                    for index, sample in enumerate(state_actions.samples)
+                )
+            )
+        contents = [content for content, _ in outcomes]
+        results_metadatas = [metadata for _, metadata in outcomes]
+
+        snapshot.end(self._compose_replay_metadata(results_metadatas))
+
+        self._stop_arize_tracking(instrumentor)
+
+        return self._compose_replay_response(
+            model, snapshot, contents, results_metadatas, span_collector
+        )
+
+    def submit_batch_replay(
+        self, state_actions: StateActions, run_id: Optional[str] = None
+    ) -> str:
+        """Submit the replay of all samples as Batch API batches.
+
+        Samples whose response is cached are not submitted, and nothing is
+        submitted when every response is cached. The batches are recorded
+        under the run ID, so their results can be collected later from
+        another process with :meth:`collect_batch_replay`.
+
+        Args:
+            state_actions: StateActions configuration to use
+            run_id: Optional run ID for tracking (defaults to a timestamp
+                with a random suffix)
+
+        Returns:
+            The run ID to collect the results with
+        """
+        run_id = run_id or default_run_id()
+        requests = {}
+        for index, sample in enumerate(state_actions.samples):
+            params = self._compose_replay_params(state_actions.actions, sample)
+            if self._get_cached_response(params) is None:
+                requests[sample_custom_id(index)] = params
+        logger.info(
+            f"Submitting {len(requests)} of {len(state_actions.samples)} samples "
+            f"as batch run {run_id}"
+        )
+        self.batch_replayer.submit(requests, run_id)
+        return run_id
+
+    def collect_batch_replay(
+        self,
+        state_actions: StateActions,
+        run_id: str,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Wait for a submitted batch replay and merge its results in sample order.
+
+        Samples that were not submitted are served from the response cache.
+
+        Args:
+            state_actions: StateActions the batch was submitted for
+            run_id: Run ID returned by :meth:`submit_batch_replay`
+            timeout: Maximum number of seconds to wait for all the batches
+
+        Returns:
+            Response from the LLM, in the same form as :meth:`emulate_llm_call`
+        """
+        manifest = self.batch_replayer.load_manifest(run_id)
+        if manifest is None:
+            raise ValueError(f"No batch was submitted for run '{run_id}'")
+
+        snapshot = EnvironmentSnapshot(
+            run_id=run_id, catalog=self.run_catalog, blob_store=self.blob_store
+        )
+        batch_ids = [batch["batch_id"] for batch in manifest["batches"]]
+        snapshot.start(
+            {
+                "model": state_actions.actions.model,
+                "batch_ids": batch_ids,
+            }
+        )
+        results: Dict[str, Tuple[Optional[ChatCompletion], Optional[str]]] = {}
+        batch_statuses = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for batch_id in batch_ids:
+            remaining = (
+                None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            )
+            batch = self.batch_replayer.wait(batch_id, timeout=remaining)
+            if batch.status != "completed":
+                logger.warning(f"Batch {batch.id} ended with status '{batch.status}'")
+            results.update(self.batch_replayer.results(batch))
+            batch_statuses.append(f"{batch.id} ({batch.status})")
+        missing_error = (
+            f"Missing from batches {', '.join(batch_statuses)}"
+            if batch_statuses
+            else "Not submitted and no longer cached"
+        )
+
+        contents: List[Optional[str]] = []
+        results_metadatas: List[Dict[str, Any]] = []
+        for index, sample in enumerate(state_actions.samples):
+            params = self._compose_replay_params(state_actions.actions, sample)
+            custom_id = sample_custom_id(index)
+            if custom_id in results:
+                batch_response, error = results[custom_id]
+                if batch_response is None:
+                    content, metadata = None, {"error": error}
+                else:
+                    self._cache_response(params, batch_response)
+                    content, metadata = self._summarize_response(batch_response)
+            else:
+                cached_response = self._get_cached_response(params)
+                if cached_response is not None:
+                    content, metadata = self._summarize_response(
+                        cached_response, cached=True
+                    )
+                else:
+                    content = None
+                    metadata = {"error": missing_error}
+            contents.append(content)
+            results_metadatas.append(metadata)
+
+        snapshot.end(self._compose_replay_metadata(results_metadatas))
+
+        response = self._compose_replay_response(
+            state_actions.actions.model,
+            snapshot,
+            contents,
+            results_metadatas,
+            SpanCollector(),
+        )
+        response["batch_ids"] = batch_ids
+        return response
+
+    def wait_for_ingestion(
+        self,
+        replay_result: Dict[str, Any],
+        mode: Literal["poll", "local"] = "poll",
+        timeout: float = 300.0,
+    ) -> bool:
+        """Wait until the spans of a replay run are visible in Arize.
+
+        In ``"poll"`` mode the Arize export is polled with backoff until every
+        span traced during the replay is visible or the timeout expires. In
+        ``"local"`` mode the spans were already flushed when the replay ended
+        and no round-trip to Arize is made, so the following steps must not
+        export the replayed spans; evaluate the replay outputs instead (see
+        the ``replay_result`` argument of :meth:`emulate_evals`).
+
+        Args:
+            replay_result: Return value of ``emulate_llm_call``
+            mode: ``"poll"`` to poll Arize, ``"local"`` to skip the round-trip
+            timeout: Maximum number of seconds to poll for
+
+        Returns:
+            True if the spans are visible (or no wait was needed), False if the
+            timeout expired first
+        """
+        span_ids = replay_result.get("span_ids") or []
+        if mode == "local" or not span_ids:
+            logger.info(f"Skipping ingestion polling for {len(span_ids)} spans")
+            return True
+
+        start_time = replay_result.get("start_time") or datetime.now()
+        logger.info(f"Waiting for {len(span_ids)} replayed spans to be ingested")
+        return self.arize_connector.wait_for_spans(
+            span_ids=span_ids,
+            start_date=start_time - timedelta(minutes=5),
+            timeout=timeout,
+        )
+
+    def build_replay_dataframe(
+        self, state_actions: StateActions, replay_result: Dict[str, Any]
+    ) -> pd.DataFrame:
+        """Build span-shaped rows from the outputs of a replay run.
+
+        The rows carry the same input and output columns as spans exported
+        from Arize, so evaluators and their templates can run on them
+        directly. Samples whose replay failed are left out.
+
+        Args:
+            state_actions: StateActions that were replayed
+            replay_result: Return value of ``emulate_llm_call``
+
+        Returns:
+            DataFrame indexed by sample position
+        """
+        rows = []
+        for index, (sample, content) in enumerate(
+            zip(state_actions.samples, replay_result["contents"])
+        ):
+            if content is None:
+                continue
+            params = self._compose_replay_params(state_actions.actions, sample)
+            rows.append(
                 {
-                    "results_metadatas": results_metadatas,
+                    "sample_index": index,
+                    "context.span_id": f"{replay_result['run_id']}-{index}",
+                    "attributes.llm.model_name": replay_result["model"],
+                    "attributes.input.value": json.dumps(
+                        {"messages": params["messages"]}
+                    ),
+                    "attributes.llm.input_messages": [
+                        {
+                            "message.role": message.get("role"),
+                            "message.content": message.get("content"),
+                        }
+                        for message in params["messages"]
+                    ],
+                    "attributes.output.value": content,
+                    "attributes.llm.output_messages": [
+                        {"message.role": "assistant", "message.content": content}
+                    ],
                 }
             )
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index("sample_index", drop=False)
 
-        instrumentor.uninstrument()
+    def evaluate_replay(
+        self,
+        state_actions: StateActions,
+        replay_result: Dict[str, Any],
+        evaluator: Callable,
+        evaluator_name: str,
+        model: OpenAIModel,
+    ) -> pd.DataFrame:
+        """Evaluate the outputs of a replay run, keeping their sample positions.
+
+        Runs :meth:`emulate_eval` on the replay outputs under the run ID
+        ``{replay run ID}.{evaluator_name}``.
+
+        Args:
+            state_actions: StateActions that were replayed
+            replay_result: Return value of ``emulate_llm_call``
+            evaluator: The evaluation function to run
+            evaluator_name: Name of the saved evaluator configuration
+            model: Model used by the evaluator
+
+        Returns:
+            DataFrame containing evaluation results, indexed by sample position
+        """
+        replay_df = self.build_replay_dataframe(state_actions, replay_result)
+        if replay_df.empty:
+            return replay_df
+        eval_result = self.emulate_eval(
+            state_actions,
+            evaluator,
+            model,
+            evaluator_name,
+            run_id=f"{replay_result['run_id']}.{evaluator_name}",
+            primary_df=replay_df,
+        )
+        return pd.DataFrame(eval_result["results"], index=replay_df.index)
+
+    def _compose_telemetry_kwargs(
+        self,
+        eval_config: EvaluatorData,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> Dict[str, Any]:
+        """Compose the telemetry export arguments of an evaluator.
 
-        # Return the response
+        Args:
+            eval_config: Saved configuration of the evaluator
+            start_time: Start of the time window
+            end_time: End of the time window
+
+        Returns:
+            Arguments for getting the telemetry data to evaluate
+        """
         return {
-            "content": content,
-            "usage": response.usage.model_dump(),
-            "model": model,
-            "run_id": snapshot.run_id,
-            "duration": snapshot.get_duration(),
+            **eval_config.get_telemetry_kwargs,
+            "model_id": self.arize_model_id,
+            "space_id": self.arize_space_id,
+            "environment": Environments.TRACING,
+            "start_time": start_time,
+            "end_time": end_time,
         }
 
+    def emulate_evals(
+        self,
+        state_actions: StateActions,
+        evaluator: Callable,
+        model: OpenAIModel,
+        evaluator_names: List[str],
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        run_id: Optional[str] = None,
+        upsert: bool = False,
+        limit: int = 100,
+        max_workers: Optional[int] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        telemetry_context: Optional[TelemetryContext] = None,
+        replay_result: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run several evaluators concurrently on a single export of the spans.
+
+        Evaluators whose saved configurations export the same telemetry share
+        one export, and every evaluator then runs in its own thread, so the
+        evaluation takes about as long as the slowest evaluator rather than
+        the sum of all of them.
+
+        Args:
+            state_actions: StateActions containing evaluation configuration
+            evaluator: The evaluation function to run
+            model: Model used by the evaluators
+            evaluator_names: Names of the evaluators to run
+            start_time: Start of the time window
+            end_time: End of the time window
+            run_id: Optional run ID for tracking; each evaluator's snapshot
+                is saved as ``{run_id}.{evaluator_name}``
+            upsert: Whether to upload results to Arize
+            limit: Number of samples to run the evaluations on
+            max_workers: Maximum number of evaluators running at once
+                (defaults to all of them)
+            concurrency: Maximum number of concurrent requests per evaluator
+                name (evaluators missing from it use their own default)
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize
+            replay_result: Return value of ``emulate_llm_call`` whose outputs
+                are evaluated directly, instead of exporting spans
+
+        Returns:
+            The result of :meth:`emulate_eval` per evaluator name
+        """
+        if not evaluator_names:
+            return {}
+
+        if replay_result is not None:
+            replay_df = self.build_replay_dataframe(state_actions, replay_result)
+            primary_dfs = {name: replay_df for name in evaluator_names}
+            if upsert:
+                logger.warning("Evaluations of replay outputs are not uploaded")
+                upsert = False
+        else:
+            primary_dfs = self._export_primary_dfs(
+                evaluator_names, start_time, end_time, limit, telemetry_context
+            )
+
+        concurrency = concurrency or {}
+        with ThreadPoolExecutor(
+            max_workers=max_workers or len(evaluator_names)
+        ) as pool:
+            futures = {
+                evaluator_name: pool.submit(
+                    self.emulate_eval,
+                    state_actions=state_actions,
+                    evaluator=evaluator,
+                    model=model,
+                    evaluator_name=evaluator_name,
+                    start_time=start_time,
+                    end_time=end_time,
+                    run_id=f"{run_id}.{evaluator_name}" if run_id else None,
+                    upsert=upsert,
+                    limit=limit,
+                    primary_df=primary_dfs[evaluator_name],
+                    concurrency=concurrency.get(evaluator_name),
+                    telemetry_context=telemetry_context,
+                )
+                for evaluator_name in evaluator_names
+            }
+            return {
+                evaluator_name: future.result()
+                for evaluator_name, future in futures.items()
+            }
+
+    def _export_primary_dfs(
+        self,
+        evaluator_names: List[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        limit: int,
+        telemetry_context: Optional[TelemetryContext],
+    ) -> Dict[str, pd.DataFrame]:
+        """Export the spans to evaluate once per distinct telemetry configuration.
+
+        Args:
+            evaluator_names: Names of the evaluators to export spans for
+            start_time: Start of the time window
+            end_time: End of the time window
+            limit: Number of samples to run the evaluations on
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow
+
+        Returns:
+            Spans to evaluate per evaluator name
+        """
+        # Group the evaluators by the telemetry they evaluate
+        groups: Dict[str, List[str]] = {}
+        telemetry_kwargs: Dict[str, Dict[str, Any]] = {}
+        for evaluator_name in evaluator_names:
+            eval_config = self.evaluator_saver.load_evaluator(evaluator_name)
+            if not eval_config:
+                raise ValueError(f"Evaluator '{evaluator_name}' not found")
+            kwargs = self._compose_telemetry_kwargs(eval_config, start_time, end_time)
+            key = json.dumps(kwargs, sort_keys=True, default=str)
+            groups.setdefault(key, []).append(evaluator_name)
+            telemetry_kwargs[key] = kwargs
+
+        primary_dfs: Dict[str, pd.DataFrame] = {}
+        for key, names in groups.items():
+            primary_df = self.eval_pipeline.export_primary_df(
+                telemetry_kwargs[key],
+                start_date=start_time,
+                end_date=end_time,
+                limit=limit,
+                telemetry_context=telemetry_context,
+            )
+            for evaluator_name in names:
+                primary_dfs[evaluator_name] = primary_df
+        logger.info(
+            f"Exported spans {len(groups)} time(s) for "
+            f"{len(evaluator_names)} evaluators"
+        )
+        return primary_dfs
+
     def emulate_eval(
         self,
         state_actions: StateActions,
@@ -261,6 +1003,10 @@ class LLMEnvironment:
         run_id: Optional[str] = None,
         upsert: bool = False,
         limit: int = 100,
+        primary_df: Optional[pd.DataFrame] = None,
+        concurrency: Optional[int] = None,
+        telemetry_context: Optional[TelemetryContext] = None,
+        replay_result: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Emulate an evaluation using the specified evaluator and snapshot data.
 
@@ -271,12 +1017,28 @@ class LLMEnvironment:
             snapshot_window: Number of days to look back for snapshot data (default: 1)
             run_id: Optional run ID for tracking
             upsert: Whether to upload results to Arize
+            primary_df: Spans already exported for this evaluation, to evaluate
+                instead of exporting them again
+            concurrency: Maximum number of concurrent evaluator requests
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize
+            replay_result: Return value of ``emulate_llm_call`` whose outputs
+                are evaluated directly, instead of exporting spans; such
+                evaluations are not uploaded to Arize
 
         Returns:
             Dict containing evaluation results and metadata
         """
+        if replay_result is not None:
+            primary_df = self.build_replay_dataframe(state_actions, replay_result)
+            if upsert:
+                logger.warning("Evaluations of replay outputs are not uploaded")
+                upsert = False
+
         # Create a snapshot for tracking
-        snapshot = EnvironmentSnapshot(run_id=run_id)
+        snapshot = EnvironmentSnapshot(
+            run_id=run_id, catalog=self.run_catalog, blob_store=self.blob_store
+        )
 
         eval_config = self.evaluator_saver.load_evaluator(evaluator_name)
         if not eval_config:
@@ -294,14 +1056,12 @@ class LLMEnvironment:
         # This assumes state_actions.actions contains the evaluation configuration
 
         # Prepare telemetry kwargs
-        get_telemetry_kwargs = {
-            **eval_config.get_telemetry_kwargs,
-            "model_id": self.arize_model_id,
-            "space_id": self.arize_space_id,
-            "environment": Environments.TRACING,
-            "start_time": start_time,
-            "end_time": end_time,
-        }
+        get_telemetry_kwargs = self._compose_telemetry_kwargs(
+            eval_config, start_time, end_time
+        )
+
+        # Share the rate limit budget with the evaluator model
+        self.rate_limiter.attach_to_model(model)
 
         eval_kwargs = {
             **eval_config.eval_kwargs,
@@ -319,15 +1079,16 @@ class LLMEnvironment:
             limit=limit,
             start_date=start_time,
             end_date=end_time,
+            primary_df=primary_df,
+            concurrency=concurrency,
+            telemetry_context=telemetry_context,
         )
 
-        results_json = results.to_dict(orient="records")
-
-        # End tracking with result metadata
+        # End tracking with result metadata; large results go to a blob
         snapshot.end(
             {
                 "results_rows": len(results),
-                "results": results_json,
+                "results": results,
                 "evaluator_name": evaluator_name,
                 "success": True,
             }
@@ -2,32 +2,74 @@
 
 This module provides a class for creating and tracking environment snapshots
 during LLM call runs, allowing for analysis of start and end times.
+
+Runs that record progress per sample can keep an append-only JSONL event log
+instead of rewriting the snapshot file on every update. Events are buffered
+and appended in batches, and the log is compacted into the snapshot file
+when the run ends.
+
+Snapshots given a ``BlobStore`` keep large payloads, such as evaluation
+results, in compressed sidecar blobs and only reference them, so snapshot
+files stay small; ``load_payload`` loads such a payload on request.
+
+Snapshots given a ``RunCatalog`` are recorded in it whenever they are saved,
+so the latest snapshot is found without listing the snapshot directory.
 """
 import json
 import os
+import uuid
 from datetime import datetime
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
+
+import pandas as pd
 
 from ..models.snapshot import SnapshotData
+from ..utils.run_catalog import TOKEN_KEYS, RunCatalog
+from .blob_store import BlobStore, is_blob_ref
+
+EVENT_LOG_SUFFIX = ".events.jsonl"
 
 
 class EnvironmentSnapshot:
     """Snapshot of the environment state during LLM call runs."""
 
     def __init__(
-        self, run_id: Optional[str] = None, snapshot_dir: str = ".sia/snapshots"
+        self,
+        run_id: Optional[str] = None,
+        snapshot_dir: str = ".sia/snapshots",
+        event_log: bool = False,
+        flush_every: int = 64,
+        fsync: Literal["never", "flush", "end"] = "end",
+        catalog: Optional[RunCatalog] = None,
+        blob_store: Optional[BlobStore] = None,
     ):
         """Initialize an environment snapshot.
 
         Args:
-            run_id: Unique identifier for the run (defaults to timestamp)
+            run_id: Unique identifier for the run (defaults to a timestamp
+                with a random suffix, unique across concurrent runs)
             snapshot_dir: Directory to save snapshots
+            event_log: Record the run as an append-only event log, compacted
+                into the snapshot file when the run ends
+            flush_every: Number of buffered events after which the event log
+                is appended to
+            fsync: When the event log is synced to disk: "never", on every
+                "flush", or only at the "end" of the run
+            catalog: Catalog the snapshot is recorded in whenever it is saved
+            blob_store: Store large metadata values are offloaded to (without
+                one, data frames are stored inline as lists of records)
         """
-        self.run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+        self.run_id = run_id or default_run_id()
         self.snapshot_dir = snapshot_dir
         self.start_time: Optional[datetime] = None
         self.end_time: Optional[datetime] = None
         self.metadata: Dict[str, Any] = {}
+        self.event_log = event_log
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.catalog = catalog
+        self.blob_store = blob_store
+        self._events: List[str] = []
 
         # Create the snapshots directory if it doesn't exist
         os.makedirs(self.snapshot_dir, exist_ok=True)
@@ -41,13 +83,35 @@ class EnvironmentSnapshot:
             metadata: Optional metadata about the run
         """
         self.start_time = datetime.now()
+        metadata = self._offload(metadata)
         if metadata:
             self.metadata.update(metadata)
 
+        if self.event_log:
+            self._append_event("start", metadata, run_id=self.run_id)
+            self.flush()
         # Save initial snapshot
-        if save:
+        elif save:
             self._save_snapshot()
 
+    def progress(self, metadata: Dict[str, Any]) -> None:
+        """Record the progress of a running run, such as one sample's result.
+
+        With an event log this appends a single buffered event. Without one
+        the metadata is merged into the snapshot and the file is rewritten.
+
+        Args:
+            metadata: Metadata about the progress
+        """
+        metadata = self._offload(metadata) or {}
+        if not self.event_log:
+            self.metadata.update(metadata)
+            self._save_snapshot()
+            return
+        self._append_event("progress", metadata)
+        if len(self._events) >= self.flush_every:
+            self.flush()
+
     def end(self, metadata: Optional[Dict[str, Any]] = None, save: bool = True) -> None:
         """End the snapshot tracking.
 
@@ -55,12 +119,88 @@ class EnvironmentSnapshot:
             metadata: Optional metadata about the run results
         """
         self.end_time = datetime.now()
+        metadata = self._offload(metadata)
         if metadata:
             self.metadata.update(metadata)
 
+        if self.event_log:
+            self._append_event("end", metadata)
+            self.flush(sync=self.fsync != "never")
+            compact_event_log(self.event_log_path, catalog=self.catalog)
+            return
         # Save final snapshot
         self._save_snapshot()
 
+    def _offload(self, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Replace large metadata values by references to their blobs."""
+        if not metadata:
+            return metadata
+        if self.blob_store is not None:
+            return {
+                key: self.blob_store.offload(value) for key, value in metadata.items()
+            }
+        return {
+            key: value.to_dict(orient="records")
+            if isinstance(value, pd.DataFrame)
+            else value
+            for key, value in metadata.items()
+        }
+
+    def load_payload(self, snapshot_data: SnapshotData, key: str) -> Any:
+        """Load a metadata value of a snapshot, reading its blob if offloaded.
+
+        Args:
+            snapshot_data: Loaded snapshot
+            key: Metadata key of the payload
+
+        Returns:
+            The value of the payload
+
+        Raises:
+            ValueError: If the payload is offloaded and the snapshot has no
+                blob store to read it from
+        """
+        value = snapshot_data.metadata.get(key)
+        if self.blob_store is not None:
+            return self.blob_store.resolve(value)
+        if is_blob_ref(value):
+            raise ValueError(f"Payload '{key}' is stored as a blob")
+        return value
+
+    @property
+    def event_log_path(self) -> str:
+        """Path of the run's event log."""
+        return os.path.join(self.snapshot_dir, f"{self.run_id}{EVENT_LOG_SUFFIX}")
+
+    def _append_event(
+        self, event: str, metadata: Optional[Dict[str, Any]], **fields: Any
+    ) -> None:
+        """Buffer an event of the event log."""
+        record = {
+            "event": event,
+            "timestamp": datetime.now().isoformat(),
+            **fields,
+            "metadata": metadata or {},
+        }
+        self._events.append(json.dumps(record, default=str))
+
+    def flush(self, sync: Optional[bool] = None) -> None:
+        """Append the buffered events to the event log.
+
+        Args:
+            sync: Whether to fsync the log (defaults to the fsync policy)
+        """
+        if not self._events:
+            return
+        if sync is None:
+            sync = self.fsync == "flush"
+        with open(self.event_log_path, "a") as f:
+            f.write("\n".join(self._events) + "\n")
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        self._events.clear()
+
     def _save_snapshot(self) -> str:
         """Save the current snapshot to a file.
 
@@ -91,10 +231,15 @@ class EnvironmentSnapshot:
         filename = f"{self.run_id}.json"
         filepath = os.path.join(self.snapshot_dir, filename)
 
-        # Save as JSON
-        with open(filepath, "w") as f:
+        # Save as JSON, replacing the file atomically so that readers and
+        # concurrent writers never see a partial snapshot
+        tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
             f.write(snapshot_data.model_dump_json(indent=2))
+        os.replace(tmp_path, filepath)
 
+        if self.catalog is not None:
+            record_snapshot(self.catalog, snapshot_data, filepath)
         return filepath
 
     def get_duration(self) -> Optional[float]:
@@ -113,7 +258,8 @@ class EnvironmentSnapshot:
         """Load a snapshot from a file.
 
         If no filepath is provided, the most recent snapshot file in the
-        snapshot_dir will be loaded.
+        snapshot_dir will be loaded, looked up in the catalog when the
+        snapshot has one.
 
         Args:
             filepath: Optional path to snapshot file
@@ -125,6 +271,16 @@ class EnvironmentSnapshot:
         Raises:
             FileNotFoundError: If no snapshot files exist or the specified file doesn't exist
         """
+        if filepath is None and self.catalog is not None:
+            latest = self.catalog.latest("snapshot")
+            if (
+                latest is not None
+                and os.path.dirname(os.path.normpath(latest.path))
+                == os.path.normpath(snapshot_dir)
+                and os.path.exists(latest.path)
+            ):
+                filepath = latest.path
+
         # If no filepath provided, find the most recent snapshot
         if filepath is None:
             if not os.path.exists(snapshot_dir):
@@ -154,3 +310,125 @@ class EnvironmentSnapshot:
         with open(filepath, "r") as f:
             data = json.load(f)
             return SnapshotData(**data)
+
+
+def default_run_id() -> str:
+    """Return a run ID made of the current time and a random suffix."""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def compact_event_log(
+    log_path: str, catalog: Optional[RunCatalog] = None
+) -> SnapshotData:
+    """Compact the event log of a run into its snapshot file.
+
+    The log is replaced by the snapshot file. A run whose log has no end event
+    (for instance because the process died) is compacted as running, with its
+    progress records kept under the ``progress`` metadata key; for ended runs
+    the end metadata is expected to summarize the progress.
+
+    A log that is already gone was compacted by another process, whose
+    snapshot file is returned instead.
+
+    Args:
+        log_path: Path of the event log
+        catalog: Catalog to record the snapshot in
+
+    Returns:
+        The snapshot data written
+
+    Raises:
+        FileNotFoundError: If neither the log nor its snapshot file exists
+    """
+    run_id = os.path.basename(log_path)[: -len(EVENT_LOG_SUFFIX)]
+    snapshot_path = os.path.join(os.path.dirname(log_path), f"{run_id}.json")
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+    progress: List[Dict[str, Any]] = []
+    try:
+        with open(log_path, "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        with open(snapshot_path, "r") as f:
+            return SnapshotData.model_validate_json(f.read())
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A partially written last line of an interrupted run
+            continue
+        if record["event"] == "start":
+            start_time = record["timestamp"]
+            metadata.update(record["metadata"])
+        elif record["event"] == "progress":
+            progress.append(record["metadata"])
+        elif record["event"] == "end":
+            end_time = record["timestamp"]
+            metadata.update(record["metadata"])
+
+    if end_time is None:
+        metadata["progress"] = progress
+    snapshot_data = SnapshotData(
+        run_id=run_id,
+        status="completed" if end_time else "running",
+        timestamp=datetime.now().isoformat(),
+        start_time=start_time,
+        end_time=end_time,
+        duration_seconds=(
+            (
+                datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)
+            ).total_seconds()
+            if start_time and end_time
+            else None
+        ),
+        metadata=metadata,
+    )
+    tmp_path = f"{snapshot_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(snapshot_data.model_dump_json(indent=2))
+    os.replace(tmp_path, snapshot_path)
+    try:
+        os.remove(log_path)
+    except FileNotFoundError:
+        # Removed by a concurrent compaction of the same log
+        pass
+    if catalog is not None:
+        record_snapshot(catalog, snapshot_data, snapshot_path)
+    return snapshot_data
+
+
+def record_snapshot(
+    catalog: RunCatalog, snapshot_data: SnapshotData, path: str
+) -> None:
+    """Record a saved snapshot in the catalog, with its token totals.
+
+    Args:
+        catalog: Catalog to record the snapshot in
+        snapshot_data: Snapshot data that was saved
+        path: Path of the snapshot file
+    """
+    usage = snapshot_data.metadata.get("usage")
+    results = snapshot_data.metadata.get("results_metadatas")
+    if usage is None and isinstance(results, list) and results:
+        usage = {
+            key: sum(result.get(key, 0) for result in results) for key in TOKEN_KEYS
+        }
+    catalog.record_run(
+        run_id=snapshot_data.run_id,
+        kind="snapshot",
+        path=path,
+        status=snapshot_data.status,
+        start_time=(
+            datetime.fromisoformat(snapshot_data.start_time)
+            if snapshot_data.start_time
+            else None
+        ),
+        end_time=(
+            datetime.fromisoformat(snapshot_data.end_time)
+            if snapshot_data.end_time
+            else None
+        ),
+        duration_seconds=snapshot_data.duration_seconds,
+        usage=usage,
+    )
@@ -1,6 +1,7 @@
 """
 Eval pipeline for formulaic evals
 """
+import logging
 from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, Optional
 
@@ -8,8 +9,11 @@ import pandas as pd
 from arize.pandas.logger import Client
 
 from ..runners.arize_connector import ArizeConnector
+from ..runners.telemetry_context import TelemetryContext
 from .evaluator_saver import EvaluatorSaver
 
+logger = logging.getLogger(__name__)
+
 
 class EvalPipeline:
     """Pipeline for running evaluations with tracking."""
@@ -28,6 +32,56 @@ class EvalPipeline:
         self.evaluator_saver = evaluator_saver
         self.arize_connector = arize_connector
 
+    def export_primary_df(
+        self,
+        get_telemetry_kwargs: Dict[str, Any],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        telemetry_context: Optional[TelemetryContext] = None,
+    ) -> pd.DataFrame:
+        """Export the spans an evaluation run evaluates.
+
+        The result can be shared by several evaluators through the
+        ``primary_df`` argument of :meth:`run_pipeline`.
+
+        Args:
+            get_telemetry_kwargs: Arguments for getting telemetry data
+            start_date: Start of the time window (defaults to 7 days ago)
+            end_date: End of the time window (defaults to now)
+            limit: Number of (most recent) spans to keep
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize
+
+        Returns:
+            DataFrame containing the spans to evaluate
+        """
+        self._resolve_time_window(get_telemetry_kwargs, start_date, end_date)
+
+        # Get primary data from the workflow's telemetry, or else from Arize
+        # (or the local telemetry store)
+        source = telemetry_context or self.arize_connector
+        primary_df = source.export_spans(**get_telemetry_kwargs)
+
+        # limit the number of samples to run the evaluation on
+        return primary_df.tail(limit)
+
+    def _resolve_time_window(
+        self,
+        get_telemetry_kwargs: Dict[str, Any],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+    ) -> None:
+        """Set the time window of the telemetry kwargs, filling in defaults."""
+        if start_date is not None:
+            get_telemetry_kwargs["start_time"] = start_date
+        else:
+            get_telemetry_kwargs["start_time"] = datetime.now() - timedelta(days=7)
+        if end_date is not None:
+            get_telemetry_kwargs["end_time"] = end_date
+        else:
+            get_telemetry_kwargs["end_time"] = datetime.now()
+
     def run_pipeline(
         self,
         evaluator: Callable,
@@ -38,6 +92,10 @@ class EvalPipeline:
         end_date: Optional[datetime] = None,
         upsert: bool = False,
         limit: int = 100,
+        incremental: bool = False,
+        primary_df: Optional[pd.DataFrame] = None,
+        concurrency: Optional[int] = None,
+        telemetry_context: Optional[TelemetryContext] = None,
     ) -> pd.DataFrame:
         """Execute complete evaluation pipeline.
 
@@ -48,29 +106,46 @@ class EvalPipeline:
             get_telemetry_kwargs: Arguments for getting telemetry data
             upsert: Whether to upload results to Arize
             limit: Number of samples to run the evaluation on
+            incremental: Only evaluate spans not evaluated by a previous
+                incremental run of this evaluator
+            primary_df: Spans already exported with :meth:`export_primary_df`,
+                to evaluate instead of exporting them again
+            concurrency: Maximum number of concurrent evaluator requests
+                (defaults to the evaluator's own default); not saved with the
+                evaluator configuration
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize (not used for
+                incremental runs)
 
         Returns:
             DataFrame containing evaluation results
         """
-        if start_date is not None:
-            get_telemetry_kwargs["start_time"] = start_date
-        else:
-            get_telemetry_kwargs["start_time"] = datetime.now() - timedelta(days=7)
-        if end_date is not None:
-            get_telemetry_kwargs["end_time"] = end_date
-        else:
-            get_telemetry_kwargs["end_time"] = datetime.now()
-
-        # Get primary data from Arize
-        primary_df = self.arize_connector.client.export_model_to_df(
-            **get_telemetry_kwargs
-        )
+        self._resolve_time_window(get_telemetry_kwargs, start_date, end_date)
 
-        # limit the number of samples to run the evaluation on
-        primary_df = primary_df.tail(limit)
+        cursor = None
+        if primary_df is not None:
+            logger.info(
+                f"Evaluating {len(primary_df)} shared spans with '{evaluator_name}'"
+            )
+        elif incremental:
+            # Get only the spans newer than the previous run of this evaluator;
+            # the cursor is saved once they are evaluated (and uploaded)
+            primary_df, cursor = self.arize_connector.export_since_cursor(
+                cursor_key=f"{get_telemetry_kwargs['model_id']}.{evaluator_name}",
+                limit=limit,
+                **get_telemetry_kwargs,
+            )
+            if primary_df.empty:
+                logger.info(f"No new spans to evaluate with '{evaluator_name}'")
+                return primary_df
+        else:
+            primary_df = self.export_primary_df(
+                get_telemetry_kwargs, start_date, end_date, limit, telemetry_context
+            )
 
         # Run evaluation
-        evals_df = evaluator(**evaluator_kwargs, dataframe=primary_df)
+        run_kwargs = {} if concurrency is None else {"concurrency": concurrency}
+        evals_df = evaluator(**evaluator_kwargs, **run_kwargs, dataframe=primary_df)
 
         # Add OpenInference attributes
         evals_df["context.span_id"] = primary_df["context.span_id"]
@@ -98,5 +173,13 @@ class EvalPipeline:
             logger_client.log_evaluations_sync(
                 dataframe=evals_df, model_id=get_telemetry_kwargs["model_id"]
             )
+            self.arize_connector.invalidate_spans(primary_df)
+            # The workflow's copies of the spans get the logged evaluations
+            # directly instead of being exported again
+            if telemetry_context is not None:
+                telemetry_context.add_evaluations(evals_df)
+
+        if cursor is not None:
+            self.arize_connector.save_cursor(cursor)
 
         return evals_df
@@ -1,13 +1,24 @@
-"""Implementation of evaluator saving functionality."""
+"""Implementation of evaluator saving functionality.
+
+Evaluator files may be shared by several worker processes. Writes hold an
+advisory lock on the evaluator while they merge into the current file and
+replace it atomically, so readers never see a partial file. Loaded
+evaluators are cached and re-read only when their file's inode, modification
+time or size changes.
+"""
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from pydantic import ValidationError
 
+from ..utils.file_lock import FileLock, atomic_write
 from .models import EvaluatorData
 
+# Identifies a version of an evaluator file: inode, mtime (ns) and size
+FileStamp = Tuple[int, int, int]
+
 
 class EvaluatorSaver:
     """Handles saving and retrieving evaluator configuration data."""
@@ -22,6 +33,8 @@ class EvaluatorSaver:
         self.save_dir = Path(save_dir or os.path.join(os.getcwd(), ".sia/evaluator"))
         self.save_dir.mkdir(parents=True, exist_ok=True)
         self.saved_data: Dict[str, EvaluatorData] = {}
+        # Version of the file each cached evaluator was read from or written to
+        self._stamps: Dict[str, FileStamp] = {}
 
     def save_evaluator(
         self,
@@ -31,27 +44,34 @@ class EvaluatorSaver:
     ) -> None:
         """Save evaluator configuration data.
 
+        The kwargs are merged into the evaluator as currently saved on disk,
+        which may have been updated by another process.
+
         Args:
             evaluator_name: Name of the evaluator
             eval_kwargs: Optional kwargs for evaluation
             get_telemetry_kwargs: Optional kwargs for telemetry
         """
-        # Create or update evaluator data
-        if evaluator_name not in self.saved_data:
-            self.saved_data[evaluator_name] = EvaluatorData(name=evaluator_name)
-
-        evaluator_data = self.saved_data[evaluator_name]
-
-        # Update kwargs if provided
-        if eval_kwargs is not None:
-            evaluator_data.eval_kwargs = eval_kwargs
-        if get_telemetry_kwargs is not None:
-            evaluator_data.get_telemetry_kwargs = get_telemetry_kwargs
-
-        # Save to disk
-        file_path = self.save_dir / f"{evaluator_name}.json"
-        with open(file_path, "w") as f:
-            json.dump(evaluator_data.model_dump(), f, default=str, indent=2)
+        file_path = self._file_path(evaluator_name)
+        with FileLock(f"{file_path}.lock"):
+            # Create or update evaluator data
+            evaluator_data = self._read(evaluator_name) or EvaluatorData(
+                name=evaluator_name
+            )
+
+            # Update kwargs if provided
+            if eval_kwargs is not None:
+                evaluator_data.eval_kwargs = eval_kwargs
+            if get_telemetry_kwargs is not None:
+                evaluator_data.get_telemetry_kwargs = get_telemetry_kwargs
+
+            # Save to disk
+            atomic_write(
+                str(file_path),
+                json.dumps(evaluator_data.model_dump(), default=str, indent=2),
+            )
+            self.saved_data[evaluator_name] = evaluator_data
+            self._stamps[evaluator_name] = _stamp(os.stat(file_path))
 
     def load_evaluator(self, evaluator_name: str) -> Optional[EvaluatorData]:
         """Load evaluator configuration data.
@@ -65,20 +85,47 @@ class EvaluatorSaver:
         Raises:
             ValueError: If the data file exists but is invalid
         """
-        # Try memory first
-        if evaluator_name in self.saved_data:
+        # Try memory first, if the file has not changed since it was cached
+        try:
+            stamp = _stamp(os.stat(self._file_path(evaluator_name)))
+        except FileNotFoundError:
+            self._forget(evaluator_name)
+            return None
+        if self._stamps.get(evaluator_name) == stamp:
             return self.saved_data[evaluator_name]
 
-        # Try loading from disk
-        file_path = self.save_dir / f"{evaluator_name}.json"
-        if file_path.exists():
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    evaluator_data = EvaluatorData(**data)
-                    self.saved_data[evaluator_name] = evaluator_data
-                    return evaluator_data
-            except (json.JSONDecodeError, ValidationError):
-                raise ValueError(f"Failed to load evaluator data from {file_path}")
-
-        return None
+        # Load from disk
+        return self._read(evaluator_name)
+
+    def _file_path(self, evaluator_name: str) -> Path:
+        """Path of an evaluator's file."""
+        return self.save_dir / f"{evaluator_name}.json"
+
+    def _read(self, evaluator_name: str) -> Optional[EvaluatorData]:
+        """Read an evaluator from disk and cache it with its file's version."""
+        file_path = self._file_path(evaluator_name)
+        try:
+            with open(file_path, "r") as f:
+                # Stat the open file, which keeps its version if it is replaced
+                stamp = _stamp(os.fstat(f.fileno()))
+                data = json.load(f)
+            evaluator_data = EvaluatorData(**data)
+        except FileNotFoundError:
+            self._forget(evaluator_name)
+            return None
+        except (json.JSONDecodeError, ValidationError):
+            raise ValueError(f"Failed to load evaluator data from {file_path}")
+
+        self.saved_data[evaluator_name] = evaluator_data
+        self._stamps[evaluator_name] = stamp
+        return evaluator_data
+
+    def _forget(self, evaluator_name: str) -> None:
+        """Drop an evaluator from the cache."""
+        self.saved_data.pop(evaluator_name, None)
+        self._stamps.pop(evaluator_name, None)
+
+
+def _stamp(stat_result: os.stat_result) -> FileStamp:
+    """Version of a file, changed by every write or atomic replacement."""
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
@@ -0,0 +1,241 @@
+"""Summary statistics of evaluation results.
+
+Scores are gathered per evaluator in a single pass over the samples and then
+aggregated with NumPy, so the cost is linear in the number of evaluations.
+Deduplicated samples count as many times as their weight.
+The same summaries describe telemetry samples and the results of an
+evaluation run, which makes baseline and updated policies comparable.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..models.evaluation_summary import EvaluatorSummary
+from ..models.state_action import ColumnarSamples, Sample
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def summarize_evaluations(samples: Sequence[Sample]) -> Dict[str, EvaluatorSummary]:
+    """Summarize every evaluator found on the samples.
+
+    Args:
+        samples: Samples with evaluations, as a list or ``ColumnarSamples``
+
+    Returns:
+        Summary per evaluator name, in order of first appearance
+    """
+    if isinstance(samples, ColumnarSamples):
+        summaries = {}
+        weights = samples.weights()
+        for name in samples.eval_names:
+            codes = samples.label_codes(name)
+            categories = samples.label_categories(name)
+            labeled = codes >= 0
+            label_counts = np.bincount(
+                codes[labeled], weights=weights[labeled], minlength=len(categories)
+            )
+            summaries[name] = _summarize(
+                name,
+                samples.scores(name),
+                Counter(
+                    {
+                        label: int(count)
+                        for label, count in zip(categories, label_counts)
+                        if count
+                    }
+                ),
+                weights=weights,
+            )
+        return summaries
+
+    scores: Dict[str, List[float]] = {}
+    sample_weights: Dict[str, List[int]] = {}
+    labels: Dict[str, Counter] = {}
+    for sample in samples:
+        for eval_metric in sample.evals:
+            if eval_metric.name not in scores:
+                scores[eval_metric.name] = []
+                sample_weights[eval_metric.name] = []
+                labels[eval_metric.name] = Counter()
+            scores[eval_metric.name].append(
+                np.nan if eval_metric.eval_score is None else eval_metric.eval_score
+            )
+            sample_weights[eval_metric.name].append(sample.weight)
+            if eval_metric.eval_label is not None:
+                labels[eval_metric.name][eval_metric.eval_label] += sample.weight
+
+    total_weight = sum(sample.weight for sample in samples)
+    return {
+        name: _summarize(
+            name,
+            np.array(name_scores, dtype=np.float64),
+            labels[name],
+            samples=total_weight,
+            weights=np.array(sample_weights[name], dtype=np.int64),
+        )
+        for name, name_scores in scores.items()
+    }
+
+
+def summarize_eval_results(
+    results: pd.DataFrame, evaluator_name: str
+) -> EvaluatorSummary:
+    """Summarize the results of an evaluation run.
+
+    Args:
+        results: Evaluation results with ``score`` and/or ``label`` columns,
+            as returned by ``EvalPipeline.run_pipeline``
+        evaluator_name: Name of the evaluator
+
+    Returns:
+        Summary of the evaluator
+    """
+    label_counts: Counter = Counter()
+    if "label" in results.columns:
+        label_counts.update(results["label"].dropna().astype(str).tolist())
+    return _summarize(evaluator_name, result_scores(results), label_counts)
+
+
+def result_scores(results: pd.DataFrame) -> np.ndarray:
+    """Extract the per-row scores of evaluation results.
+
+    Without a ``score`` column, numeric labels (such as rails ``"1"`` to
+    ``"5"``) are used as scores.
+
+    Args:
+        results: Evaluation results with ``score`` and/or ``label`` columns
+
+    Returns:
+        Scores in row order, NaN where missing
+    """
+    scores: np.ndarray = np.full(len(results), np.nan)
+    if "score" in results.columns:
+        scores = pd.to_numeric(results["score"], errors="coerce").to_numpy(float)
+    elif "label" in results.columns:
+        scores = pd.to_numeric(results["label"], errors="coerce").to_numpy(float)
+    return scores
+
+
+def compare_summaries(
+    baseline: Dict[str, EvaluatorSummary], updated: Dict[str, EvaluatorSummary]
+) -> Dict[str, Optional[float]]:
+    """Compute the change in mean score of every evaluator in both summaries.
+
+    Args:
+        baseline: Summaries of the baseline policy
+        updated: Summaries of the updated policy
+
+    Returns:
+        Updated minus baseline mean per evaluator, None if either has no scores
+    """
+    deltas: Dict[str, Optional[float]] = {}
+    for name, baseline_summary in baseline.items():
+        if name not in updated:
+            continue
+        baseline_mean, updated_mean = baseline_summary.mean, updated[name].mean
+        deltas[name] = (
+            None
+            if baseline_mean is None or updated_mean is None
+            else updated_mean - baseline_mean
+        )
+    return deltas
+
+
+def format_summary(summary: EvaluatorSummary) -> str:
+    """Format a summary as a single line for prompts and logs.
+
+    Args:
+        summary: Summary of an evaluator
+
+    Returns:
+        One-line description of the summary
+    """
+    parts = [f"Samples: {summary.count}/{summary.samples} scored"]
+    if summary.mean is not None:
+        parts.insert(
+            0,
+            f"Average score: {summary.mean:.4g}, Std: {summary.std:.4g}, "
+            f"Min: {summary.min:.4g}, Median: {summary.percentiles['p50']:.4g}, "
+            f"Max: {summary.max:.4g}",
+        )
+    if summary.label_counts:
+        labels = ", ".join(
+            f"{label}: {count}"
+            for label, count in sorted(
+                summary.label_counts.items(), key=lambda item: -item[1]
+            )
+        )
+        parts.append(f"Labels: {labels}")
+    return f"- {summary.name}: " + ", ".join(parts)
+
+
+def _summarize(
+    name: str,
+    all_scores: np.ndarray,
+    label_counts: Counter,
+    samples: Optional[int] = None,
+    weights: Optional[np.ndarray] = None,
+) -> EvaluatorSummary:
+    """Build the summary of an array of scores with NaN for missing ones.
+
+    Each score counts as many times as its integer weight; the statistics
+    are computed from the weights directly, giving the same results as
+    repeating every score that many times.
+    """
+    if weights is None:
+        weights = np.ones(len(all_scores), dtype=np.int64)
+    scored = ~np.isnan(all_scores)
+    scores, score_weights = all_scores[scored], weights[scored]
+    count = int(score_weights.sum())
+    samples = int(weights.sum()) if samples is None else samples
+    summary = EvaluatorSummary(
+        name=name,
+        samples=samples,
+        count=count,
+        label_counts=dict(label_counts),
+        missing_rate=(samples - count) / samples if samples else 0.0,
+    )
+    if count:
+        mean = np.average(scores, weights=score_weights)
+        summary.mean = float(mean)
+        summary.std = float(
+            np.sqrt(np.average((scores - mean) ** 2, weights=score_weights))
+        )
+        summary.min = float(scores[score_weights > 0].min())
+        summary.max = float(scores[score_weights > 0].max())
+        summary.percentiles = {
+            f"p{q}": value
+            for q, value in zip(
+                PERCENTILES, _weighted_percentiles(scores, score_weights, PERCENTILES)
+            )
+        }
+    return summary
+
+
+def _weighted_percentiles(
+    scores: np.ndarray, weights: np.ndarray, percentiles: Sequence[float]
+) -> List[float]:
+    """Compute percentiles of scores repeated by integer weights.
+
+    Uses linear interpolation between the closest ranks, like
+    ``np.percentile``, locating ranks in the cumulative weights instead of
+    materializing the repeated scores.
+    """
+    order = np.argsort(scores, kind="stable")
+    sorted_scores = scores[order]
+    cumulative = np.cumsum(weights[order])
+    total = int(cumulative[-1])
+
+    def at_rank(rank: np.ndarray) -> np.ndarray:
+        return sorted_scores[np.searchsorted(cumulative, rank, side="right")]
+
+    positions = (total - 1) * np.asarray(percentiles, dtype=np.float64) / 100
+    lower = np.floor(positions)
+    upper = np.minimum(lower + 1, total - 1)
+    lower_scores, upper_scores = at_rank(lower), at_rank(upper)
+    values = lower_scores + (positions - lower) * (upper_scores - lower_scores)
+    return [float(value) for value in values]
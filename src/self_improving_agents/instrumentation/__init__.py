@@ -7,4 +7,9 @@ Classes:
     Tracker: Base class for tracking system behavior.
     EvaluationTracker: Tracker for evaluation function calls.
     OptimizationTracker: Tracker for optimization process.
+    SpanCollector: Span processor recording the IDs of finished spans.
 """
+
+from .span_collector import SpanCollector
+
+__all__ = ["SpanCollector"]
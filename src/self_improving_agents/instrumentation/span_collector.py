@@ -0,0 +1,48 @@
+"""Span collector for tracking the spans produced by a replay run.
+
+This module defines a span processor that records the IDs of the spans
+emitted while replaying samples, so that callers know exactly which spans
+to expect once the telemetry has been ingested.
+"""
+
+import threading
+from typing import List, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+
+class SpanCollector(SpanProcessor):
+    """Span processor that records the IDs of finished spans."""
+
+    def __init__(self) -> None:
+        """Initialize the span collector."""
+        self._span_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def span_ids(self) -> List[str]:
+        """IDs of the finished spans, hex encoded as in Arize exports."""
+        with self._lock:
+            return list(self._span_ids)
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        """Ignore started spans; only finished spans are recorded."""
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Record the ID of a finished span.
+
+        Args:
+            span: The finished span
+        """
+        if span.context is None:
+            return
+        with self._lock:
+            self._span_ids.append(format(span.context.span_id, "016x"))
+
+    def shutdown(self) -> None:
+        """Nothing to release on shutdown."""
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Spans are recorded synchronously, so there is nothing to flush."""
+        return True
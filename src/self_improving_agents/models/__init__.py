@@ -4,16 +4,42 @@ This module contains the data structures and schemas used throughout the
 system, implemented using Pydantic for validation and serialization.
 """
 
-from .policy_update import PolicyUpdate
+from .checkpoint import CheckpointRecord
+from .evaluation_summary import EvaluatorSummary
+from .policy_update import (
+    CandidateScore,
+    PolicySearchResult,
+    PolicyUpdate,
+    RaceResult,
+    RaceStanding,
+)
+from .run_record import RunRecord
 from .snapshot import SnapshotData
-from .state_action import Actions, EvalConstant, EvalMetrics, Sample, StateActions
+from .state_action import (
+    Actions,
+    ColumnarSamples,
+    EvalConstant,
+    EvalMetrics,
+    Sample,
+    StateActions,
+)
+from .telemetry import TelemetryCursor
 
 __all__ = [
     "Actions",
+    "CheckpointRecord",
+    "ColumnarSamples",
     "EvalConstant",
     "EvalMetrics",
+    "EvaluatorSummary",
     "Sample",
     "StateActions",
     "PolicyUpdate",
+    "CandidateScore",
+    "PolicySearchResult",
+    "RaceResult",
+    "RaceStanding",
+    "RunRecord",
     "SnapshotData",
+    "TelemetryCursor",
 ]
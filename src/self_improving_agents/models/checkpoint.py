@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .state_action import Actions
+
+
+class CheckpointRecord(BaseModel):
+    """Stored checkpoint of a policy, addressed by the hash of its actions."""
+
+    checkpoint_id: str = Field(..., description="SHA-256 hash of the actions")
+    parent: Optional[str] = Field(
+        default=None, description="ID of the checkpoint the policy was derived from"
+    )
+    created_at: str = Field(
+        ..., description="ISO formatted timestamp when the checkpoint was first saved"
+    )
+    actions: Actions = Field(..., description="Actions of the policy")
@@ -0,0 +1,25 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class EvaluatorSummary(BaseModel):
+    """Aggregate statistics of one evaluator's results over a set of samples."""
+
+    name: str = Field(..., description="Name of the evaluator")
+    samples: int = Field(..., description="Number of samples summarized")
+    count: int = Field(..., description="Number of samples with a score")
+    mean: Optional[float] = Field(default=None, description="Mean score")
+    std: Optional[float] = Field(
+        default=None, description="Population standard deviation"
+    )
+    min: Optional[float] = Field(default=None, description="Lowest score")
+    max: Optional[float] = Field(default=None, description="Highest score")
+    percentiles: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Score percentiles keyed by name, e.g. p50",
+    )
+    label_counts: Dict[str, int] = Field(
+        default_factory=dict, description="Number of samples per label"
+    )
+    missing_rate: float = Field(..., description="Fraction of samples without a score")
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -12,3 +12,83 @@ class PolicyUpdate(BaseModel):
         description="A list of thoughts about the policy update."
     )
     actions: Actions = Field(description="The actions to update the policy with.")
+
+
+class CandidateScore(BaseModel):
+    """A candidate policy and the scores it obtained during a policy search."""
+
+    actions: Actions = Field(description="The actions of the candidate policy.")
+    thoughts: List[str] = Field(
+        default_factory=list, description="The thoughts behind the candidate."
+    )
+    scores: Dict[str, Optional[float]] = Field(
+        default_factory=dict,
+        description="Mean score per evaluator (None if it produced no scores).",
+    )
+    score: Optional[float] = Field(
+        default=None, description="Mean of the evaluator scores."
+    )
+    error: Optional[str] = Field(
+        default=None, description="Error raised while scoring the candidate."
+    )
+
+
+class PolicySearchResult(BaseModel):
+    """The outcome of scoring several candidate policies."""
+
+    best: Actions = Field(description="The actions of the best candidate.")
+    best_score: Optional[float] = Field(
+        default=None, description="The score of the best candidate."
+    )
+    candidates: List[CandidateScore] = Field(
+        description="Every scored candidate, the current policy first if included."
+    )
+
+
+class RaceStanding(BaseModel):
+    """A candidate policy and where it stood when a race ended for it."""
+
+    actions: Actions = Field(description="The actions of the candidate policy.")
+    samples: int = Field(
+        default=0, description="Number of samples the candidate was replayed on."
+    )
+    count: int = Field(
+        default=0, description="Weighted number of samples with a score."
+    )
+    mean: Optional[float] = Field(
+        default=None, description="Mean score over the scored samples."
+    )
+    lower: Optional[float] = Field(
+        default=None, description="Lower confidence bound of the mean score."
+    )
+    upper: Optional[float] = Field(
+        default=None, description="Upper confidence bound of the mean score."
+    )
+    eliminated_round: Optional[int] = Field(
+        default=None,
+        description=(
+            "Round after which the candidate was dropped (None if it survived)."
+        ),
+    )
+    error: Optional[str] = Field(
+        default=None, description="Error raised while scoring the candidate."
+    )
+
+
+class RaceResult(BaseModel):
+    """The outcome of racing candidate policies on growing sample budgets."""
+
+    best: Actions = Field(description="The actions of the best candidate.")
+    best_score: Optional[float] = Field(
+        default=None, description="The mean score of the best candidate."
+    )
+    standings: List[RaceStanding] = Field(
+        description="Every candidate, in the order they entered the race."
+    )
+    rounds: int = Field(description="Number of rounds run.")
+    replays: int = Field(description="Number of samples replayed over all candidates.")
+    full_replays: int = Field(
+        description=(
+            "Number of samples replaying every candidate on every sample would take."
+        )
+    )
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RunRecord(BaseModel):
+    """Catalog entry of a run snapshot or an actions checkpoint."""
+
+    run_id: str = Field(..., description="Run ID, or checkpoint name")
+    kind: str = Field(..., description="Kind of entry, e.g. snapshot or checkpoint")
+    path: str = Field(..., description="Path of the file the entry describes")
+    status: Optional[str] = Field(default=None, description="Status of the run")
+    created_at: datetime = Field(..., description="When the entry was last saved")
+    start_time: Optional[datetime] = Field(
+        default=None, description="When the run started"
+    )
+    end_time: Optional[datetime] = Field(default=None, description="When the run ended")
+    duration_seconds: Optional[float] = Field(
+        default=None, description="Duration of the run in seconds"
+    )
+    prompt_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens used by the run"
+    )
+    completion_tokens: Optional[int] = Field(
+        default=None, description="Completion tokens used by the run"
+    )
+    total_tokens: Optional[int] = Field(
+        default=None, description="Total tokens used by the run"
+    )
+    scores: Dict[str, Optional[float]] = Field(
+        default_factory=dict, description="Mean score per evaluator name"
+    )
@@ -1,9 +1,23 @@
 # src/self_improving_agents/models/state_action.py
 """State-action pair models for policy learning."""
+import json
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+    overload,
+)
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, GetCoreSchemaHandler
+from pydantic_core import core_schema
 
 
 class EvalMetrics(BaseModel):
@@ -21,6 +35,321 @@ class Sample(BaseModel):
     chat_history: List[Dict[str, Any]]  # This is systemless
     output_generation: str
     evals: List[EvalMetrics]
+    weight: int = 1  # Number of collected samples this one stands for
+
+
+class TextColumn:
+    """Strings packed into one shared buffer and addressed by offsets."""
+
+    def __init__(self, values: Iterable[Optional[str]]):
+        """Pack a column of strings.
+
+        Args:
+            values: Strings of the column, None for missing values
+        """
+        strings = list(values)
+        self.missing = np.fromiter(
+            (value is None for value in strings), dtype=bool, count=len(strings)
+        )
+        self.offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        np.cumsum(
+            np.fromiter(
+                (len(value or "") for value in strings),
+                dtype=np.int64,
+                count=len(strings),
+            ),
+            out=self.offsets[1:],
+        )
+        self.buffer = "".join(value or "" for value in strings)
+
+    def __len__(self) -> int:
+        """Number of values in the column."""
+        return len(self.missing)
+
+    def get(self, row: int) -> Optional[str]:
+        """Return the string at ``row``, or None if it is missing."""
+        if self.missing[row]:
+            return None
+        return self.buffer[int(self.offsets[row]) : int(self.offsets[row + 1])]
+
+
+class InternedColumn:
+    """Low-cardinality strings stored once, addressed by integer codes."""
+
+    def __init__(self, values: Iterable[Optional[str]]):
+        """Intern a column of strings.
+
+        Args:
+            values: Strings of the column, None for missing values
+        """
+        lookup: Dict[str, int] = {}
+        codes = [
+            -1 if value is None else lookup.setdefault(value, len(lookup))
+            for value in values
+        ]
+        self.codes = np.array(codes, dtype=np.int32)
+        self.categories: List[str] = list(lookup)
+
+    def __len__(self) -> int:
+        """Number of values in the column."""
+        return len(self.codes)
+
+    def get(self, row: int) -> Optional[str]:
+        """Return the string at ``row``, or None if it is missing."""
+        code = int(self.codes[row])
+        return None if code < 0 else self.categories[code]
+
+
+class EvalColumn:
+    """Scores, labels and reasonings of one evaluator across samples."""
+
+    def __init__(
+        self,
+        scores: Iterable[Optional[float]],
+        reasonings: Iterable[Optional[str]],
+        labels: Iterable[Optional[str]],
+    ):
+        """Build the columns of one evaluator.
+
+        Args:
+            scores: Scores per sample, None or NaN when missing
+            reasonings: Reasonings per sample, None when missing
+            labels: Labels per sample, None when missing
+        """
+        self.scores = np.array(
+            [np.nan if score is None else score for score in scores], dtype=np.float64
+        )
+        self.reasonings = TextColumn(reasonings)
+        self.labels = InternedColumn(labels)
+
+
+class ColumnarSamples(Sequence[Sample]):
+    """Read-only, column-backed sequence of samples.
+
+    Holds one score array per evaluator, interned labels and the chat
+    histories, outputs and reasonings packed into shared text buffers instead
+    of one pydantic object per sample and evaluation. It behaves like a
+    ``List[Sample]`` for reading: indexing and iterating materialize
+    ``Sample`` objects on demand, which are not kept, so changes made to them
+    are not reflected in the container. Columns can also be read directly,
+    e.g. with ``scores``, without materializing any sample.
+
+    Chat histories are kept as the JSON chat requests recorded in telemetry
+    (an object with a ``messages`` list); a leading system message is dropped
+    when a sample is materialized.
+    """
+
+    def __init__(
+        self,
+        chat_histories: TextColumn,
+        output_generations: TextColumn,
+        evals: Mapping[str, EvalColumn],
+        rows: Optional[np.ndarray] = None,
+        weights: Optional[np.ndarray] = None,
+    ):
+        """Initialize the container from packed columns.
+
+        Args:
+            chat_histories: JSON chat requests of the samples
+            output_generations: Output generations of the samples
+            evals: Columns of each evaluator, by evaluator name
+            rows: Rows of the columns making up this sequence (defaults to
+                all rows, in order); views share the columns of their parent
+            weights: Weight of each sample of this sequence (defaults to 1)
+        """
+        self._chat_histories = chat_histories
+        self._output_generations = output_generations
+        self._evals = dict(evals)
+        self._rows = (
+            np.arange(len(chat_histories), dtype=np.int64) if rows is None else rows
+        )
+        self._weights = (
+            np.ones(len(self._rows), dtype=np.int64) if weights is None else weights
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        chat_histories: Iterable[str],
+        output_generations: Iterable[str],
+        evals: Mapping[str, EvalColumn],
+        weights: Optional[Iterable[int]] = None,
+    ) -> "ColumnarSamples":
+        """Build the container from plain columns.
+
+        Args:
+            chat_histories: JSON chat requests, e.g. ``attributes.input.value``
+            output_generations: Output generations of the samples
+            evals: Columns of each evaluator, by evaluator name
+            weights: Weight of each sample (defaults to 1)
+
+        Returns:
+            Container holding the samples in the given order
+        """
+        return cls(
+            TextColumn(chat_histories),
+            TextColumn(output_generations),
+            evals,
+            weights=None if weights is None else np.array(weights, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[Sample]) -> "ColumnarSamples":
+        """Build the container from sample objects.
+
+        Evaluators are taken from the first sample; every sample is expected
+        to carry the same evaluators.
+
+        Args:
+            samples: Samples to pack
+
+        Returns:
+            Container holding the samples in the given order
+        """
+        samples = list(samples)
+        eval_names = (
+            [eval_metrics.name for eval_metrics in samples[0].evals] if samples else []
+        )
+        evals_by_sample = [
+            {eval_metrics.name: eval_metrics for eval_metrics in sample.evals}
+            for sample in samples
+        ]
+        evals = {}
+        for name in eval_names:
+            metrics = [sample_evals.get(name) for sample_evals in evals_by_sample]
+            evals[name] = EvalColumn(
+                scores=[m.eval_score if m else None for m in metrics],
+                reasonings=[m.eval_reasoning if m else None for m in metrics],
+                labels=[m.eval_label if m else None for m in metrics],
+            )
+        return cls.from_columns(
+            chat_histories=[
+                json.dumps({"messages": sample.chat_history}) for sample in samples
+            ],
+            output_generations=[sample.output_generation for sample in samples],
+            evals=evals,
+            weights=[sample.weight for sample in samples],
+        )
+
+    @property
+    def eval_names(self) -> List[str]:
+        """Names of the evaluators held by the container."""
+        return list(self._evals)
+
+    def scores(self, eval_name: str) -> np.ndarray:
+        """Return the scores of an evaluator, NaN where missing."""
+        scores: np.ndarray = self._evals[eval_name].scores[self._rows]
+        return scores
+
+    def label_codes(self, eval_name: str) -> np.ndarray:
+        """Return the interned label codes of an evaluator, -1 where missing."""
+        codes: np.ndarray = self._evals[eval_name].labels.codes[self._rows]
+        return codes
+
+    def label_categories(self, eval_name: str) -> List[str]:
+        """Return the distinct labels of an evaluator, indexed by label code."""
+        return list(self._evals[eval_name].labels.categories)
+
+    def weights(self) -> np.ndarray:
+        """Return the weight of every sample."""
+        return self._weights
+
+    def labels(self, eval_name: str) -> List[Optional[str]]:
+        """Return the labels of an evaluator, None where missing."""
+        labels = self._evals[eval_name].labels
+        return [labels.get(int(row)) for row in self._rows]
+
+    def take(
+        self, indices: Sequence[int], weights: Optional[Sequence[int]] = None
+    ) -> "ColumnarSamples":
+        """Return a view holding the samples at ``indices``, in that order.
+
+        Args:
+            indices: Positions of the samples to keep
+            weights: New weights of the kept samples (defaults to their
+                current weights)
+
+        Returns:
+            View sharing the columns of this container
+        """
+        positions = np.asarray(indices, dtype=np.int64)
+        return ColumnarSamples(
+            self._chat_histories,
+            self._output_generations,
+            self._evals,
+            self._rows[positions],
+            self._weights[positions]
+            if weights is None
+            else np.asarray(weights, dtype=np.int64),
+        )
+
+    def to_samples(self) -> List[Sample]:
+        """Materialize every sample."""
+        return list(self)
+
+    def _materialize(self, row: int, weight: int) -> Sample:
+        """Build the sample stored at ``row`` of the columns."""
+        chat_history = json.loads(self._chat_histories.get(row) or "{}").get(
+            "messages", []
+        )
+        if chat_history and chat_history[0].get("role") == "system":
+            chat_history = chat_history[1:]
+        scores = {
+            name: float(column.scores[row]) for name, column in self._evals.items()
+        }
+        return Sample(
+            chat_history=chat_history,
+            output_generation=self._output_generations.get(row) or "",
+            evals=[
+                EvalMetrics(
+                    name=name,
+                    eval_score=None if np.isnan(scores[name]) else scores[name],
+                    eval_reasoning=column.reasonings.get(row),
+                    eval_label=column.labels.get(row),
+                )
+                for name, column in self._evals.items()
+            ],
+            weight=weight,
+        )
+
+    def __len__(self) -> int:
+        """Number of samples."""
+        return len(self._rows)
+
+    @overload
+    def __getitem__(self, index: int) -> Sample: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ColumnarSamples": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Sample, "ColumnarSamples"]:
+        """Materialize the sample at ``index``, or return a view of a slice."""
+        if isinstance(index, slice):
+            return ColumnarSamples(
+                self._chat_histories,
+                self._output_generations,
+                self._evals,
+                self._rows[index],
+                self._weights[index],
+            )
+        return self._materialize(int(self._rows[index]), int(self._weights[index]))
+
+    def __iter__(self) -> Iterator[Sample]:
+        """Materialize the samples one at a time."""
+        for row, weight in zip(self._rows, self._weights):
+            yield self._materialize(int(row), int(weight))
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source_type: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        """Accept instances as is and serialize them as a list of samples."""
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda samples: [sample.model_dump() for sample in samples]
+            ),
+        )
 
 
 class Actions(BaseModel):
@@ -49,6 +378,6 @@ class StateActions(BaseModel):
 
     id: str = Field(default_factory=lambda: datetime.now().isoformat())
     timestamp: datetime = Field(default_factory=datetime.now)
-    samples: List[Sample]
+    samples: Union[List[Sample], ColumnarSamples]
     actions: Actions
     eval_constants: List[EvalConstant]
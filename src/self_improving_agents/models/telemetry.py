@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TelemetryCursor(BaseModel):
+    """High-water mark of the telemetry already exported for a model."""
+
+    key: str = Field(..., description="Identifier of the export stream (model ID)")
+    last_timestamp: Optional[datetime] = Field(
+        default=None, description="Start time of the newest span exported so far"
+    )
+    last_span_ids: List[str] = Field(
+        default_factory=list,
+        description="IDs of the exported spans that share last_timestamp",
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None, description="When the cursor was last advanced"
+    )
@@ -5,9 +5,31 @@ This module contains components for defining actions and updating the policy.
 Classes:
     BasePolicy: Abstract base class for policy classes.
     LLMPolicyUpdater: Policy updater using LLM to determine optimal updates.
+    CheckpointStore: Content-addressed store of policy checkpoints with lineage.
+    SampleSelector: Abstract base class for prompt sample selection strategies.
+    WorstKSelector: Selects the lowest-scoring samples of each evaluator.
+    StratifiedLabelSelector: Selects samples evenly across evaluator labels.
+    DiverseSelector: Drops near-duplicate samples using MinHash similarity.
 """
 
 from .base import BasePolicy
+from .checkpoint_store import CheckpointStore
 from .llm_policy_updater import LLMPolicyUpdater
+from .sample_selection import (
+    DiverseSelector,
+    FirstSamplesSelector,
+    SampleSelector,
+    StratifiedLabelSelector,
+    WorstKSelector,
+)
 
-__all__ = ["BasePolicy", "LLMPolicyUpdater"]
+__all__ = [
+    "BasePolicy",
+    "CheckpointStore",
+    "DiverseSelector",
+    "FirstSamplesSelector",
+    "LLMPolicyUpdater",
+    "SampleSelector",
+    "StratifiedLabelSelector",
+    "WorstKSelector",
+]
@@ -6,15 +6,21 @@ will implement.
 import json
 import os
 from abc import ABC, abstractmethod
-from datetime import datetime
 from typing import Optional
 
 from ..models.state_action import Actions, StateActions
+from ..utils.run_catalog import RunCatalog
+from .checkpoint_store import CheckpointStore
 
 
 class BasePolicy(ABC):
     """Abstract base class for policy update strategies."""
 
+    # Store the checkpoints are saved to (defaults to one at .sia/checkpoint)
+    checkpoint_store: Optional[CheckpointStore] = None
+    # Catalog recording saved checkpoints
+    catalog: Optional[RunCatalog] = None
+
     @abstractmethod
     def update(self, state_actions: StateActions) -> Actions:
         """Update the policy based on collected state-action data.
@@ -27,47 +33,70 @@ class BasePolicy(ABC):
         """
         pass
 
-    def save_checkpoint(self, actions: Actions) -> str:
-        """Save actions as a JSON checkpoint.
+    def save_checkpoint(
+        self, actions: Actions, parent_actions: Optional[Actions] = None
+    ) -> str:
+        """Save actions as a checkpoint and make it the current one.
+
+        Checkpoints are stored by the hash of their actions, so saving an
+        identical policy again does not add a checkpoint.
 
         Args:
             actions: The actions to save
+            parent_actions: Actions the saved ones were derived from, stored
+                as the parent of the checkpoint (defaults to the current
+                checkpoint)
 
         Returns:
             The path to the saved checkpoint
         """
-        # Create directory if it doesn't exist
-        date_str = datetime.now().strftime("%Y%m%d%H%M%S")
-
-        # Create the full path correctly
-        checkpoint_dir = ".sia/checkpoint"
-        checkpoint_file = f"actions_{date_str}.json"
-        checkpoint_path = f"{checkpoint_dir}/{checkpoint_file}"
-
-        # Create directory
-        os.makedirs(checkpoint_dir, exist_ok=True)
-
-        # Save as JSON
-        with open(checkpoint_path, "w") as f:
-            json.dump(actions.model_dump(), f, indent=2)
-
+        store = self.checkpoint_store or CheckpointStore()
+        parent = None
+        if parent_actions is not None:
+            parent = store.save(parent_actions, move_head=False).checkpoint_id
+        record = store.save(actions, parent=parent)
+        checkpoint_path = store.path(record.checkpoint_id)
+
+        if self.catalog is not None:
+            self.catalog.record_run(
+                run_id=record.checkpoint_id,
+                kind="checkpoint",
+                path=checkpoint_path,
+            )
         return checkpoint_path
 
     def load_checkpoint(self, checkpoint_path: Optional[str] = None) -> Actions:
         """Load actions from a JSON checkpoint.
-        If no checkpoint path is provided, the latest checkpoint will be loaded.
+        If no checkpoint path is provided, the current checkpoint of the
+        checkpoint store will be loaded. Without one, the latest checkpoint
+        saved as ``actions_{timestamp}.json`` is loaded, looked up in the
+        catalog if there is one.
 
         Args:
             checkpoint_path: Path to the checkpoint file
         """
+        store = self.checkpoint_store or CheckpointStore()
+        if checkpoint_path is None and store.head() is not None:
+            return store.load()
+
+        if checkpoint_path is None and self.catalog is not None:
+            latest = self.catalog.latest_checkpoint()
+            if latest is None and self.catalog.index_directory(
+                store.root_dir, "checkpoint", prefix="actions_"
+            ):
+                latest = self.catalog.latest_checkpoint()
+            if latest is not None and os.path.exists(latest.path):
+                checkpoint_path = latest.path
+
         if checkpoint_path is None:
-            checkpoint_dir = ".sia/checkpoint"
             checkpoint_files = [
-                f for f in os.listdir(checkpoint_dir) if f.startswith("actions_")
+                f for f in os.listdir(store.root_dir) if f.startswith("actions_")
             ]
             if not checkpoint_files:
                 raise FileNotFoundError("No checkpoint files found")
-            checkpoint_path = os.path.join(checkpoint_dir, sorted(checkpoint_files)[-1])
+            checkpoint_path = os.path.join(store.root_dir, sorted(checkpoint_files)[-1])
 
         with open(checkpoint_path, "r") as f:
-            return Actions(**json.load(f))
+            data = json.load(f)
+        # Records of the checkpoint store wrap the actions
+        return Actions(**data.get("actions", data))
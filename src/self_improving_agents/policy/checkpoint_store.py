@@ -0,0 +1,165 @@
+"""Content-addressed store of policy checkpoints with lineage.
+
+Checkpoints are stored under ``objects/`` by the SHA-256 hash of their
+actions, so identical policies are stored once and concurrent workers never
+overwrite each other's checkpoints. Every checkpoint points to the checkpoint
+its policy was derived from. The current policy is named by the ``HEAD`` ref,
+which is replaced atomically under a file lock and read without listing any
+directory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from ..models.checkpoint import CheckpointRecord
+from ..models.state_action import Actions
+from ..utils.file_lock import FileLock, atomic_write
+
+logger = logging.getLogger(__name__)
+
+HEAD_FILE = "HEAD"
+
+
+class CheckpointStore:
+    """Store of policy checkpoints keyed by content hash, with a HEAD ref."""
+
+    def __init__(self, root_dir: str = ".sia/checkpoint"):
+        """Initialize the checkpoint store.
+
+        Args:
+            root_dir: Directory holding the checkpoint objects and the HEAD ref
+        """
+        self.root_dir = root_dir
+        self.head_path = os.path.join(root_dir, HEAD_FILE)
+        self._lock = FileLock(os.path.join(root_dir, f"{HEAD_FILE}.lock"))
+        os.makedirs(os.path.join(root_dir, "objects"), exist_ok=True)
+
+    @staticmethod
+    def checkpoint_id(actions: Actions) -> str:
+        """Compute the content hash identifying a policy's checkpoint.
+
+        Args:
+            actions: Actions of the policy
+
+        Returns:
+            Hex digest of the canonical JSON encoding of the actions
+        """
+        canonical = json.dumps(
+            actions.model_dump(), sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def path(self, checkpoint_id: str) -> str:
+        """Path of a checkpoint object, sharded by the first two hash characters."""
+        return os.path.join(
+            self.root_dir, "objects", checkpoint_id[:2], f"{checkpoint_id}.json"
+        )
+
+    def save(
+        self,
+        actions: Actions,
+        parent: Optional[str] = None,
+        move_head: bool = True,
+    ) -> CheckpointRecord:
+        """Save a policy's checkpoint and make it the HEAD.
+
+        A policy that is already stored keeps its original record, including
+        its parent; saving it again only moves the HEAD to it.
+
+        Args:
+            actions: Actions of the policy
+            parent: ID of the checkpoint the policy was derived from (defaults
+                to the current HEAD)
+            move_head: Whether to point the HEAD at the checkpoint
+
+        Returns:
+            The stored record of the checkpoint
+        """
+        checkpoint_id = self.checkpoint_id(actions)
+        with self._lock:
+            record = self.get(checkpoint_id)
+            if record is None:
+                if parent is None:
+                    parent = self._read_head()
+                record = CheckpointRecord(
+                    checkpoint_id=checkpoint_id,
+                    parent=parent if parent != checkpoint_id else None,
+                    created_at=datetime.now().isoformat(),
+                    actions=actions,
+                )
+                atomic_write(self.path(checkpoint_id), record.model_dump_json(indent=2))
+                logger.info(f"Saved checkpoint {checkpoint_id[:12]}")
+            if move_head:
+                atomic_write(self.head_path, checkpoint_id)
+        return record
+
+    def head(self) -> Optional[str]:
+        """Return the ID of the current checkpoint, or None if none was saved."""
+        return self._read_head()
+
+    def _read_head(self) -> Optional[str]:
+        """Read the HEAD ref."""
+        try:
+            with open(self.head_path, "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def get(self, checkpoint_id: str) -> Optional[CheckpointRecord]:
+        """Look up a checkpoint.
+
+        Args:
+            checkpoint_id: ID of the checkpoint
+
+        Returns:
+            The record of the checkpoint, or None if it is not stored
+        """
+        try:
+            with open(self.path(checkpoint_id), "r") as f:
+                return CheckpointRecord.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def load(self, checkpoint_id: Optional[str] = None) -> Actions:
+        """Load the actions of a checkpoint.
+
+        Args:
+            checkpoint_id: ID of the checkpoint (defaults to the HEAD)
+
+        Returns:
+            Actions of the checkpoint
+
+        Raises:
+            FileNotFoundError: If the checkpoint is not stored
+        """
+        checkpoint_id = checkpoint_id or self._read_head()
+        record = self.get(checkpoint_id) if checkpoint_id else None
+        if record is None:
+            raise FileNotFoundError(f"Checkpoint {checkpoint_id} not found")
+        return record.actions
+
+    def lineage(self, checkpoint_id: Optional[str] = None) -> List[CheckpointRecord]:
+        """List a checkpoint and its ancestors, following the parent pointers.
+
+        Args:
+            checkpoint_id: ID of the checkpoint to start from (defaults to the
+                HEAD)
+
+        Returns:
+            Records from the checkpoint back to its root
+        """
+        records: List[CheckpointRecord] = []
+        seen = set()
+        next_id = checkpoint_id or self._read_head()
+        while next_id is not None and next_id not in seen:
+            seen.add(next_id)
+            record = self.get(next_id)
+            if record is None:
+                break
+            records.append(record)
+            next_id = record.parent
+        return records
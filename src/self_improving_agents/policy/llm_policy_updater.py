@@ -3,20 +3,33 @@
 This module implements a policy updater that uses large language models to analyze
 state-action-evaluation data and determine optimal updates to the action space.
 """
-import itertools
 import json
 import logging
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
 
 from openai import OpenAI
 
-from self_improving_agents.models.policy_update import PolicyUpdate
+from self_improving_agents.models.policy_update import (
+    CandidateScore,
+    PolicySearchResult,
+    PolicyUpdate,
+)
 
+from ..evaluator_handler.summary import format_summary, summarize_evaluations
 from ..models.state_action import Actions, EvalConstant, Sample, StateActions
+from ..utils.rate_limiter import RateLimiter, estimate_request_tokens
+from ..utils.run_catalog import RunCatalog
+from ..utils.tokenizer import count_message_tokens, get_token_counter
 from .base import BasePolicy
+from .checkpoint_store import CheckpointStore
+from .sample_selection import SampleSelector
 
 logger = logging.getLogger(__name__)
 
+# Tokens left unused by token budgeting to absorb counting inaccuracies
+PROMPT_TOKEN_MARGIN = 256
+
 
 class LLMPolicyUpdater(BasePolicy):
     """Policy updater that uses LLM to determine optimal updates to actions."""
@@ -27,6 +40,11 @@ class LLMPolicyUpdater(BasePolicy):
         model: str = "gpt-4o",
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        rate_limiter: Optional[RateLimiter] = None,
+        context_window: Optional[int] = None,
+        sample_selector: Optional[SampleSelector] = None,
+        catalog: Optional[RunCatalog] = None,
+        checkpoint_dir: str = ".sia/checkpoint",
     ):
         """Initialize the LLM policy updater.
 
@@ -35,11 +53,26 @@ class LLMPolicyUpdater(BasePolicy):
             model: The model to use for policy updates
             temperature: Temperature for generation
             max_tokens: Maximum tokens for generated responses
+            rate_limiter: Rate limiter shared with other OpenAI callers
+                (will create one if not provided)
+            context_window: Context window of ``model`` in tokens; when given,
+                the prompt is packed with as many samples as fit in it
+                instead of using a character budget
+            sample_selector: Strategy choosing which samples the prompt shows
+                first (defaults to the original order)
+            catalog: Catalog recording saved checkpoints
+            checkpoint_dir: Directory of the checkpoint store
         """
-        self.client = client or OpenAI()
+        # Retries are handled by the rate limiter
+        self.client = client or OpenAI(max_retries=0)
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.context_window = context_window
+        self.sample_selector = sample_selector
+        self.catalog = catalog
+        self.checkpoint_store = CheckpointStore(checkpoint_dir)
 
     def update(self, state_actions: StateActions, checkpoint: bool = True) -> Actions:
         """Update the policy based on collected state-action data.
@@ -50,7 +83,9 @@ class LLMPolicyUpdater(BasePolicy):
         Returns:
             Updated actions (system prompt, model parameters)
         """
-        messages = self._compose_update_messages(state_actions)
+        messages = self._compose_update_messages(
+            state_actions, context_window=self.context_window
+        )
         # save the prompt to composed_prompt.txt
         with open("composed_prompt.txt", "w") as f:
             f.write(messages[1]["content"])
@@ -62,7 +97,9 @@ class LLMPolicyUpdater(BasePolicy):
                 policy_update.actions, state_actions.actions
             )
             if checkpoint:
-                self.save_checkpoint(updated_actions)
+                self.save_checkpoint(
+                    updated_actions, parent_actions=state_actions.actions
+                )
             return updated_actions
         except Exception as e:
             logger.error(f"Failed to parse LLM update response: {e}")
@@ -70,12 +107,67 @@ class LLMPolicyUpdater(BasePolicy):
             return state_actions.actions
 
     def _compose_update_messages(
-        self, state_actions: StateActions, samples_max_character_length: int = 16000
+        self,
+        state_actions: StateActions,
+        samples_max_character_length: int = 16000,
+        context_window: Optional[int] = None,
     ) -> List[Dict[str, str]]:
         """Compose the prompt for the LLM to update the policy.
 
         Args:
             state_actions: State-action pairs with evaluations
+            samples_max_character_length: Maximum total characters of the
+                sample examples, used when ``context_window`` is not given
+            context_window: Context window of the policy model in tokens; the
+                samples then fill whatever the rest of the prompt and
+                ``max_tokens`` leave free
+
+        Returns:
+            Structured prompt for the LLM
+        """
+        evaluation_summary = self._create_evaluation_summary(state_actions.samples)
+        if context_window is None:
+            # Format samples until the max character length is reached
+            formatted_samples = self._format_samples_within_budget(
+                self._select_samples(state_actions.samples),
+                samples_max_character_length,
+            )
+            return self._build_update_messages(
+                state_actions, evaluation_summary, formatted_samples
+            )
+
+        # Reserve room for everything but the samples, then pack samples
+        count = get_token_counter(self.model)
+        reserved = count_message_tokens(
+            self._build_update_messages(state_actions, evaluation_summary, []),
+            self.model,
+            max_tokens=self.max_tokens,
+        )
+        formatted_samples = self._format_samples_within_budget(
+            self._select_samples(state_actions.samples),
+            context_window - reserved - PROMPT_TOKEN_MARGIN,
+            measure=lambda formatted_sample: count(formatted_sample + "\n"),
+        )
+        logger.info(
+            f"Packed {len(formatted_samples)} samples into a "
+            f"{context_window}-token context ({reserved} tokens reserved)"
+        )
+        return self._build_update_messages(
+            state_actions, evaluation_summary, formatted_samples
+        )
+
+    def _build_update_messages(
+        self,
+        state_actions: StateActions,
+        evaluation_summary: str,
+        formatted_samples: List[str],
+    ) -> List[Dict[str, str]]:
+        """Build the policy update messages around already formatted samples.
+
+        Args:
+            state_actions: State-action pairs with evaluations
+            evaluation_summary: Summary of the evaluation results
+            formatted_samples: Sample examples to include in the prompt
 
         Returns:
             Structured prompt for the LLM
@@ -93,21 +185,6 @@ class LLMPolicyUpdater(BasePolicy):
             """,
         }
 
-        # Create a summary of the evaluation results
-        formatted_samples = [
-            self._format_sample(sample, i)
-            for i, sample in enumerate(state_actions.samples)
-        ]
-        # Truncate samples to stay under max character length
-        formatted_samples = list(
-            itertools.takewhile(
-                lambda x: sum(
-                    len(s) for s in formatted_samples[: formatted_samples.index(x) + 1]
-                )
-                <= samples_max_character_length,
-                formatted_samples,
-            )
-        )
         formatted_samples_str = "\n".join(formatted_samples)
 
         # User message with structured data
@@ -123,7 +200,7 @@ class LLMPolicyUpdater(BasePolicy):
 
 # Evaluation Summary
 <EVALUATION_SUMMARY>
-{self._create_evaluation_summary(state_actions.samples)}
+{evaluation_summary}
 </EVALUATION_SUMMARY>
 
 # Sample Examples (showing {len(formatted_samples)} of {len(state_actions.samples)})
@@ -137,11 +214,54 @@ that would improve performance according to the evaluation metrics.
 
         return [system_message, {"role": "user", "content": prompt}]
 
-    def _create_evaluation_summary(self, samples: List[Sample]) -> str:
+    def _select_samples(self, samples: Sequence[Sample]) -> Iterable[Sample]:
+        """Order the samples as ranked by the sample selector.
+
+        Args:
+            samples: Samples with evaluations
+
+        Returns:
+            Lazily ranked samples
+        """
+        if self.sample_selector is None:
+            return samples
+        return (samples[index] for index in self.sample_selector.select(samples))
+
+    def _format_samples_within_budget(
+        self,
+        samples: Iterable[Sample],
+        budget: int,
+        measure: Callable[[str], int] = len,
+    ) -> List[str]:
+        """Format samples in order until the next one would exceed the budget.
+
+        Samples are formatted lazily and their sizes added to a running
+        total, so only the samples that fit (plus the first that does not)
+        are ever formatted.
+
+        Args:
+            samples: Samples to format
+            budget: Maximum total size of the formatted samples
+            measure: Size of a formatted sample (characters by default)
+
+        Returns:
+            The formatted samples that fit within the budget
+        """
+        formatted_samples: List[str] = []
+        used = 0
+        for i, sample in enumerate(samples):
+            formatted_sample = self._format_sample(sample, i)
+            used += measure(formatted_sample)
+            if used > budget:
+                break
+            formatted_samples.append(formatted_sample)
+        return formatted_samples
+
+    def _create_evaluation_summary(self, samples: Sequence[Sample]) -> str:
         """Create a summary of evaluation results across all samples.
 
         Args:
-            samples: List of samples with evaluations
+            samples: Samples with evaluations
 
         Returns:
             Formatted evaluation summary
@@ -149,39 +269,10 @@ that would improve performance according to the evaluation metrics.
         if not samples:
             return "No samples available for evaluation."
 
-        # Get unique evaluator names
-        eval_names = set()
-        for sample in samples:
-            for eval_metric in sample.evals:
-                eval_names.add(eval_metric.name)
-
-        summary = []
-        for eval_name in eval_names:
-            # Collect all scores for this evaluator
-            scores: List[float] = []
-            for sample in samples:
-                for eval_metric in sample.evals:
-                    if (
-                        eval_metric.name == eval_name
-                        and eval_metric.eval_score is not None
-                    ):
-                        scores.append(eval_metric.eval_score)
-
-            # Calculate statistics
-            if scores:
-                avg_score: float | str = "N/A"
-                try:
-                    avg_score = sum([float(s) for s in scores]) / len(scores)
-                except Exception as e:
-                    logger.error(
-                        f"Failed to calculate average score for {eval_name}: {e}"
-                    )
-                    avg_score = "N/A"
-                summary.append(
-                    f"- {eval_name}: Average score: {avg_score}, Samples: {len(scores)}"
-                )
-
-        return "\n".join(summary)
+        return "\n".join(
+            format_summary(summary)
+            for summary in summarize_evaluations(samples).values()
+        )
 
     def _format_eval_constants(self, eval_constants: List[EvalConstant]) -> str:
         """Format evaluation constants for the prompt.
@@ -222,7 +313,12 @@ that would improve performance according to the evaluation metrics.
                 for eval_metric in sample.evals
             ]
         )
-        return f"""<SAMPLE_{index}>
+        occurrences = (
+            f"\n(Stands for {sample.weight} near-identical requests)"
+            if sample.weight > 1
+            else ""
+        )
+        return f"""<SAMPLE_{index}>{occurrences}
 ### Chat History
 <CHAT_HISTORY>
 {chat_history_to_show}
@@ -249,24 +345,131 @@ that would improve performance according to the evaluation metrics.
         Returns:
             The LLM's response with suggested updates
         """
+        return self._get_llm_updates(messages, n=1)[0]
+
+    def _get_llm_updates(
+        self, messages: List[Dict[str, str]], n: int
+    ) -> List[PolicyUpdate]:
+        """Get ``n`` alternative suggested updates from a single request.
 
-        response = self.client.beta.chat.completions.parse(
+        Args:
+            messages: The structured prompt to send to the LLM
+            n: Number of alternative updates to sample
+
+        Returns:
+            The parsed updates (choices the model refused are left out)
+        """
+        response = self.rate_limiter.call(
+            self.client.beta.chat.completions.parse,
+            estimated_tokens=estimate_request_tokens(messages, self.max_tokens * n),
             model=self.model,
             messages=messages,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
+            n=n,
             response_format=PolicyUpdate,
         )
 
-        logger.info(
-            "UPDATE THOUGHTS: ",
-            json.dumps(response.choices[0].message.parsed.thoughts, indent=2),
+        policy_updates = []
+        for choice in response.choices:
+            if choice.message.parsed is None:
+                logger.warning(f"Policy update choice {choice.index} was not parsed")
+                continue
+            thoughts = json.dumps(choice.message.parsed.thoughts, indent=2)
+            logger.info(f"UPDATE THOUGHTS: {thoughts}")
+            # This garbage is needed because of mypy
+            policy_updates.append(PolicyUpdate(**choice.message.parsed.model_dump()))
+        if not policy_updates:
+            raise ValueError("No policy update could be parsed from the response")
+        return policy_updates
+
+    def propose_candidates(
+        self, state_actions: StateActions, n_candidates: int = 4
+    ) -> List[PolicyUpdate]:
+        """Ask the LLM for several alternative policy updates at once.
+
+        Args:
+            state_actions: The state-action pairs with evaluation metrics
+            n_candidates: Number of candidates to sample
+
+        Returns:
+            Up to ``n_candidates`` policy updates
+        """
+        messages = self._compose_update_messages(
+            state_actions, context_window=self.context_window
         )
+        return self._get_llm_updates(messages, n=n_candidates)
+
+    def search(
+        self,
+        state_actions: StateActions,
+        scorer: Callable[[Actions], Dict[str, Optional[float]]],
+        n_candidates: int = 4,
+        max_workers: Optional[int] = None,
+        include_current: bool = True,
+        checkpoint: bool = True,
+    ) -> PolicySearchResult:
+        """Propose several candidate policies, score them concurrently, keep the best.
+
+        Candidates are scored in a thread pool, so ``scorer`` must be
+        thread-safe; it typically replays the candidate on a fixed subset of
+        samples and evaluates the outputs, and must then give every replay its
+        own run ID. Higher scores are better.
 
-        # This garbage is needed because of mypy
-        policy_update = PolicyUpdate(**response.choices[0].message.parsed.model_dump())
+        Args:
+            state_actions: The state-action pairs with evaluation metrics
+            scorer: Function returning the mean score per evaluator of a
+                candidate's actions
+            n_candidates: Number of candidates to ask the LLM for
+            max_workers: Maximum number of candidates scored at once (defaults
+                to all of them)
+            include_current: Also score the current actions, so that they are
+                kept unless a candidate beats them
+            checkpoint: Whether to save a checkpoint of the best actions when
+                they differ from the current ones
 
-        return policy_update
+        Returns:
+            The best actions along with the scores of every candidate
+        """
+        candidates = [
+            CandidateScore(actions=update.actions, thoughts=update.thoughts)
+            for update in self.propose_candidates(state_actions, n_candidates)
+        ]
+        if include_current:
+            candidates.insert(0, CandidateScore(actions=state_actions.actions))
+
+        def score(candidate: CandidateScore) -> CandidateScore:
+            try:
+                candidate.scores = scorer(candidate.actions)
+            except Exception as e:
+                logger.error(f"Failed to score candidate policy: {e}")
+                candidate.error = str(e)
+                return candidate
+            valid_scores = [s for s in candidate.scores.values() if s is not None]
+            if valid_scores:
+                candidate.score = sum(valid_scores) / len(valid_scores)
+            return candidate
+
+        logger.info(f"Scoring {len(candidates)} candidate policies")
+        with ThreadPoolExecutor(max_workers=max_workers or len(candidates)) as pool:
+            candidates = list(pool.map(score, candidates))
+
+        scored = [candidate for candidate in candidates if candidate.score is not None]
+        if not scored:
+            logger.warning("No candidate could be scored, keeping the current policy")
+            return PolicySearchResult(best=state_actions.actions, candidates=candidates)
+        best = max(
+            scored,
+            key=lambda candidate: (
+                float("-inf") if candidate.score is None else candidate.score
+            ),
+        )
+        logger.info(f"Best candidate policy scored {best.score}")
+        if checkpoint and best.actions != state_actions.actions:
+            self.save_checkpoint(best.actions, parent_actions=state_actions.actions)
+        return PolicySearchResult(
+            best=best.actions, best_score=best.score, candidates=candidates
+        )
 
     # TODO: This will play a role when we do diffs
     def _parse_update_response(
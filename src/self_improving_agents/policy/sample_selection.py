@@ -0,0 +1,197 @@
+"""Strategies for choosing which samples to show the policy updater.
+
+The policy update prompt only has room for a handful of samples, so the
+order in which samples are offered matters. A selector ranks the samples and
+the prompt is filled in that order until its budget is used up.
+"""
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.state_action import ColumnarSamples, Sample
+from ..utils.minhash import MinHasher, NearDuplicateIndex
+
+
+class SampleSelector(ABC):
+    """Abstract base class for sample selection strategies."""
+
+    @abstractmethod
+    def select(self, samples: Sequence[Sample]) -> Iterable[int]:
+        """Rank the samples to show in the policy update prompt.
+
+        The ranking is consumed lazily, only until the prompt is full.
+
+        Args:
+            samples: Samples with evaluations
+
+        Returns:
+            Indices of the selected samples, most informative first
+        """
+        pass
+
+
+class FirstSamplesSelector(SampleSelector):
+    """Keep the samples in their original order."""
+
+    def select(self, samples: Sequence[Sample]) -> List[int]:
+        """Return every index in order."""
+        return list(range(len(samples)))
+
+
+class WorstKSelector(SampleSelector):
+    """Select the lowest-scoring samples of each evaluator.
+
+    The worst samples of the evaluators are interleaved, so that every
+    evaluator is represented even when the prompt budget is small.
+    """
+
+    def __init__(self, k: int = 10, evaluator_names: Optional[List[str]] = None):
+        """Initialize the selector.
+
+        Args:
+            k: Number of samples to select per evaluator
+            evaluator_names: Evaluators to rank by (defaults to all)
+        """
+        self.k = k
+        self.evaluator_names = evaluator_names
+
+    def select(self, samples: Sequence[Sample]) -> List[int]:
+        """Return the ``k`` lowest-scoring samples of each evaluator."""
+        rankings: List[List[int]] = []
+        for scores in _eval_scores(samples, self.evaluator_names).values():
+            scored = np.flatnonzero(~np.isnan(scores))
+            # Stable sort keeps the original order among equal scores
+            order = scored[np.argsort(scores[scored], kind="stable")]
+            rankings.append([int(index) for index in order[: self.k]])
+        return _interleave(rankings)
+
+
+class StratifiedLabelSelector(SampleSelector):
+    """Select samples evenly across the labels of an evaluator."""
+
+    def __init__(self, evaluator_name: str, per_label: int = 5):
+        """Initialize the selector.
+
+        Args:
+            evaluator_name: Evaluator whose labels define the strata
+            per_label: Maximum number of samples per label
+        """
+        self.evaluator_name = evaluator_name
+        self.per_label = per_label
+
+    def select(self, samples: Sequence[Sample]) -> List[int]:
+        """Return up to ``per_label`` samples per label, labels interleaved.
+
+        Samples without a label form a stratum of their own.
+        """
+        strata: Dict[Optional[str], List[int]] = defaultdict(list)
+        for index, label in enumerate(_eval_labels(samples, self.evaluator_name)):
+            if len(strata[label]) < self.per_label:
+                strata[label].append(index)
+        return _interleave(list(strata.values()))
+
+
+class DiverseSelector(SampleSelector):
+    """Drop samples that are near-duplicates of an earlier selected sample.
+
+    Similarity is the Jaccard similarity of the word shingles of the chat
+    history and output, estimated with MinHash, so no embeddings are needed.
+    """
+
+    def __init__(
+        self,
+        base: Optional[SampleSelector] = None,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        """Initialize the selector.
+
+        Args:
+            base: Selector providing the ranking to diversify (defaults to
+                the original order)
+            threshold: Estimated similarity at or above which a sample counts
+                as a near-duplicate
+            num_perm: Length of the MinHash signatures
+            bands: Number of LSH bands used to find near-duplicate candidates;
+                must divide ``num_perm``
+            shingle_size: Number of consecutive words per shingle
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands")
+        self.base = base or FirstSamplesSelector()
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+
+    def select(self, samples: Sequence[Sample]) -> Iterator[int]:
+        """Yield the base ranking without near-duplicates."""
+        index = NearDuplicateIndex(bands=self.bands, threshold=self.threshold)
+        for position in self.base.select(samples):
+            signature = self.hasher.signature(sample_text(samples[position]))
+            if index.find(signature) is None:
+                index.add(position, signature)
+                yield position
+
+
+def sample_text(sample: Sample) -> str:
+    """Concatenate the chat history and output of a sample for hashing."""
+    contents = [str(message.get("content") or "") for message in sample.chat_history]
+    return "\n".join(contents + [sample.output_generation])
+
+
+def _eval_scores(
+    samples: Sequence[Sample], evaluator_names: Optional[List[str]]
+) -> Dict[str, np.ndarray]:
+    """Collect the scores of each evaluator, NaN where missing."""
+    if isinstance(samples, ColumnarSamples):
+        return {
+            name: samples.scores(name)
+            for name in samples.eval_names
+            if evaluator_names is None or name in evaluator_names
+        }
+
+    scores: Dict[str, np.ndarray] = {}
+    for index, sample in enumerate(samples):
+        for eval_metric in sample.evals:
+            if evaluator_names is not None and eval_metric.name not in evaluator_names:
+                continue
+            if eval_metric.name not in scores:
+                scores[eval_metric.name] = np.full(len(samples), np.nan)
+            if eval_metric.eval_score is not None:
+                scores[eval_metric.name][index] = eval_metric.eval_score
+    return scores
+
+
+def _eval_labels(samples: Sequence[Sample], evaluator_name: str) -> List[Optional[str]]:
+    """Collect the labels of an evaluator, None where missing."""
+    if isinstance(samples, ColumnarSamples):
+        if evaluator_name not in samples.eval_names:
+            return [None] * len(samples)
+        return samples.labels(evaluator_name)
+
+    labels: List[Optional[str]] = []
+    for sample in samples:
+        label = None
+        for eval_metric in sample.evals:
+            if eval_metric.name == evaluator_name:
+                label = eval_metric.eval_label
+                break
+        labels.append(label)
+    return labels
+
+
+def _interleave(rankings: List[List[int]]) -> List[int]:
+    """Merge rankings round-robin, keeping the first occurrence of each index."""
+    merged: List[int] = []
+    seen = set()
+    for position in range(max((len(ranking) for ranking in rankings), default=0)):
+        for ranking in rankings:
+            if position < len(ranking) and ranking[position] not in seen:
+                seen.add(ranking[position])
+                merged.append(ranking[position])
+    return merged
@@ -8,8 +8,19 @@ Classes:
     SimpleRunner: Basic implementation of a runner.
     AsyncRunner: Asynchronous implementation of a runner.
     WorkflowOrchestrator: Orchestrator for streamlining the self-improvement workflow.
+    TelemetryStore: Local Parquet store of telemetry exported from Arize.
+    CandidateRacer: Successive-halving race of candidate policies.
+    TelemetryContext: In-memory telemetry shared by the stages of a workflow.
 """
 
+from .candidate_racing import CandidateRacer
 from .orchestrator import WorkflowOrchestrator
+from .telemetry_context import TelemetryContext
+from .telemetry_store import TelemetryStore
 
-__all__ = ["WorkflowOrchestrator"]
+__all__ = [
+    "WorkflowOrchestrator",
+    "TelemetryStore",
+    "CandidateRacer",
+    "TelemetryContext",
+]
@@ -1,14 +1,31 @@
 # src/self_improving_agents/runners/arize_connector.py
 """Connector for retrieving data from Arize telemetry."""
+import logging
 import os
-from datetime import datetime
-from typing import Optional
+import time
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 from arize.exporter import ArizeExportClient
 from arize.pandas.logger import Client
 from arize.utils.types import Environments
 
+from ..models.telemetry import TelemetryCursor
+from ..utils.file_lock import atomic_write
+from .telemetry_store import SPAN_ID_COLUMN, TIME_COLUMN, TelemetryStore, to_utc
+
+logger = logging.getLogger(__name__)
+
+# Export arguments that identify the span stream cached by the telemetry store
+STANDARD_EXPORT_KWARGS: Set[str] = {
+    "model_id",
+    "space_id",
+    "environment",
+    "start_time",
+    "end_time",
+}
+
 
 class ArizeConnector:
     """Connector for retrieving data from Arize telemetry."""
@@ -19,6 +36,8 @@ class ArizeConnector:
         space_id: Optional[str] = None,
         model_id: Optional[str] = None,
         api_key: Optional[str] = None,
+        cursor_dir: str = ".sia/cursors",
+        telemetry_store: Optional[TelemetryStore] = None,
     ):
         """Initialize the Arize connector.
 
@@ -27,6 +46,9 @@ class ArizeConnector:
             space_id: Arize space ID
             model_id: Arize model ID
             api_key: Arize API key for logging evaluations
+            cursor_dir: Directory for the high-water marks of incremental exports
+            telemetry_store: Optional local store read before exporting from
+                Arize; only the time ranges it is missing are exported
         """
         self.ARIZE_DEVELOPER_KEY = developer_key or os.getenv("ARIZE_DEVELOPER_KEY")
         self.space_id = space_id
@@ -36,6 +58,8 @@ class ArizeConnector:
         self.ARIZE_SPACE_ID = space_id or os.getenv("ARIZE_SPACE_ID")
         self.ARIZE_API_KEY = api_key or os.getenv("ARIZE_API_KEY")
         self.ARIZE_DEVELOPER_KEY = developer_key or os.getenv("ARIZE_DEVELOPER_KEY")
+        self.cursor_dir = cursor_dir
+        self.telemetry_store = telemetry_store
 
         if not self.ARIZE_DEVELOPER_KEY:
             raise ValueError("ARIZE_DEVELOPER_KEY is not set")
@@ -49,6 +73,8 @@ class ArizeConnector:
         start_date: datetime,
         end_date: Optional[datetime] = datetime.now(),
         limit: int = 100,
+        incremental: bool = False,
+        columns: Optional[List[str]] = None,
     ) -> pd.DataFrame:
         """Retrieve telemetry data from Arize.
 
@@ -56,22 +82,368 @@ class ArizeConnector:
             start_date: Start date for data retrieval
             end_date: Optional end date (defaults to now)
             limit: Maximum number of records to retrieve
+            incremental: Only retrieve spans newer than the previous incremental
+                export for this model (see ``export_incremental``)
+            columns: Columns (or glob patterns such as ``"eval.*"``) to load
+                from the telemetry store; ignored when exporting directly
 
         Returns:
             DataFrame containing telemetry data
         """
+        if incremental:
+            primary_df, cursor = self.export_new_telemetry(start_date, end_date, limit)
+            if cursor is not None:
+                self.save_cursor(cursor)
+            return primary_df
+
         # Exporting your dataset into a dataframe
-        primary_df = self.client.export_model_to_df(
+        primary_df = self.export_spans(
+            start_time=start_date, end_time=end_date, columns=columns
+        )
+        primary_df = primary_df.tail(limit)
+
+        return primary_df
+
+    def export_new_telemetry(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[pd.DataFrame, Optional[TelemetryCursor]]:
+        """Export the spans of this model newer than its incremental cursor.
+
+        The cursor is not advanced; pass the returned cursor to
+        :meth:`save_cursor` once the spans have been processed.
+
+        Args:
+            start_date: Start date for data retrieval
+            end_date: Optional end date (defaults to now)
+            limit: Maximum number of records to retrieve
+
+        Returns:
+            DataFrame containing the new spans, and the advanced cursor (None
+            when there are no new spans)
+        """
+        return self.export_since_cursor(
+            cursor_key=str(self.ARIZE_MODEL_ID),
+            limit=limit,
             model_id=self.ARIZE_MODEL_ID,
             space_id=self.ARIZE_SPACE_ID,
             environment=Environments.TRACING,
             start_time=start_date,
             end_time=end_date,
         )
-        primary_df = primary_df.tail(limit)
 
+    def export_spans(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        **export_kwargs: Any,
+    ) -> pd.DataFrame:
+        """Export spans, serving them from the telemetry store when configured.
+
+        With a telemetry store, only the time ranges missing from it are
+        exported from Arize and back-filled; the result is then read from the
+        store with the time predicate pushed down and only ``columns`` loaded.
+        Exports for another model or space, or with extra export arguments,
+        always go directly to Arize.
+
+        Args:
+            start_time: Start of the time window
+            end_time: End of the time window (defaults to now)
+            columns: Columns (or glob patterns) to load from the store
+            **export_kwargs: Additional arguments for ``export_model_to_df``
+
+        Returns:
+            DataFrame containing the spans of the window
+        """
+        end_time = end_time or datetime.now()
+        export_kwargs = {
+            "model_id": self.ARIZE_MODEL_ID,
+            "space_id": self.ARIZE_SPACE_ID,
+            "environment": Environments.TRACING,
+            **export_kwargs,
+        }
+        model_id = str(export_kwargs["model_id"])
+        if (
+            self.telemetry_store is None
+            or set(export_kwargs) - STANDARD_EXPORT_KWARGS
+            or export_kwargs["space_id"] != self.ARIZE_SPACE_ID
+            or export_kwargs["environment"] != Environments.TRACING
+        ):
+            return self.client.export_model_to_df(
+                **export_kwargs, start_time=start_time, end_time=end_time
+            )
+
+        for range_start, range_end in self.telemetry_store.missing_ranges(
+            model_id, start_time, end_time
+        ):
+            logger.info(f"Back-filling telemetry from {range_start} to {range_end}")
+            range_df = self.client.export_model_to_df(
+                **export_kwargs, start_time=range_start, end_time=range_end
+            )
+            self.telemetry_store.write(model_id, range_df, range_start, range_end)
+
+        return self.telemetry_store.read(model_id, start_time, end_time, columns)
+
+    def iter_telemetry_chunks(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        chunk_duration: timedelta = timedelta(hours=1),
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Export a time window as consecutive chunks.
+
+        Args:
+            start_date: Start of the time window
+            end_date: End of the time window
+            chunk_duration: Length of each exported chunk
+            columns: Columns (or glob patterns) to load from the telemetry store
+
+        Yields:
+            DataFrames of the spans of each chunk, oldest chunk first
+        """
+        if chunk_duration <= timedelta(0):
+            raise ValueError("chunk_duration must be positive")
+
+        chunk_start = start_date
+        while chunk_start < end_date:
+            chunk_end = min(chunk_start + chunk_duration, end_date)
+            chunk_df = self.export_spans(
+                start_time=chunk_start, end_time=chunk_end, columns=columns
+            )
+            if not chunk_df.empty and TIME_COLUMN in chunk_df.columns:
+                span_times = pd.to_datetime(chunk_df[TIME_COLUMN], utc=True)
+                if chunk_end < end_date:
+                    # Export windows are inclusive; leave boundary spans to the
+                    # next chunk so that no span is yielded twice
+                    in_chunk = (span_times < to_utc(chunk_end)).to_numpy()
+                    chunk_df, span_times = chunk_df[in_chunk], span_times[in_chunk]
+                chunk_df = chunk_df.iloc[span_times.argsort().to_numpy()]
+            yield chunk_df.reset_index(drop=True)
+            chunk_start = chunk_end
+
+    def invalidate_spans(self, spans_df: pd.DataFrame) -> None:
+        """Drop stored telemetry covering ``spans_df`` so it is re-exported.
+
+        Called after evaluations are logged for the spans, since the stored
+        copies do not carry the new evaluation columns.
+
+        Args:
+            spans_df: Spans whose stored copies are stale
+        """
+        if (
+            self.telemetry_store is None
+            or spans_df.empty
+            or TIME_COLUMN not in spans_df.columns
+        ):
+            return
+        span_times = pd.to_datetime(spans_df[TIME_COLUMN], utc=True)
+        self.telemetry_store.invalidate(
+            str(self.ARIZE_MODEL_ID),
+            span_times.min().to_pydatetime(),
+            span_times.max().to_pydatetime(),
+        )
+
+    def export_incremental(
+        self,
+        cursor_key: str,
+        limit: Optional[int] = None,
+        **export_kwargs: Any,
+    ) -> pd.DataFrame:
+        """Export only the spans not returned by previous calls with the same key.
+
+        The cursor is advanced as soon as the spans are exported. Callers that
+        process the spans further should use :meth:`export_since_cursor` and
+        save the cursor once the processing succeeded, so that a failure does
+        not skip the spans.
+
+        Args:
+            cursor_key: Identifier of the export stream (e.g. the model ID)
+            limit: Maximum number of spans to return
+            **export_kwargs: Arguments for ``export_model_to_df``
+
+        Returns:
+            DataFrame containing the new spans
+        """
+        primary_df, cursor = self.export_since_cursor(
+            cursor_key, limit=limit, **export_kwargs
+        )
+        if cursor is not None:
+            self.save_cursor(cursor)
         return primary_df
 
+    def export_since_cursor(
+        self,
+        cursor_key: str,
+        limit: Optional[int] = None,
+        **export_kwargs: Any,
+    ) -> Tuple[pd.DataFrame, Optional[TelemetryCursor]]:
+        """Export the spans newer than the persisted cursor without advancing it.
+
+        The export window starts at the persisted high-water mark when it is
+        later than ``start_time``. Spans are returned oldest first together
+        with the cursor advanced past the returned spans only, so saving it
+        walks forward through the window without gaps even when ``limit``
+        truncates.
+
+        Args:
+            cursor_key: Identifier of the export stream (e.g. the model ID)
+            limit: Maximum number of spans to return
+            **export_kwargs: Arguments for ``export_model_to_df``
+
+        Returns:
+            DataFrame containing the new spans, and the advanced cursor to
+            pass to :meth:`save_cursor` (None when there are no new spans)
+        """
+        cursor = self.load_cursor(cursor_key)
+        last_timestamp = (
+            pd.Timestamp(cursor.last_timestamp)
+            if cursor.last_timestamp is not None
+            else None
+        )
+        start_time = export_kwargs.get("start_time")
+        if last_timestamp is not None and (
+            start_time is None or last_timestamp > to_utc(start_time)
+        ):
+            export_kwargs["start_time"] = cursor.last_timestamp
+        if export_kwargs.get("end_time") is None:
+            export_kwargs["end_time"] = datetime.now()
+
+        primary_df = self.client.export_model_to_df(**export_kwargs)
+        if primary_df.empty or TIME_COLUMN not in primary_df.columns:
+            return primary_df, None
+
+        span_times = pd.to_datetime(primary_df[TIME_COLUMN], utc=True)
+        primary_df = primary_df.assign(_span_time=span_times).sort_values("_span_time")
+        if last_timestamp is not None:
+            seen = (primary_df["_span_time"] < last_timestamp) | (
+                (primary_df["_span_time"] == last_timestamp)
+                & primary_df[SPAN_ID_COLUMN].isin(cursor.last_span_ids)
+            )
+            primary_df = primary_df[~seen]
+        if limit is not None:
+            primary_df = primary_df.head(limit)
+
+        advanced_cursor = None
+        if not primary_df.empty:
+            newest = primary_df["_span_time"].iloc[-1]
+            newest_span_ids = primary_df.loc[
+                primary_df["_span_time"] == newest, SPAN_ID_COLUMN
+            ].tolist()
+            if newest == last_timestamp:
+                newest_span_ids += cursor.last_span_ids
+            advanced_cursor = TelemetryCursor(
+                key=cursor_key,
+                last_timestamp=newest.to_pydatetime(),
+                last_span_ids=newest_span_ids,
+                updated_at=datetime.now(),
+            )
+            logger.info(
+                f"Exported {len(primary_df)} new spans for '{cursor_key}' "
+                f"up to {advanced_cursor.last_timestamp}"
+            )
+
+        primary_df = primary_df.drop(columns="_span_time").reset_index(drop=True)
+        return primary_df, advanced_cursor
+
+    def _cursor_path(self, cursor_key: str) -> str:
+        """Path of the file holding the cursor for ``cursor_key``."""
+        filename = "".join(c if c.isalnum() or c in "-_." else "_" for c in cursor_key)
+        return os.path.join(self.cursor_dir, f"{filename}.json")
+
+    def load_cursor(self, cursor_key: str) -> TelemetryCursor:
+        """Load the high-water mark of an incremental export stream.
+
+        Args:
+            cursor_key: Identifier of the export stream
+
+        Returns:
+            The persisted cursor, or an empty cursor if none exists yet
+        """
+        cursor_path = self._cursor_path(cursor_key)
+        if not os.path.exists(cursor_path):
+            return TelemetryCursor(key=cursor_key)
+        with open(cursor_path, "r") as f:
+            return TelemetryCursor.model_validate_json(f.read())
+
+    def save_cursor(self, cursor: TelemetryCursor) -> None:
+        """Persist the high-water mark of an incremental export stream.
+
+        Args:
+            cursor: The cursor to save
+        """
+        atomic_write(self._cursor_path(cursor.key), cursor.model_dump_json(indent=2))
+        logger.info(f"Cursor '{cursor.key}' advanced to {cursor.last_timestamp}")
+
+    def reset_cursor(self, cursor_key: str) -> None:
+        """Forget the high-water mark so the next export starts from scratch.
+
+        Args:
+            cursor_key: Identifier of the export stream
+        """
+        cursor_path = self._cursor_path(cursor_key)
+        if os.path.exists(cursor_path):
+            os.remove(cursor_path)
+
+    def wait_for_spans(
+        self,
+        span_ids: List[str],
+        start_date: datetime,
+        timeout: float = 300.0,
+        initial_interval: float = 2.0,
+        max_interval: float = 30.0,
+    ) -> bool:
+        """Poll Arize until the given spans are visible in the export.
+
+        Only the span ID column is exported on each poll, and the interval
+        between polls doubles up to ``max_interval``.
+
+        Args:
+            span_ids: IDs of the spans to wait for
+            start_date: Lower bound of the time window the spans fall into
+            timeout: Maximum number of seconds to poll for
+            initial_interval: Seconds to wait after the first unsuccessful poll
+            max_interval: Upper bound for the wait between polls
+
+        Returns:
+            True once all spans are visible, False if the timeout expired first
+        """
+        pending = set(span_ids)
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        while True:
+            try:
+                span_df = self.client.export_model_to_df(
+                    model_id=self.ARIZE_MODEL_ID,
+                    space_id=self.ARIZE_SPACE_ID,
+                    environment=Environments.TRACING,
+                    start_time=start_date,
+                    end_time=datetime.now() + timedelta(minutes=1),
+                    columns=["context.span_id"],
+                )
+                if "context.span_id" in span_df.columns:
+                    pending -= set(span_df["context.span_id"])
+            except Exception as e:
+                logger.warning(f"Polling Arize for spans failed: {e}")
+
+            if not pending:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(
+                    f"{len(pending)} of {len(span_ids)} spans not visible in Arize "
+                    f"after {timeout} seconds"
+                )
+                return False
+
+            logger.info(f"Waiting for {len(pending)} spans to be ingested by Arize")
+            time.sleep(min(interval, remaining))
+            interval = min(max_interval, interval * 2)
+
     def upload_evaluations(
         self, primary_df: pd.DataFrame, evals_df: pd.DataFrame, eval_name: str
     ) -> None:
@@ -109,5 +481,6 @@ class ArizeConnector:
 
         # Upload the evaluations
         logging_client.log_evaluations_sync(evals_df, self.ARIZE_MODEL_ID)
+        self.invalidate_spans(primary_df)
 
         return
@@ -0,0 +1,298 @@
+"""Racing of candidate policies on growing sample budgets.
+
+Replaying and evaluating every candidate on every sample spends most of the
+tokens of a prompt search on candidates that are clearly worse after a few
+samples. Candidates are instead replayed on a small budget of samples, and the
+budget grows geometrically for the candidates that remain after each round
+(successive halving). A candidate whose upper confidence bound falls below the
+best lower bound is dropped as soon as that happens, whatever its rank.
+"""
+
+import logging
+import math
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from phoenix.evals import OpenAIModel
+
+from ..environment.llm_environment import LLMEnvironment
+from ..evaluator_handler.summary import result_scores
+from ..models.policy_update import RaceResult, RaceStanding
+from ..models.state_action import Actions, ColumnarSamples, Sample, StateActions
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateRacer:
+    """Races candidate policies by successive halving with confidence bounds."""
+
+    def __init__(
+        self,
+        environment: LLMEnvironment,
+        evaluator: Callable,
+        evaluator_names: List[str],
+        model: OpenAIModel,
+        initial_budget: int = 8,
+        growth: float = 2.0,
+        keep_fraction: float = 0.5,
+        confidence: float = 0.95,
+        max_concurrency: int = 8,
+        max_workers: Optional[int] = None,
+    ):
+        """Initialize the racer.
+
+        Args:
+            environment: Environment used to replay and evaluate candidates
+            evaluator: Callable evaluator to use
+            evaluator_names: Names of the saved evaluators to score with; the
+                score of a sample is the mean of its evaluator scores
+            model: Model used by the evaluators
+            initial_budget: Number of samples of the first round
+            growth: Factor by which the budget grows every round
+            keep_fraction: Fraction of the remaining candidates kept after each
+                round (1.0 to only drop candidates on confidence bounds)
+            confidence: Confidence level of the bounds on the mean scores
+            max_concurrency: Maximum number of in-flight replay requests per
+                candidate
+            max_workers: Maximum number of candidates replayed at once
+                (defaults to all remaining candidates)
+        """
+        if initial_budget < 1:
+            raise ValueError("initial_budget must be at least 1")
+        if growth <= 1.0:
+            raise ValueError("growth must be greater than 1")
+        if not 0.0 < keep_fraction <= 1.0:
+            raise ValueError("keep_fraction must be in (0, 1]")
+        if not 0.0 < confidence < 1.0:
+            raise ValueError("confidence must be in (0, 1)")
+        self.environment = environment
+        self.evaluator = evaluator
+        self.evaluator_names = evaluator_names
+        self.model = model
+        self.initial_budget = initial_budget
+        self.growth = growth
+        self.keep_fraction = keep_fraction
+        self.z = NormalDist().inv_cdf((1.0 + confidence) / 2.0)
+        self.max_concurrency = max_concurrency
+        self.max_workers = max_workers
+
+    def race(
+        self,
+        state_actions: StateActions,
+        candidates: Sequence[Actions],
+        race_id: Optional[str] = None,
+    ) -> RaceResult:
+        """Race candidate policies on the samples of ``state_actions``.
+
+        Every round replays the remaining candidates on the samples added to
+        the budget since the previous round, so no sample is replayed twice
+        for the same candidate. All candidates see the samples in the same
+        order, which keeps their scores comparable at every budget. The race
+        ends when a single candidate remains or every sample has been used.
+
+        Args:
+            state_actions: Samples to race on (the actions are ignored)
+            candidates: Actions of the candidate policies
+            race_id: Prefix of the run IDs of the replays, which are
+                ``{race_id}-r{round}-c{candidate}`` (defaults to a random ID)
+
+        Returns:
+            The best actions along with the standing of every candidate
+        """
+        if not candidates:
+            raise ValueError("At least one candidate is required")
+        race_id = race_id or f"race-{uuid.uuid4().hex[:8]}"
+        samples = state_actions.samples
+        total = len(samples)
+        weights = np.array([sample.weight for sample in samples], dtype=np.float64)
+        standings = [RaceStanding(actions=actions) for actions in candidates]
+        scores = [np.full(total, np.nan) for _ in candidates]
+        alive = list(range(len(candidates)))
+        evaluated = 0
+        budget = min(self.initial_budget, total)
+        rounds = 0
+        replays = 0
+
+        while evaluated < total and alive:
+            rounds += 1
+            batch = samples[evaluated:budget]
+            logger.info(
+                f"Race round {rounds}: replaying {len(alive)} candidates on "
+                f"samples {evaluated} to {budget}"
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers or len(alive)) as pool:
+                outcomes = list(
+                    pool.map(
+                        lambda index: self._score_batch(
+                            state_actions,
+                            candidates[index],
+                            batch,
+                            run_id=f"{race_id}-r{rounds}-c{index}",
+                        ),
+                        alive,
+                    )
+                )
+            replays += len(batch) * len(alive)
+
+            for index, (batch_scores, error) in zip(list(alive), outcomes):
+                standing = standings[index]
+                standing.samples = budget
+                if error is not None:
+                    standing.error = error
+                    standing.eliminated_round = rounds
+                    alive.remove(index)
+                    continue
+                scores[index][evaluated:budget] = batch_scores
+                self._update_bounds(standing, scores[index], weights)
+            evaluated = budget
+
+            if evaluated < total and len(alive) > 1:
+                for index in self._eliminate(alive, standings):
+                    standings[index].eliminated_round = rounds
+                    alive.remove(index)
+                    logger.info(
+                        f"Dropped candidate {index} after round {rounds} "
+                        f"(mean {standings[index].mean})"
+                    )
+            if len(alive) <= 1:
+                break
+            budget = min(total, max(budget + 1, math.ceil(budget * self.growth)))
+
+        contenders = [standings[index] for index in alive] or standings
+        best = max(contenders, key=lambda standing: _mean_or_lowest(standing.mean))
+        logger.info(
+            f"Race finished after {rounds} rounds and {replays} replays "
+            f"({len(candidates) * total} without racing), best mean {best.mean}"
+        )
+        return RaceResult(
+            best=best.actions,
+            best_score=best.mean,
+            standings=standings,
+            rounds=rounds,
+            replays=replays,
+            full_replays=len(candidates) * total,
+        )
+
+    def _score_batch(
+        self,
+        state_actions: StateActions,
+        actions: Actions,
+        batch: Union[List[Sample], ColumnarSamples],
+        run_id: Optional[str] = None,
+    ) -> Tuple[np.ndarray, Optional[str]]:
+        """Replay a candidate on a batch of samples and score every sample.
+
+        Args:
+            state_actions: StateActions the batch was taken from
+            actions: Actions of the candidate
+            batch: Samples to replay
+            run_id: Run ID of the replay, unique to the candidate and round
+
+        Returns:
+            Tuple of the per-sample scores (NaN where missing) and the error
+            raised while scoring, if any
+        """
+        candidate = StateActions(
+            samples=batch,
+            actions=actions,
+            eval_constants=state_actions.eval_constants,
+        )
+        try:
+            replay_result = self.environment.emulate_llm_call(
+                candidate,
+                run_id=run_id,
+                max_concurrency=self.max_concurrency,
+                trace=False,
+            )
+            totals = np.zeros(len(batch))
+            counts = np.zeros(len(batch))
+            for evaluator_name in self.evaluator_names:
+                results = self.environment.evaluate_replay(
+                    candidate, replay_result, self.evaluator, evaluator_name, self.model
+                )
+                evaluator_scores = np.full(len(batch), np.nan)
+                if len(results):
+                    evaluator_scores[results.index.to_numpy(dtype=int)] = result_scores(
+                        results
+                    )
+                scored = ~np.isnan(evaluator_scores)
+                totals[scored] += evaluator_scores[scored]
+                counts[scored] += 1
+        except Exception as e:
+            logger.error(f"Failed to score candidate policy: {e}")
+            return np.full(len(batch), np.nan), str(e)
+        batch_scores: np.ndarray = np.divide(
+            totals, counts, out=np.full(len(batch), np.nan), where=counts > 0
+        )
+        return batch_scores, None
+
+    def _update_bounds(
+        self, standing: RaceStanding, scores: np.ndarray, weights: np.ndarray
+    ) -> None:
+        """Update the weighted mean score and its confidence bounds.
+
+        Args:
+            standing: Standing of the candidate to update
+            scores: Scores of the candidate, NaN where missing
+            weights: Weight of every sample
+        """
+        scored = ~np.isnan(scores)
+        count = float(weights[scored].sum())
+        standing.count = int(count)
+        if not count:
+            return
+        mean = float(np.average(scores[scored], weights=weights[scored]))
+        standing.mean = mean
+        if count < 2:
+            standing.lower = standing.upper = None
+            return
+        variance = float(
+            np.average((scores[scored] - mean) ** 2, weights=weights[scored])
+        )
+        # Standard error of the mean from the unbiased sample variance
+        half_width = self.z * math.sqrt(variance / (count - 1))
+        standing.lower = mean - half_width
+        standing.upper = mean + half_width
+
+    def _eliminate(self, alive: List[int], standings: List[RaceStanding]) -> List[int]:
+        """Choose the candidates to drop after a round.
+
+        Candidates that are confidently worse than the best lower bound are
+        dropped first, then the lowest means beyond the kept fraction.
+
+        Args:
+            alive: Indices of the remaining candidates
+            standings: Standings of all candidates
+
+        Returns:
+            Indices of the candidates to drop
+        """
+        lowers = [
+            lower
+            for lower in (standings[index].lower for index in alive)
+            if lower is not None
+        ]
+        dropped = []
+        if lowers:
+            best_lower = max(lowers)
+            for index in alive:
+                upper = standings[index].upper
+                if upper is not None and upper < best_lower:
+                    dropped.append(index)
+
+        remaining = [index for index in alive if index not in dropped]
+        keep = max(1, math.ceil(len(alive) * self.keep_fraction))
+        ranked = sorted(
+            remaining,
+            key=lambda index: _mean_or_lowest(standings[index].mean),
+            reverse=True,
+        )
+        return dropped + ranked[keep:]
+
+
+def _mean_or_lowest(mean: Optional[float]) -> float:
+    """Sort key ranking candidates without scores last."""
+    return float("-inf") if mean is None else mean
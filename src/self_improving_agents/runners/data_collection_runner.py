@@ -1,19 +1,37 @@
 # src/self_improving_agents/runners/data_collection_runner.py
 """Runner for collecting and processing state-action data."""
 import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
 
 from self_improving_agents.evaluator_handler.evaluator_saver import EvaluatorSaver
 
 from ..models.state_action import (
     Actions,
+    ColumnarSamples,
+    EvalColumn,
     EvalConstant,
     EvalMetrics,
     Sample,
     StateActions,
 )
 from .arize_connector import ArizeConnector
+from .deduplication import deduplicate_samples
+from .telemetry_context import TelemetryContext
+
+# Telemetry columns read when building state-action pairs
+TELEMETRY_COLUMNS = [
+    "context.span_id",
+    "attributes.input.value",
+    "attributes.llm.input_messages",
+    "attributes.llm.output_messages",
+    "attributes.llm.model_name",
+    "eval.*",
+]
 
 
 class DataCollectionRunner:
@@ -42,6 +60,10 @@ class DataCollectionRunner:
         end_date: Optional[datetime] = None,
         evaluator_names: Optional[List[str]] = None,
         limit: int = 100,
+        incremental: bool = False,
+        columnar: bool = False,
+        dedup_threshold: Optional[float] = None,
+        telemetry_context: Optional[TelemetryContext] = None,
     ) -> StateActions:
         """Collect data and create state-action pairs.
 
@@ -50,34 +72,85 @@ class DataCollectionRunner:
             end_date: Optional end date (defaults to now)
             evaluator_names: Names of evaluators to retrieve data for
             limit: Maximum number of telemetry records to retrieve
+            incremental: Only collect spans newer than the previous incremental
+                collection for this model
+            columnar: Hold the samples in a ``ColumnarSamples`` container
+                instead of a list of ``Sample`` objects
+            dedup_threshold: Collapse samples whose chat histories are at
+                least this similar into one weighted sample (1.0 for exact
+                duplicates only); None keeps every sample
+            telemetry_context: Telemetry shared with the other stages of the
+                workflow, read instead of exporting from Arize (not used for
+                incremental collection)
 
         Returns:
             List of state-action pairs
         """
-        # Fetch telemetry data from Arize
-        telemetry_args: Dict[str, Any] = {
-            "limit": limit,
-        }
-        if start_date is not None:
-            telemetry_args["start_date"] = start_date
-        if end_date is not None:
-            telemetry_args["end_date"] = end_date
-        telemetry_df = self.arize_connector.get_telemetry_data(**telemetry_args)
-
-        telemetry_json = json.loads(telemetry_df.to_json(orient="records"))
+        cursor = None
+        if incremental:
+            # The cursor is saved once the spans are turned into samples
+            telemetry_df, cursor = self.arize_connector.export_new_telemetry(
+                start_date, end_date, limit
+            )
+        elif telemetry_context is not None:
+            if start_date is None:
+                raise ValueError("start_date must be provided")
+            telemetry_df = telemetry_context.export_spans(
+                start_time=start_date, end_time=end_date, columns=TELEMETRY_COLUMNS
+            ).tail(limit)
+        else:
+            # Fetch telemetry data from Arize
+            telemetry_args: Dict[str, Any] = {
+                "limit": limit,
+                "columns": TELEMETRY_COLUMNS,
+            }
+            if start_date is not None:
+                telemetry_args["start_date"] = start_date
+            if end_date is not None:
+                telemetry_args["end_date"] = end_date
+            telemetry_df = self.arize_connector.get_telemetry_data(**telemetry_args)
         # COULD BE GETTING RECORDS TRUNCATE END
 
-        if not telemetry_json:
+        if telemetry_df.empty:
             raise ValueError("No telemetry data found")
 
         # Get evaluator data
         # TODO: extend this to names (PLURAL)
         evaluator_constants: List[EvalConstant] = self.discover_evaluators(
             evaluator_names=evaluator_names,
-            telemetry_json=telemetry_json,
+            telemetry_columns=list(telemetry_df.columns),
         )
 
         # Build actions
+        actions = self._extract_actions(telemetry_df)
+
+        # Collect samples
+        to_samples = telemetry_to_columnar_samples if columnar else telemetry_to_samples
+        samples = to_samples(
+            telemetry_df,
+            [evaluator_data.name for evaluator_data in evaluator_constants],
+        )
+        if dedup_threshold is not None:
+            samples = deduplicate_samples(samples, threshold=dedup_threshold)
+
+        state_action_pair = StateActions(
+            samples=samples, actions=actions, eval_constants=evaluator_constants
+        )
+
+        if cursor is not None:
+            self.arize_connector.save_cursor(cursor)
+
+        return state_action_pair
+
+    def _extract_actions(self, telemetry_df: pd.DataFrame) -> Actions:
+        """Extract the actions (system prompt and model) of the first span.
+
+        Args:
+            telemetry_df: Non-empty telemetry spans
+
+        Returns:
+            Actions used to produce the spans
+        """
         system_prompt = ""
         if (
             telemetry_df.iloc[0]
@@ -94,68 +167,136 @@ class DataCollectionRunner:
             # TODO: should not raise error
             raise ValueError("System prompt not found")
         model = telemetry_df.iloc[0].get("attributes.llm.model_name")
-        actions = Actions(system_prompt=system_prompt, model=model)
+        return Actions(system_prompt=system_prompt, model=model)
 
-        # Collect samples
-        samples = []
-        for item in telemetry_json:
-            chat_history = json.loads(item.get("attributes.input.value"))["messages"]
-            if chat_history[0].get("role") == "system":
-                chat_history = chat_history[1:]
-
-            output_generation = item.get("attributes.llm.output_messages")[0].get(
-                "message.content"
-            )
-            evals_metrics = []
-            for evaluator_data in evaluator_constants:
-                eval_name = evaluator_data.name
-                # # TODO: restore string templating with eval_name
-                # eval_score = item.get(f'eval.{eval_name}.label')
-                # eval_explanation = item.get(f'eval.{eval_name}.explanation')
-                eval_score = item.get(f"eval.{eval_name}.score")
-                eval_explanation = item.get(f"eval.{eval_name}.explanation")
-                eval_label = item.get(f"eval.{eval_name}.label")
-                evals_metrics.append(
-                    EvalMetrics(
-                        name=eval_name,
-                        eval_score=eval_score,
-                        eval_reasoning=eval_explanation,
-                        eval_label=eval_label,
-                    )
+    def collect_data_batches(
+        self,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        evaluator_names: Optional[List[str]] = None,
+        batch_size: int = 500,
+        chunk_duration: timedelta = timedelta(hours=1),
+        limit: Optional[int] = None,
+        columnar: bool = False,
+    ) -> Iterator[StateActions]:
+        """Collect state-action pairs as a stream of bounded batches.
+
+        The time window is exported in chunks of ``chunk_duration`` and each
+        chunk is converted and yielded in batches of at most ``batch_size``
+        samples, so memory stays bounded by one chunk regardless of the size
+        of the window. Actions and evaluator constants are taken from the
+        first non-empty chunk and shared by every batch.
+
+        Args:
+            start_date: Start date for data collection
+            end_date: Optional end date (defaults to now)
+            evaluator_names: Names of evaluators to retrieve data for
+            batch_size: Maximum number of samples per batch
+            chunk_duration: Length of the time chunks exported at once
+            limit: Optional maximum number of samples across all batches
+            columnar: Hold the samples of each batch in a ``ColumnarSamples``
+                container instead of a list of ``Sample`` objects
+
+        Yields:
+            State-action pairs holding consecutive batches of samples
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if limit is not None and limit <= 0:
+            return
+
+        to_samples = telemetry_to_columnar_samples if columnar else telemetry_to_samples
+        actions: Optional[Actions] = None
+        evaluator_constants: List[EvalConstant] = []
+        remaining = limit
+        for telemetry_df in self.arize_connector.iter_telemetry_chunks(
+            start_date=start_date,
+            end_date=end_date or datetime.now(),
+            chunk_duration=chunk_duration,
+            columns=TELEMETRY_COLUMNS,
+        ):
+            if telemetry_df.empty:
+                continue
+            if actions is None:
+                actions = self._extract_actions(telemetry_df)
+                evaluator_constants = self.discover_evaluators(
+                    evaluator_names=evaluator_names,
+                    telemetry_columns=list(telemetry_df.columns),
                 )
 
-            samples.append(
-                Sample(
-                    chat_history=chat_history,
-                    output_generation=output_generation,
-                    evals=evals_metrics,
+            for offset in range(0, len(telemetry_df), batch_size):
+                batch_df = telemetry_df.iloc[offset : offset + batch_size]
+                if remaining is not None:
+                    batch_df = batch_df.head(remaining)
+                    remaining -= len(batch_df)
+                yield StateActions(
+                    samples=to_samples(
+                        batch_df,
+                        [evaluator_data.name for evaluator_data in evaluator_constants],
+                    ),
+                    actions=actions,
+                    eval_constants=evaluator_constants,
                 )
-            )
+                if remaining == 0:
+                    return
 
-        state_action_pair = StateActions(
-            samples=samples, actions=actions, eval_constants=evaluator_constants
-        )
+    def iter_samples(
+        self,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        evaluator_names: Optional[List[str]] = None,
+        batch_size: int = 500,
+        chunk_duration: timedelta = timedelta(hours=1),
+        limit: Optional[int] = None,
+    ) -> Iterator[Sample]:
+        """Iterate over the samples of a time window one at a time.
 
-        return state_action_pair
+        See ``collect_data_batches`` for how the window is exported.
+
+        Args:
+            start_date: Start date for data collection
+            end_date: Optional end date (defaults to now)
+            evaluator_names: Names of evaluators to retrieve data for
+            batch_size: Number of spans converted to samples at once
+            chunk_duration: Length of the time chunks exported at once
+            limit: Optional maximum number of samples
+
+        Yields:
+            Samples in export order
+        """
+        for state_actions in self.collect_data_batches(
+            start_date=start_date,
+            end_date=end_date,
+            evaluator_names=evaluator_names,
+            batch_size=batch_size,
+            chunk_duration=chunk_duration,
+            limit=limit,
+        ):
+            yield from state_actions.samples
 
     def discover_evaluators(
         self,
         evaluator_names: Optional[List[str]] = None,
         telemetry_json: Optional[List[Dict[str, Any]]] = None,
+        telemetry_columns: Optional[List[str]] = None,
     ) -> List[EvalConstant]:
         """Discover evaluator data from telemetry data.
 
         Args:
             evaluator_names: Optional list of evaluator names to search for in telemetry data
             telemetry_json: Optional telemetry data to search through
+            telemetry_columns: Optional telemetry column names to search through
+                (used instead of ``telemetry_json`` when given)
 
         Returns:
             List of EvalConstant objects containing discovered evaluator data
         """
         evaluators_data: List[EvalConstant] = []
 
-        if not telemetry_json:
-            raise ValueError("No telemetry data found")
+        if telemetry_columns is None:
+            if not telemetry_json:
+                raise ValueError("No telemetry data found")
+            telemetry_columns = list(telemetry_json[0].keys())
 
         if evaluator_names:
             for name in evaluator_names:
@@ -175,7 +316,7 @@ class DataCollectionRunner:
                         continue
 
                     # Step 2: Search through telemetry data if available
-                    for key, val in telemetry_json[0].items():
+                    for key in telemetry_columns:
                         if key.startswith(f"eval.{name}."):
                             evaluators_data.append(EvalConstant(name=name))
                             break
@@ -185,3 +326,129 @@ class DataCollectionRunner:
                     continue
 
         return evaluators_data
+
+
+def telemetry_to_samples(
+    telemetry_df: pd.DataFrame, evaluator_names: List[str]
+) -> List[Sample]:
+    """Convert telemetry spans into samples column by column.
+
+    Each column is extracted once as a Python list instead of serializing the
+    DataFrame to JSON and re-parsing it row by row, with missing values
+    normalized to None and scores to floats up front.
+
+    Args:
+        telemetry_df: Telemetry spans exported from Arize
+        evaluator_names: Names of the evaluators whose columns to read
+
+    Returns:
+        Samples in the row order of ``telemetry_df``
+    """
+    row_count = len(telemetry_df)
+
+    chat_histories = []
+    for input_value in telemetry_df["attributes.input.value"].tolist():
+        chat_history = json.loads(input_value)["messages"]
+        if chat_history[0].get("role") == "system":
+            chat_history = chat_history[1:]
+        chat_histories.append(chat_history)
+
+    output_generations = _output_generations(telemetry_df)
+
+    eval_columns = []
+    for eval_name in evaluator_names:
+        scores: List[Optional[float]] = [
+            None if math.isnan(score) else float(score)
+            for score in _score_column(telemetry_df, eval_name)
+        ]
+        eval_columns.append(
+            (
+                eval_name,
+                scores,
+                _optional_column(telemetry_df, f"eval.{eval_name}.explanation"),
+                _optional_column(telemetry_df, f"eval.{eval_name}.label"),
+            )
+        )
+
+    return [
+        Sample(
+            chat_history=chat_histories[row],
+            output_generation=output_generations[row],
+            evals=[
+                EvalMetrics(
+                    name=eval_name,
+                    eval_score=scores[row],
+                    eval_reasoning=explanations[row],
+                    eval_label=labels[row],
+                )
+                for eval_name, scores, explanations, labels in eval_columns
+            ],
+        )
+        for row in range(row_count)
+    ]
+
+
+def telemetry_to_columnar_samples(
+    telemetry_df: pd.DataFrame, evaluator_names: List[str]
+) -> ColumnarSamples:
+    """Convert telemetry spans into a column-backed sequence of samples.
+
+    Unlike ``telemetry_to_samples`` no per-sample objects are built: the
+    columns are packed as they are and samples are materialized on access.
+
+    Args:
+        telemetry_df: Telemetry spans exported from Arize
+        evaluator_names: Names of the evaluators whose columns to read
+
+    Returns:
+        Samples in the row order of ``telemetry_df``
+    """
+    return ColumnarSamples.from_columns(
+        chat_histories=telemetry_df["attributes.input.value"].tolist(),
+        output_generations=_output_generations(telemetry_df),
+        evals={
+            eval_name: EvalColumn(
+                scores=_score_column(telemetry_df, eval_name),
+                reasonings=_optional_column(
+                    telemetry_df, f"eval.{eval_name}.explanation"
+                ),
+                labels=_optional_column(telemetry_df, f"eval.{eval_name}.label"),
+            )
+            for eval_name in evaluator_names
+        },
+    )
+
+
+def _output_generations(telemetry_df: pd.DataFrame) -> List[str]:
+    """Extract the output generation of every span."""
+    output_generations = []
+    for output_messages in telemetry_df["attributes.llm.output_messages"].tolist():
+        output_generation = output_messages[0].get("message.content")
+        if not isinstance(output_generation, str):
+            raise ValueError(f"Invalid output generation: {output_generation!r}")
+        output_generations.append(output_generation)
+    return output_generations
+
+
+def _score_column(telemetry_df: pd.DataFrame, eval_name: str) -> np.ndarray:
+    """Return the scores of an evaluator as floats, NaN where missing."""
+    score_column = f"eval.{eval_name}.score"
+    if score_column not in telemetry_df.columns:
+        return np.full(len(telemetry_df), np.nan)
+    scores: np.ndarray = (
+        pd.to_numeric(telemetry_df[score_column], errors="coerce")
+        .astype(float)
+        .to_numpy()
+    )
+    return scores
+
+
+def _optional_column(telemetry_df: pd.DataFrame, column: str) -> List[Optional[str]]:
+    """Return a string column as a list, with missing values (or column) as None."""
+    if column not in telemetry_df.columns:
+        return [None] * len(telemetry_df)
+    values = telemetry_df[column]
+    return [
+        None if value is None else str(value)
+        for value in values.astype(object).where(values.notna(), None).tolist()
+    ]
@@ -0,0 +1,92 @@
+"""Deduplication of collected samples.
+
+Production traffic contains many identical or nearly identical requests.
+Replaying and evaluating every one of them spends tokens on redundant work,
+so samples are grouped by their chat history and each group is collapsed to
+its first sample, weighted by the number of samples it stands for.
+
+This is a lossy approximation: the evaluations and output of the other
+samples of a group are dropped, and the representative's are counted once
+per sample of the group. Summaries of deduplicated samples therefore match
+those of the original samples only when each group was evaluated alike.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, List, Sequence, Union
+
+from ..models.state_action import ColumnarSamples, Sample
+from ..utils.minhash import MinHasher, NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+
+def deduplicate_samples(
+    samples: Sequence[Sample],
+    threshold: float = 0.9,
+    num_perm: int = 64,
+    bands: int = 16,
+    shingle_size: int = 3,
+) -> Union[List[Sample], ColumnarSamples]:
+    """Collapse identical and near-identical samples to weighted representatives.
+
+    Samples with exactly the same chat history are grouped by hash. The
+    remaining distinct chat histories are grouped when the MinHash estimate of
+    their shingle similarity reaches ``threshold``, comparing only the
+    candidates found by LSH. Each group is represented by its first sample,
+    whose weight becomes the total weight of the group; the evaluations of
+    the other samples in the group are not kept.
+
+    Args:
+        samples: Samples to deduplicate, as a list or ``ColumnarSamples``
+        threshold: Estimated similarity at or above which two chat histories
+            are near-duplicates (1.0 to only merge exact duplicates)
+        num_perm: Length of the MinHash signatures
+        bands: Number of LSH bands, which must divide ``num_perm``
+        shingle_size: Number of consecutive words per shingle
+
+    Returns:
+        Representatives in order of first appearance, as ``ColumnarSamples``
+        if ``samples`` is one and as a list otherwise
+    """
+    hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+    index = NearDuplicateIndex(bands=bands, threshold=threshold)
+    exact_groups: Dict[str, int] = {}
+    representatives: List[int] = []
+    weights: Dict[int, int] = {}
+
+    for position, sample in enumerate(samples):
+        digest = hashlib.sha256(
+            json.dumps(sample.chat_history, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        representative = exact_groups.get(digest)
+        if representative is None and threshold < 1.0:
+            signature = hasher.signature(chat_history_text(sample))
+            representative = index.find(signature)
+            if representative is None:
+                index.add(position, signature)
+        if representative is None:
+            representative = position
+            representatives.append(position)
+            weights[position] = 0
+        exact_groups[digest] = representative
+        weights[representative] += sample.weight
+
+    logger.info(
+        f"Deduplicated {len(samples)} samples to {len(representatives)} representatives"
+    )
+    if isinstance(samples, ColumnarSamples):
+        return samples.take(
+            representatives, weights=[weights[i] for i in representatives]
+        )
+    return [
+        samples[i].model_copy(update={"weight": weights[i]}) for i in representatives
+    ]
+
+
+def chat_history_text(sample: Sample) -> str:
+    """Concatenate the message contents of a sample's chat history."""
+    return "\n".join(
+        str(message.get("content") or "") for message in sample.chat_history
+    )
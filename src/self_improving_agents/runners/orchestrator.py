@@ -4,16 +4,31 @@ This module provides an orchestrator that ties together the evaluation pipeline,
 environment emulation, and policy updating components to streamline the
 self-improvement workflow.
 """
+import itertools
 import logging
-import time
+import uuid
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional
 
+import pandas as pd
 from phoenix.evals import OpenAIModel
 
 from ..environment.llm_environment import LLMEnvironment
+from ..evaluator_handler.summary import (
+    compare_summaries,
+    format_summary,
+    summarize_eval_results,
+)
+from ..models.evaluation_summary import EvaluatorSummary
+from ..models.policy_update import PolicySearchResult, RaceResult
 from ..models.state_action import Actions, StateActions
 from ..policy.llm_policy_updater import LLMPolicyUpdater
+from ..utils.cache import ResponseCache
+from ..utils.rate_limiter import RateLimiter
+from ..utils.run_catalog import RunCatalog
+from .candidate_racing import CandidateRacer
+from .telemetry_context import TelemetryContext
+from .telemetry_store import TelemetryStore
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +43,10 @@ class WorkflowOrchestrator:
         arize_model_id: Optional[str] = None,
         openai_api_key: Optional[str] = None,
         checkpoint_dir: str = ".sia/checkpoint",
+        rate_limiter: Optional[RateLimiter] = None,
+        response_cache: Optional[ResponseCache] = None,
+        telemetry_store: Optional[TelemetryStore] = None,
+        run_catalog: Optional[RunCatalog] = None,
     ):
         """Initialize the workflow orchestrator.
 
@@ -37,6 +56,11 @@ class WorkflowOrchestrator:
             arize_model_id: Arize model ID (defaults to ARIZE_MODEL_ID env var)
             openai_api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             checkpoint_dir: Directory for action checkpoints
+            rate_limiter: Rate limiter shared by all OpenAI calls
+            response_cache: Optional cache of replayed completions
+            telemetry_store: Optional local store of exported telemetry
+            run_catalog: Catalog of the runs and checkpoints, which also
+                records the mean evaluator scores of every validation
         """
         # Initialize the environment which includes most of the components we need
         self.environment = LLMEnvironment(
@@ -45,10 +69,22 @@ class WorkflowOrchestrator:
             arize_model_id=arize_model_id,
             openai_api_key=openai_api_key,
             checkpoint_dir=checkpoint_dir,
+            rate_limiter=rate_limiter,
+            response_cache=response_cache,
+            telemetry_store=telemetry_store,
+            run_catalog=run_catalog,
         )
+        self.run_catalog = self.environment.run_catalog
 
         # For easy access to components
-        self.policy_updater = LLMPolicyUpdater()
+        self.policy_updater = LLMPolicyUpdater(
+            rate_limiter=self.environment.rate_limiter,
+            catalog=self.run_catalog,
+            checkpoint_dir=checkpoint_dir,
+        )
+
+        # Evaluation summaries of each validation run, by run ID
+        self.evaluation_summaries: Dict[str, Dict[str, EvaluatorSummary]] = {}
 
         logger.info("Workflow orchestrator initialized")
 
@@ -131,6 +167,152 @@ class WorkflowOrchestrator:
         logger.info("Policy update completed")
         return updated_actions
 
+    def search_policy(
+        self,
+        state_actions: StateActions,
+        evaluator: Callable,
+        evaluator_names: List[str],
+        model: OpenAIModel,
+        n_candidates: int = 4,
+        sample_size: int = 20,
+        max_workers: Optional[int] = None,
+        max_concurrency: int = 8,
+        checkpoint: bool = True,
+        search_id: Optional[str] = None,
+    ) -> PolicySearchResult:
+        """Search for a better policy among several candidates in one round.
+
+        The policy updater proposes ``n_candidates`` alternative actions. Each
+        candidate, and the current actions, is replayed on the same first
+        ``sample_size`` samples and its outputs are evaluated locally, with
+        the candidates scored concurrently. Replays are not traced to Arize.
+
+        Args:
+            state_actions: The state-action pairs with evaluation metrics
+            evaluator: Callable evaluator to use
+            evaluator_names: Names of the saved evaluators to score with
+            model: Model used by the evaluators
+            n_candidates: Number of candidate policies to propose
+            sample_size: Number of samples each candidate is replayed on
+            max_workers: Maximum number of candidates scored at once
+            max_concurrency: Maximum number of in-flight replay requests per
+                candidate
+            checkpoint: Whether to save a checkpoint of the best actions
+            search_id: Prefix of the run IDs of the candidate replays, which
+                are ``{search_id}-c{n}`` (defaults to a random ID)
+
+        Returns:
+            The best actions along with the scores of every candidate
+        """
+        samples = state_actions.samples[:sample_size]
+        search_id = search_id or f"search-{uuid.uuid4().hex[:8]}"
+        # Candidates are scored concurrently, each replay under its own run ID
+        replay_numbers = itertools.count()
+
+        def score(actions: Actions) -> Dict[str, Optional[float]]:
+            candidate = StateActions(
+                samples=samples,
+                actions=actions,
+                eval_constants=state_actions.eval_constants,
+            )
+            replay_result = self.environment.emulate_llm_call(
+                candidate,
+                run_id=f"{search_id}-c{next(replay_numbers)}",
+                max_concurrency=max_concurrency,
+                trace=False,
+            )
+            return {
+                evaluator_name: summarize_eval_results(
+                    self.environment.evaluate_replay(
+                        candidate, replay_result, evaluator, evaluator_name, model
+                    ),
+                    evaluator_name,
+                ).mean
+                for evaluator_name in evaluator_names
+            }
+
+        logger.info(
+            f"Searching {n_candidates} candidate policies on {len(samples)} samples"
+        )
+        result = self.policy_updater.search(
+            state_actions,
+            scorer=score,
+            n_candidates=n_candidates,
+            max_workers=max_workers,
+            checkpoint=checkpoint,
+        )
+        for candidate in result.candidates:
+            logger.info(f"Candidate scored {candidate.score}: {candidate.scores}")
+        return result
+
+    def race_policy(
+        self,
+        state_actions: StateActions,
+        evaluator: Callable,
+        evaluator_names: List[str],
+        model: OpenAIModel,
+        n_candidates: int = 4,
+        initial_budget: int = 8,
+        growth: float = 2.0,
+        keep_fraction: float = 0.5,
+        confidence: float = 0.95,
+        max_concurrency: int = 8,
+        checkpoint: bool = True,
+        race_id: Optional[str] = None,
+    ) -> RaceResult:
+        """Search for a better policy by racing candidates on growing budgets.
+
+        Unlike :meth:`search_policy`, candidates are not all replayed on the
+        same number of samples: losing candidates are dropped after a few
+        samples and only the remaining ones are replayed on more.
+
+        Args:
+            state_actions: The state-action pairs with evaluation metrics
+            evaluator: Callable evaluator to use
+            evaluator_names: Names of the saved evaluators to score with
+            model: Model used by the evaluators
+            n_candidates: Number of candidate policies to propose
+            initial_budget: Number of samples of the first round
+            growth: Factor by which the budget grows every round
+            keep_fraction: Fraction of the candidates kept after each round
+            confidence: Confidence level of the bounds on the mean scores
+            max_concurrency: Maximum number of in-flight replay requests per
+                candidate
+            checkpoint: Whether to save a checkpoint of the best actions
+            race_id: Prefix of the run IDs of the candidate replays, unique
+                per candidate and round (defaults to a random ID)
+
+        Returns:
+            The best actions along with the standing of every candidate
+        """
+        candidates = [state_actions.actions] + [
+            update.actions
+            for update in self.policy_updater.propose_candidates(
+                state_actions, n_candidates
+            )
+        ]
+        racer = CandidateRacer(
+            environment=self.environment,
+            evaluator=evaluator,
+            evaluator_names=evaluator_names,
+            model=model,
+            initial_budget=initial_budget,
+            growth=growth,
+            keep_fraction=keep_fraction,
+            confidence=confidence,
+            max_concurrency=max_concurrency,
+        )
+        result = racer.race(state_actions, candidates, race_id=race_id)
+        logger.info(
+            f"Raced {len(candidates)} candidate policies with {result.replays} "
+            f"of {result.full_replays} replays"
+        )
+        if checkpoint and result.best != state_actions.actions:
+            self.policy_updater.save_checkpoint(
+                result.best, parent_actions=state_actions.actions
+            )
+        return result
+
     def validate_policy(
         self,
         evaluator: Callable,
@@ -142,23 +324,59 @@ class WorkflowOrchestrator:
         run_id: Optional[str] = None,
         upsert: bool = False,
         limit: int = 100,
+        ingestion_mode: Literal["poll", "local"] = "poll",
+        ingestion_timeout: float = 300.0,
+        max_workers: Optional[int] = None,
+        evaluator_concurrency: Optional[Dict[str, int]] = None,
+        telemetry_context: Optional[TelemetryContext] = None,
+        eval_source: Literal["telemetry", "replay"] = "telemetry",
     ) -> StateActions:
         """Validate the policy using emulation.
 
+        The evaluators run concurrently on a single export of the spans. The
+        summary of each evaluator's results is logged and, when ``run_id`` is
+        given, kept in ``evaluation_summaries[run_id]``. The mean scores are
+        recorded in the run catalog under the run ID of the replay.
+
         Args:
             state_actions: StateActions containing samples to test
             updated_actions: Updated actions to validate
             run_id: Optional run ID for tracking
+            ingestion_mode: How to wait for replayed spans before evaluating
+                ("poll" polls Arize, "local" skips the round-trip and so
+                evaluates the replayed outputs as with ``eval_source="replay"``)
+            ingestion_timeout: Maximum number of seconds to wait for ingestion
+            max_workers: Maximum number of evaluators running at once
+            evaluator_concurrency: Maximum number of concurrent requests per
+                evaluator name
+            telemetry_context: Telemetry shared with other validations of the
+                workflow (defaults to one for this validation only)
+            eval_source: What the evaluators score: "telemetry" exports the
+                spans of the time window from Arize, "replay" scores the
+                replayed outputs held in memory directly, without waiting for
+                ingestion (evaluations are then not uploaded)
 
         Returns:
             Results from the emulation
         """
+        if ingestion_mode == "local" and eval_source != "replay":
+            # Spans exported without waiting for ingestion may miss the
+            # replayed ones, so the replayed outputs are evaluated instead
+            logger.info("Evaluating the replayed outputs in local ingestion mode")
+            eval_source = "replay"
+
+        # Collection and evaluation read the same spans, exported only once
+        telemetry_context = telemetry_context or TelemetryContext(
+            self.environment.arize_connector
+        )
+
         logger.info(f"Collecting state actions from {start_time} to {end_time}")
         state_actions = self.environment.data_collector.collect_data(
             start_date=start_time,
             end_date=end_time,
             evaluator_names=evaluator_names,
             limit=limit,
+            telemetry_context=telemetry_context,
         )
 
         logger.info(f"Validating policy on {len(state_actions.samples)} samples")
@@ -171,28 +389,43 @@ class WorkflowOrchestrator:
         logger.info(
             f"Running llm_runs emulation for {len(state_actions.samples)} samples"
         )
-        self.environment.emulate_llm_call(state_actions, run_id=run_id)
+        replay_result = self.environment.emulate_llm_call(state_actions, run_id=run_id)
 
-        # sleep to allow for results to be uploaded to Arize
-        sleep_duration = 30
-        logger.info(
-            f"Sleeping for {sleep_duration} seconds to allow for results to be uploaded to Arize"
+        # Wait for the replayed spans to be available in Arize
+        if eval_source == "telemetry" and not self.environment.wait_for_ingestion(
+            replay_result, mode=ingestion_mode, timeout=ingestion_timeout
+        ):
+            logger.warning("Evaluating before all replayed spans were ingested")
+
+        # Run the evaluations concurrently on a shared export of the spans
+        logger.info(f"Running evaluations for {', '.join(evaluator_names)}")
+        eval_results = self.environment.emulate_evals(
+            state_actions=state_actions,
+            evaluator=evaluator,
+            model=model,
+            evaluator_names=evaluator_names,
+            start_time=start_time,
+            end_time=end_time,
+            run_id=run_id,
+            upsert=upsert,
+            limit=limit,
+            max_workers=max_workers,
+            concurrency=evaluator_concurrency,
+            telemetry_context=telemetry_context,
+            replay_result=replay_result if eval_source == "replay" else None,
         )
-        time.sleep(sleep_duration)
-
-        # Run evaluations on the state_actions object
-        for evaluator_name in evaluator_names:
-            logger.info(f"Running evaluation for {evaluator_name}")
-            self.environment.emulate_eval(
-                state_actions=state_actions,
-                evaluator=evaluator,
-                model=model,
-                evaluator_name=evaluator_name,
-                start_time=start_time,
-                end_time=end_time,
-                run_id=run_id,
-                limit=limit,
+        summaries: Dict[str, EvaluatorSummary] = {}
+        for evaluator_name, eval_result in eval_results.items():
+            summaries[evaluator_name] = summarize_eval_results(
+                pd.DataFrame(eval_result["results"]), evaluator_name
             )
+            logger.info(format_summary(summaries[evaluator_name]))
+        if run_id is not None:
+            self.evaluation_summaries[run_id] = summaries
+        self.run_catalog.record_scores(
+            replay_result["run_id"],
+            {name: summary.mean for name, summary in summaries.items()},
+        )
 
         logger.info("Policy validation completed")
         return state_actions
@@ -208,6 +441,8 @@ class WorkflowOrchestrator:
         checkpoint: bool = True,
         verbose: bool = True,
         upsert: bool = False,
+        ingestion_mode: Literal["poll", "local"] = "poll",
+        eval_source: Literal["telemetry", "replay"] = "telemetry",
     ) -> Dict[str, Any]:
         """Run the complete workflow from baseline validation to updated policy validation.
 
@@ -220,12 +455,19 @@ class WorkflowOrchestrator:
             limit: Maximum number of samples to collect
             checkpoint: Whether to save a checkpoint of the updated actions
             upsert: Whether to upsert the results to Arize
+            ingestion_mode: How to wait for replayed spans before evaluating
+                ("local" implies ``eval_source="replay"``)
+            eval_source: Whether to evaluate the exported spans ("telemetry")
+                or the replayed outputs directly ("replay")
 
         Returns:
-            Dictionary containing results from each step
+            Dictionary containing results from each step, including the
+            evaluation summaries of both runs and the change in mean score
+            per evaluator
         """
 
         logger.info(f"Starting complete workflow from {start_date} to {end_date}")
+        telemetry_context = TelemetryContext(self.environment.arize_connector)
 
         # Step 1: Validate baseline
         baseline_id = f"baseline_{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -237,6 +479,9 @@ class WorkflowOrchestrator:
             end_time=end_date,
             run_id=baseline_id,
             limit=limit,
+            ingestion_mode=ingestion_mode,
+            telemetry_context=telemetry_context,
+            eval_source=eval_source,
         )
 
         # Step 2: Update policy
@@ -262,6 +507,13 @@ class WorkflowOrchestrator:
             run_id=updated_id,
             limit=limit,
             upsert=upsert,
+            ingestion_mode=ingestion_mode,
+            telemetry_context=telemetry_context,
+            eval_source=eval_source,
+        )
+        logger.info(
+            f"Served {telemetry_context.requests} telemetry reads with "
+            f"{telemetry_context.exports} exports"
         )
 
         # # Return results from all steps
@@ -270,8 +522,13 @@ class WorkflowOrchestrator:
         #     "updated_actions": updated_actions,
         #     "updated_validation_results": updated_results,
         # }
+        baseline_summaries = self.evaluation_summaries.get(baseline_id, {})
+        updated_summaries = self.evaluation_summaries.get(updated_id, {})
         workflow_results = {
             "state": "complete",
+            "baseline_summaries": baseline_summaries,
+            "updated_summaries": updated_summaries,
+            "score_deltas": compare_summaries(baseline_summaries, updated_summaries),
         }
 
         logger.info("Complete workflow completed successfully")
@@ -0,0 +1,224 @@
+"""Telemetry shared by the stages of a single workflow.
+
+Collecting samples, replaying them and evaluating the replays all read spans
+of the same time window. A ``TelemetryContext`` exports each part of a window
+once and serves every later request for it from memory, filtering by time and
+projecting columns in place of another export.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from arize.utils.types import Environments
+
+from .arize_connector import ArizeConnector
+from .telemetry_store import (
+    SPAN_ID_COLUMN,
+    TIME_COLUMN,
+    TimeRange,
+    merge_ranges,
+    missing_ranges,
+    project_columns,
+    to_utc,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryContext:
+    """In-memory telemetry of a workflow, exported from Arize at most once."""
+
+    def __init__(
+        self,
+        arize_connector: ArizeConnector,
+        ingestion_lag: timedelta = timedelta(minutes=10),
+    ):
+        """Initialize the telemetry context.
+
+        Args:
+            arize_connector: Connector the spans are exported with
+            ingestion_lag: Ranges closer to now than this are exported again
+                on every request, since Arize may still be ingesting spans
+                for them (such as spans of a replay that just ran)
+        """
+        self.arize_connector = arize_connector
+        self.ingestion_lag = ingestion_lag
+        self.exports = 0
+        self.requests = 0
+        # Spans and fetched time ranges per set of non-default export filters
+        self._spans: Dict[str, pd.DataFrame] = {}
+        self._coverage: Dict[str, List[TimeRange]] = {}
+        # Guards the dictionaries and counters; exports only hold their
+        # key's lock, so exports of different filters run concurrently
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def export_spans(
+        self,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+        **export_kwargs: Any,
+    ) -> pd.DataFrame:
+        """Return the spans of a time window, exporting only what is missing.
+
+        Takes the same arguments as ``ArizeConnector.export_spans``, so it can
+        be used in its place. Arguments equal to the connector's defaults
+        (its model and space, and the tracing environment) are ignored, so
+        requests that spell them out share the telemetry of those that don't.
+
+        Args:
+            start_time: Start of the time window
+            end_time: End of the time window, inclusive (defaults to now)
+            columns: Columns (or glob patterns) to return (defaults to all)
+            **export_kwargs: Additional arguments for ``export_model_to_df``
+
+        Returns:
+            DataFrame containing the spans of the window, sorted by start time
+        """
+        end_time = end_time or datetime.now()
+        start, end = to_utc(start_time), to_utc(end_time)
+        filters = self._filters(export_kwargs)
+        key = json.dumps(filters, sort_keys=True, default=str)
+
+        with self._lock:
+            self.requests += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Requests for the same spans wait for the export of the first one
+        with key_lock:
+            with self._lock:
+                coverage = list(self._coverage.get(key, []))
+            for range_start, range_end in missing_ranges(coverage, start, end):
+                logger.info(f"Exporting telemetry from {range_start} to {range_end}")
+                range_df = self.arize_connector.export_spans(
+                    start_time=range_start, end_time=range_end, **filters
+                )
+                with self._lock:
+                    self.exports += 1
+                if not range_df.empty and TIME_COLUMN not in range_df.columns:
+                    logger.warning(
+                        f"Spans without a '{TIME_COLUMN}' column cannot be shared"
+                    )
+                    return range_df
+                self._add(key, range_df, range_start, range_end)
+
+        with self._lock:
+            spans_df = self._spans.get(key, pd.DataFrame())
+        if not spans_df.empty:
+            span_times = pd.to_datetime(spans_df[TIME_COLUMN], utc=True)
+            spans_df = spans_df[
+                ((span_times >= start) & (span_times <= end)).to_numpy()
+            ]
+        projection = project_columns(list(spans_df.columns), columns)
+        if projection is not None:
+            spans_df = spans_df[projection]
+        return spans_df.reset_index(drop=True)
+
+    def _filters(self, export_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop the export arguments equal to the connector's defaults."""
+        defaults = {
+            "model_id": self.arize_connector.ARIZE_MODEL_ID,
+            "space_id": self.arize_connector.ARIZE_SPACE_ID,
+            "environment": Environments.TRACING,
+        }
+        return {
+            name: value
+            for name, value in export_kwargs.items()
+            if name not in defaults or value != defaults[name]
+        }
+
+    def _add(
+        self, key: str, spans_df: pd.DataFrame, start: datetime, end: datetime
+    ) -> None:
+        """Merge exported spans into those held for ``key``, recording the range."""
+        # Only the settled part of the range is known to be complete
+        settled_end = min(end, datetime.now(timezone.utc) - self.ingestion_lag)
+        with self._lock:
+            if not spans_df.empty:
+                if key in self._spans:
+                    spans_df = pd.concat(
+                        [self._spans[key], spans_df], ignore_index=True
+                    )
+                if SPAN_ID_COLUMN in spans_df.columns:
+                    spans_df = spans_df.drop_duplicates(SPAN_ID_COLUMN, keep="last")
+                order = pd.to_datetime(spans_df[TIME_COLUMN], utc=True).argsort()
+                self._spans[key] = spans_df.iloc[order.to_numpy()].reset_index(
+                    drop=True
+                )
+            if settled_end > start:
+                self._coverage[key] = merge_ranges(
+                    self._coverage.get(key, []) + [(start, settled_end)]
+                )
+
+    def add_evaluations(self, evals_df: pd.DataFrame) -> None:
+        """Merge logged evaluations into the spans held in memory.
+
+        Called after evaluations are uploaded for spans, so the copies held
+        in memory carry the same ``eval.*`` columns as a new export would,
+        without exporting them again.
+
+        Args:
+            evals_df: Evaluations with a ``context.span_id`` column and the
+                ``eval.*`` columns that were logged
+        """
+        eval_columns = [
+            column for column in evals_df.columns if column.startswith("eval.")
+        ]
+        if not eval_columns or SPAN_ID_COLUMN not in evals_df.columns:
+            return
+        evaluations = evals_df.drop_duplicates(SPAN_ID_COLUMN, keep="last").set_index(
+            SPAN_ID_COLUMN
+        )[eval_columns]
+        with self._lock:
+            for key, held_df in self._spans.items():
+                if SPAN_ID_COLUMN not in held_df.columns:
+                    continue
+                evaluated = held_df[SPAN_ID_COLUMN].isin(evaluations.index)
+                if not evaluated.any():
+                    continue
+                held_df = held_df.copy()
+                span_ids = held_df.loc[evaluated, SPAN_ID_COLUMN]
+                for column in eval_columns:
+                    if column not in held_df.columns:
+                        held_df[column] = None
+                    held_df.loc[evaluated, column] = span_ids.map(evaluations[column])
+                self._spans[key] = held_df
+
+    def invalidate_spans(self, spans_df: pd.DataFrame) -> None:
+        """Forget the telemetry covering ``spans_df`` so it is exported again.
+
+        Use this when spans changed upstream in ways ``add_evaluations``
+        cannot mirror.
+
+        Args:
+            spans_df: Spans whose copies are stale
+        """
+        if spans_df.empty or TIME_COLUMN not in spans_df.columns:
+            return
+        span_times = pd.to_datetime(spans_df[TIME_COLUMN], utc=True)
+        start = span_times.min().to_pydatetime()
+        end = span_times.max().to_pydatetime() + timedelta(microseconds=1)
+        with self._lock:
+            for key, covered in self._coverage.items():
+                coverage: List[TimeRange] = []
+                for covered_start, covered_end in covered:
+                    if covered_start < start:
+                        coverage.append((covered_start, min(covered_end, start)))
+                    if covered_end > end:
+                        coverage.append((max(covered_start, end), covered_end))
+                self._coverage[key] = coverage
+            for key, held_df in self._spans.items():
+                held_times = pd.to_datetime(held_df[TIME_COLUMN], utc=True)
+                stale = (held_times >= start) & (held_times < end)
+                self._spans[key] = held_df[~stale.to_numpy()].reset_index(drop=True)
+
+    def clear(self) -> None:
+        """Forget all telemetry held in memory."""
+        with self._lock:
+            self._spans.clear()
+            self._coverage.clear()
@@ -0,0 +1,346 @@
+# src/self_improving_agents/runners/telemetry_store.py
+"""Local columnar store for telemetry exported from Arize.
+
+Spans are stored as Parquet files partitioned by model ID and (UTC) date under
+``.sia/telemetry/``, alongside a record of which time ranges have been fetched.
+Reads push the time predicate down to the partitions and row groups and only
+load the requested columns. Every write compacts the partitions it touches
+into a single file, in which re-exported spans replace their earlier copies.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ..utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+TIME_COLUMN = "start_time"
+SPAN_ID_COLUMN = "context.span_id"
+COVERAGE_FILE = "_coverage.json"
+LOCK_FILE = "_store.lock"
+
+TimeRange = Tuple[datetime, datetime]
+
+
+class TelemetryStore:
+    """Parquet store of telemetry spans, partitioned by model ID and date."""
+
+    def __init__(
+        self,
+        root_dir: str = ".sia/telemetry",
+        ingestion_lag: timedelta = timedelta(minutes=10),
+    ):
+        """Initialize the telemetry store.
+
+        Args:
+            root_dir: Directory holding the partitioned Parquet files
+            ingestion_lag: Ranges closer to now than this are never marked as
+                fetched, since Arize may still be ingesting spans for them
+        """
+        self.root_dir = root_dir
+        self.ingestion_lag = ingestion_lag
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _model_dir(self, model_id: str) -> str:
+        """Directory holding the partitions of ``model_id``."""
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_id)
+        return os.path.join(self.root_dir, f"model_id={safe_id}")
+
+    def _lock(self, model_id: str, shared: bool = False) -> FileLock:
+        """Lock on the partitions of ``model_id``, shared by readers."""
+        return FileLock(os.path.join(self._model_dir(model_id), LOCK_FILE), shared)
+
+    def _load_coverage(self, model_id: str) -> List[TimeRange]:
+        """Load the time ranges already fetched for ``model_id``."""
+        coverage_path = os.path.join(self._model_dir(model_id), COVERAGE_FILE)
+        if not os.path.exists(coverage_path):
+            return []
+        with open(coverage_path, "r") as f:
+            return [
+                (datetime.fromisoformat(start), datetime.fromisoformat(end))
+                for start, end in json.load(f)
+            ]
+
+    def _save_coverage(self, model_id: str, coverage: List[TimeRange]) -> None:
+        """Persist the time ranges fetched for ``model_id``."""
+        model_dir = self._model_dir(model_id)
+        os.makedirs(model_dir, exist_ok=True)
+        coverage_path = os.path.join(model_dir, COVERAGE_FILE)
+        tmp_path = f"{coverage_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                [[start.isoformat(), end.isoformat()] for start, end in coverage], f
+            )
+        os.replace(tmp_path, coverage_path)
+
+    def missing_ranges(
+        self, model_id: str, start: datetime, end: datetime
+    ) -> List[TimeRange]:
+        """Return the parts of ``[start, end)`` that have not been fetched yet.
+
+        Args:
+            model_id: Arize model ID
+            start: Start of the requested range
+            end: End of the requested range
+
+        Returns:
+            Sorted, non-overlapping UTC time ranges that must be back-filled
+        """
+        return missing_ranges(self._load_coverage(model_id), to_utc(start), to_utc(end))
+
+    def write(
+        self, model_id: str, spans_df: pd.DataFrame, start: datetime, end: datetime
+    ) -> None:
+        """Store the spans exported for ``[start, end)`` and mark it as fetched.
+
+        Args:
+            model_id: Arize model ID
+            spans_df: Spans exported from Arize for the range
+            start: Start of the exported range
+            end: End of the exported range
+        """
+        start, end = to_utc(start), to_utc(end)
+        with self._lock(model_id):
+            if not spans_df.empty:
+                spans_df = spans_df.assign(
+                    **{TIME_COLUMN: pd.to_datetime(spans_df[TIME_COLUMN], utc=True)}
+                )
+                dates = spans_df[TIME_COLUMN].dt.strftime("%Y-%m-%d")
+                try:
+                    for date, partition_df in spans_df.groupby(dates):
+                        self._write_partition(model_id, str(date), partition_df)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    logger.warning(
+                        f"Not caching telemetry that Parquet cannot hold: {e}"
+                    )
+                    return
+
+            # Only the settled part of the range is known to be complete
+            settled_end = min(end, datetime.now(timezone.utc) - self.ingestion_lag)
+            if settled_end > start:
+                coverage = self._load_coverage(model_id) + [(start, settled_end)]
+                self._save_coverage(model_id, merge_ranges(coverage))
+
+    def _write_partition(
+        self, model_id: str, date: str, partition_df: pd.DataFrame
+    ) -> None:
+        """Merge spans into the partition of ``date``, rewriting it as one file.
+
+        Spans already stored are replaced by their new copies, so ranges that
+        are exported again (such as unsettled ones) do not accumulate files.
+        The caller holds the lock of ``model_id``.
+        """
+        partition_dir = os.path.join(self._model_dir(model_id), f"date={date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        old_files = _part_files(partition_dir)
+        if old_files:
+            stored_df = pd.concat(
+                [pq.read_table(f).to_pandas() for f in old_files], ignore_index=True
+            )
+            partition_df = pd.concat([stored_df, partition_df], ignore_index=True)
+            if SPAN_ID_COLUMN in partition_df.columns:
+                partition_df = partition_df.drop_duplicates(SPAN_ID_COLUMN, keep="last")
+
+        table = pa.Table.from_pandas(partition_df, preserve_index=False)
+        path = os.path.join(partition_dir, _part_name())
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        for old_file in old_files:
+            os.remove(old_file)
+
+    def read(
+        self,
+        model_id: str,
+        start: datetime,
+        end: datetime,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Read the stored spans of ``[start, end]``.
+
+        Args:
+            model_id: Arize model ID
+            start: Start of the range
+            end: End of the range (inclusive)
+            columns: Columns to load; entries may be glob patterns such as
+                ``"eval.*"`` (defaults to all columns)
+
+        Returns:
+            DataFrame of the stored spans, sorted by start time
+        """
+        start, end = to_utc(start), to_utc(end)
+        model_dir = self._model_dir(model_id)
+        with self._lock(model_id, shared=True):
+            # Oldest files first, so the latest copy of a span is kept below
+            files = sorted(
+                (
+                    os.path.join(root, name)
+                    for root, _, names in os.walk(model_dir)
+                    for name in names
+                    if name.endswith(".parquet")
+                    and _partition_date(root) >= start.strftime("%Y-%m-%d")
+                    and _partition_date(root) <= end.strftime("%Y-%m-%d")
+                ),
+                key=os.path.basename,
+            )
+            if not files:
+                return pd.DataFrame()
+            spans_df = self._read_files(files, start, end, columns)
+
+        if SPAN_ID_COLUMN in spans_df.columns:
+            spans_df = spans_df.drop_duplicates(SPAN_ID_COLUMN, keep="last")
+        return spans_df.sort_values(TIME_COLUMN).reset_index(drop=True)
+
+    def _read_files(
+        self,
+        files: List[str],
+        start: datetime,
+        end: datetime,
+        columns: Optional[List[str]],
+    ) -> pd.DataFrame:
+        """Read the spans of ``[start, end]`` from Parquet files, in file order."""
+        time_filter = (
+            ds.field(TIME_COLUMN) >= pa.scalar(start, pa.timestamp("us", "UTC"))
+        ) & (ds.field(TIME_COLUMN) <= pa.scalar(end, pa.timestamp("us", "UTC")))
+        try:
+            schema = pa.unify_schemas(
+                [pq.read_schema(f) for f in files], promote_options="permissive"
+            )
+            projection = project_columns(schema.names, columns)
+            # to_table keeps the rows in the order of the files
+            table = ds.dataset(files, schema=schema, format="parquet").to_table(
+                columns=projection, filter=time_filter
+            )
+            return table.to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Nested columns whose types cannot be unified: read file by file
+            return pd.concat(
+                [
+                    pq.read_table(
+                        f,
+                        columns=project_columns(pq.read_schema(f).names, columns),
+                        filters=time_filter,
+                    ).to_pandas()
+                    for f in files
+                ],
+                ignore_index=True,
+            )
+
+    def invalidate(self, model_id: str, start: datetime, end: datetime) -> None:
+        """Drop the stored days overlapping ``[start, end)`` so they are re-fetched.
+
+        Use this when spans in the range changed upstream, e.g. after new
+        evaluations were logged for them.
+
+        Args:
+            model_id: Arize model ID
+            start: Start of the range
+            end: End of the range
+        """
+        start, end = to_utc(start), to_utc(end)
+        day_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(
+            days=1
+        )
+
+        model_dir = self._model_dir(model_id)
+        with self._lock(model_id):
+            day = day_start
+            while day < day_end:
+                partition_dir = os.path.join(model_dir, f"date={day:%Y-%m-%d}")
+                if os.path.isdir(partition_dir):
+                    for name in os.listdir(partition_dir):
+                        os.remove(os.path.join(partition_dir, name))
+                    os.rmdir(partition_dir)
+                day += timedelta(days=1)
+
+            coverage: List[TimeRange] = []
+            for covered_start, covered_end in self._load_coverage(model_id):
+                if covered_start < day_start:
+                    coverage.append((covered_start, min(covered_end, day_start)))
+                if covered_end > day_end:
+                    coverage.append((max(covered_start, day_end), covered_end))
+            self._save_coverage(model_id, coverage)
+
+
+def to_utc(value: datetime) -> datetime:
+    """Interpret naive datetimes as local time and convert to UTC."""
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc)
+
+
+def merge_ranges(ranges: List[TimeRange]) -> List[TimeRange]:
+    """Merge overlapping or touching time ranges."""
+    merged: List[TimeRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(
+    coverage: List[TimeRange], start: datetime, end: datetime
+) -> List[TimeRange]:
+    """Return the parts of ``[start, end)`` not covered by sorted ranges."""
+    cursor = start
+    missing: List[TimeRange] = []
+    for covered_start, covered_end in coverage:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _part_name() -> str:
+    """Name a new Parquet file so that names sort in order of writing."""
+    return f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _part_files(partition_dir: str) -> List[str]:
+    """List the Parquet files of a partition, oldest first."""
+    return [
+        os.path.join(partition_dir, name)
+        for name in sorted(os.listdir(partition_dir))
+        if name.endswith(".parquet")
+    ]
+
+
+def _partition_date(partition_dir: str) -> str:
+    """Extract the date of a ``date=YYYY-MM-DD`` partition directory."""
+    return os.path.basename(partition_dir).partition("date=")[2]
+
+
+def project_columns(
+    names: List[str], columns: Optional[List[str]]
+) -> Optional[List[str]]:
+    """Resolve column names and glob patterns against the available columns."""
+    if columns is None:
+        return None
+    projection = [
+        name
+        for name in names
+        if name == TIME_COLUMN
+        or any(fnmatch.fnmatchcase(name, pattern) for pattern in columns)
+    ]
+    return projection
@@ -2,4 +2,17 @@
 
 This module provides helper functions and classes that are used across
 other modules in the system.
+
+Classes:
+    FileLock: Advisory inter-process lock on a lock file.
+    RateLimiter: Shared token-bucket rate limiter with adaptive backoff.
+    ResponseCache: On-disk LRU cache of LLM responses keyed by request hash.
+    RunCatalog: SQLite index of run snapshots and checkpoints.
 """
+
+from .cache import ResponseCache
+from .file_lock import FileLock, atomic_write
+from .rate_limiter import RateLimiter
+from .run_catalog import RunCatalog
+
+__all__ = ["FileLock", "RateLimiter", "ResponseCache", "RunCatalog", "atomic_write"]
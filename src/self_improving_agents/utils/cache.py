@@ -0,0 +1,204 @@
+"""On-disk cache for LLM responses.
+
+This module provides a content-addressed cache for chat completion responses,
+keyed by a stable hash of the request parameters. Entries expire after a TTL
+and the cache is kept under a size bound by evicting the least recently used
+entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = ".sia/cache/responses.sqlite"
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses with a TTL, stored in SQLite."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 60 * 60,
+    ):
+        """Initialize the response cache.
+
+        Args:
+            path: Path of the SQLite database holding the cache
+            max_bytes: Maximum total size of the cached responses
+            ttl_seconds: Seconds after which an entry expires (None to never expire)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created_at "
+                "ON responses (created_at)"
+            )
+            # Running total of the entry sizes, kept up to date by triggers in
+            # the transaction of every write so that evicting need not sum them
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses_size (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    total INTEGER NOT NULL
+                )"""
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO responses_size "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+            for trigger, event, change in (
+                ("responses_insert", "INSERT", "NEW.size"),
+                ("responses_delete", "DELETE", "-OLD.size"),
+                ("responses_update", "UPDATE OF size", "NEW.size - OLD.size"),
+            ):
+                self._connection.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} "
+                    f"ON responses BEGIN UPDATE responses_size "
+                    f"SET total = total + {change}; END"
+                )
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """Compute the stable cache key of a request.
+
+        Args:
+            request: Request parameters (model, messages, ...)
+
+        Returns:
+            Hex digest of the canonical JSON encoding of the request
+        """
+        canonical = json.dumps(
+            request, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look up the cached response of a request.
+
+        Args:
+            request: Request parameters
+
+        Returns:
+            The cached response, or None on a miss or expired entry
+        """
+        key = self.make_key(request)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._is_expired(row[1], now):
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        value: Dict[str, Any] = json.loads(row[0])
+        return value
+
+    def set(self, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Store the response of a request, evicting old entries if needed.
+
+        Args:
+            request: Request parameters
+            response: JSON-serializable response to cache
+        """
+        key = self.make_key(request)
+        value = json.dumps(response, default=str)
+        now = time.time()
+        with self._lock, self._connection:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete
+            # would not fire the size trigger
+            self._connection.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "size = excluded.size, created_at = excluded.created_at, "
+                "accessed_at = excluded.accessed_at",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        """Check whether an entry created at ``created_at`` has expired."""
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _evict(self) -> None:
+        """Delete expired entries, then least recently used ones over the size bound.
+
+        Must be called with the lock held inside a transaction.
+        """
+        if self.ttl_seconds is not None:
+            self.evictions += self._connection.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+
+        (total_size,) = self._connection.execute(
+            "SELECT total FROM responses_size"
+        ).fetchone()
+        if total_size <= self.max_bytes:
+            return
+
+        stale_keys = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ):
+            if total_size <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total_size -= size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+        self.evictions += len(stale_keys)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and eviction counts plus the current entries and bytes."""
+        with self._lock:
+            (entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+            (total_size,) = self._connection.execute(
+                "SELECT total FROM responses_size"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_size,
+        }
+
+    def clear(self) -> None:
+        """Delete every cached entry."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
@@ -0,0 +1,105 @@
+"""Advisory file locks shared by processes working on the same ``.sia`` files.
+
+Locks are taken on a separate lock file next to the protected data, with
+``fcntl.flock`` on POSIX and ``msvcrt.locking`` on Windows (where shared locks
+are taken as exclusive). They only coordinate processes that use them, and are
+released when the lock file is closed, including when the process dies.
+"""
+
+import os
+import threading
+from types import TracebackType
+from typing import IO, Any, Optional, Type
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+
+class FileLock:
+    """Advisory inter-process lock on a lock file, usable as a context manager."""
+
+    def __init__(self, path: str, shared: bool = False):
+        """Initialize the file lock.
+
+        Args:
+            path: Path of the lock file (created if missing)
+            shared: Take a shared (read) lock instead of an exclusive one
+        """
+        self.path = path
+        self.shared = shared
+        self._file: Optional[IO[Any]] = None
+        # flock locks belong to the open file, so threads of one process
+        # are serialized separately
+        self._thread_lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the lock is held."""
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a+")
+            if fcntl is not None:
+                fcntl.flock(
+                    self._file.fileno(),
+                    fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX,
+                )
+            else:  # pragma: no cover - Windows
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            self._close()
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._close()
+            self._thread_lock.release()
+
+    def _close(self) -> None:
+        """Close the lock file, which also drops any lock still held on it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.release()
+
+
+def atomic_write(path: str, data: str) -> None:
+    """Write a text file atomically by renaming a complete temporary file.
+
+    Readers see either the previous or the new content, never a partial file.
+
+    Args:
+        path: Path of the file to write
+        data: Content to write
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,171 @@
+"""MinHash signatures for near-duplicate detection without embeddings.
+
+Texts are reduced to sets of word shingles and each set to a fixed-size
+MinHash signature, whose agreement rate estimates the Jaccard similarity of
+the sets. Locality-sensitive hashing over bands of the signatures finds
+candidate near-duplicates without comparing every pair.
+"""
+
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Mersenne prime larger than any 32-bit shingle hash
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+# Bound of the permutation coefficients, so that a * x + b fits in 64 bits
+MAX_COEFFICIENT = 1 << 31
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Split a text into its set of lowercase word shingles.
+
+    Args:
+        text: Text to split
+        size: Number of consecutive words per shingle
+
+    Returns:
+        Shingles of the text; texts shorter than ``size`` words give a single
+        shingle of all their words
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed set of hash permutations."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        """Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Number of consecutive words per shingle
+            seed: Seed of the permutations; signatures are only comparable
+                between hashers with the same seed and ``num_perm``
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, MAX_COEFFICIENT, num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, MAX_COEFFICIENT, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text.
+
+        Args:
+            text: Text to hash
+
+        Returns:
+            Array of ``num_perm`` unsigned integers
+        """
+        hashes = np.fromiter(
+            (
+                zlib.crc32(shingle.encode("utf-8"))
+                for shingle in shingles(text, self.shingle_size)
+            ),
+            dtype=np.uint64,
+        )
+        # (a * x + b) mod p, truncated to 32 bits
+        permuted = (
+            (hashes[:, np.newaxis] * self._a + self._b) % MERSENNE_PRIME
+        ) & MAX_HASH
+        signature: np.ndarray = permuted.min(axis=0)
+        return signature
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """Compute the signatures of many texts.
+
+        Args:
+            texts: Texts to hash
+
+        Returns:
+            Array of shape ``(len(texts), num_perm)``
+        """
+        rows = [self.signature(text) for text in texts]
+        if not rows:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+        return np.vstack(rows)
+
+
+def estimate_similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two texts from their signatures."""
+    return float(np.mean(signature == other))
+
+
+def band_keys(signature: np.ndarray, bands: int) -> List[bytes]:
+    """Split a signature into the LSH band keys used to find candidates.
+
+    Texts whose signatures share any band key are candidate near-duplicates;
+    more bands find pairs of lower similarity.
+
+    Args:
+        signature: MinHash signature
+        bands: Number of bands, which must divide the signature length
+
+    Returns:
+        One hashable key per band
+    """
+    if len(signature) % bands:
+        raise ValueError(f"Signature length must be divisible by bands ({bands})")
+    rows_per_band = len(signature) // bands
+    return [
+        signature[band * rows_per_band : (band + 1) * rows_per_band].tobytes()
+        for band in range(bands)
+    ]
+
+
+class NearDuplicateIndex:
+    """LSH index of signatures answering "is there a near-duplicate of this?"."""
+
+    def __init__(self, bands: int = 16, threshold: float = 0.8):
+        """Initialize the index.
+
+        Args:
+            bands: Number of LSH bands, which must divide the signature length
+            threshold: Estimated similarity at or above which two texts are
+                near-duplicates
+        """
+        self.bands = bands
+        self.threshold = threshold
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def find(self, signature: np.ndarray) -> Optional[int]:
+        """Return the key of the first indexed near-duplicate, if any.
+
+        Only indexed signatures sharing an LSH band with ``signature`` are
+        compared, so lookups stay fast as the index grows.
+
+        Args:
+            signature: MinHash signature to look up
+
+        Returns:
+            Key of the earliest added near-duplicate, or None
+        """
+        candidates = {
+            key
+            for band, band_key in enumerate(band_keys(signature, self.bands))
+            for key in self._buckets[band].get(band_key, [])
+        }
+        for key in sorted(candidates):
+            if estimate_similarity(signature, self._signatures[key]) >= self.threshold:
+                return key
+        return None
+
+    def add(self, key: int, signature: np.ndarray) -> None:
+        """Index a signature under ``key``.
+
+        Args:
+            key: Identifier returned by ``find`` for this signature
+            signature: MinHash signature
+        """
+        self._signatures[key] = signature
+        for band, band_key in enumerate(band_keys(signature, self.bands)):
+            self._buckets[band].setdefault(band_key, []).append(key)
@@ -0,0 +1,420 @@
+"""Shared rate limiting for OpenAI calls.
+
+This module provides a token-bucket rate limiter with requests-per-minute and
+tokens-per-minute budgets, plus jittered exponential backoff that honors the
+``Retry-After`` headers returned by the provider. A single limiter is meant to
+be shared by every component that talks to the same OpenAI account.
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+    TimeoutError,
+)
+CHARACTERS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Token bucket refilled continuously up to its per-minute capacity."""
+
+    def __init__(self, per_minute: float):
+        """Initialize the bucket.
+
+        Args:
+            per_minute: Capacity of the bucket and amount refilled per minute
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float, rate_scale: float = 1.0) -> None:
+        """Refill the bucket for the time elapsed since the last refill.
+
+        Args:
+            now: Current monotonic time
+            rate_scale: Multiplier applied to the refill rate
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.level = min(
+            self.capacity, self.level + elapsed * self.capacity / 60.0 * rate_scale
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float, rate_scale: float = 1.0) -> float:
+        """Seconds until ``amount`` can be taken from the bucket.
+
+        Args:
+            amount: Amount to take (clamped to the bucket capacity)
+            rate_scale: Multiplier applied to the refill rate
+
+        Returns:
+            Seconds to wait, 0 if the amount is available now
+        """
+        deficit = min(amount, self.capacity) - self.level
+        if deficit <= 0:
+            return 0.0
+        return deficit / (self.capacity / 60.0 * rate_scale)
+
+
+class RateLimiter:
+    """Token-bucket rate limiter with adaptive, jittered exponential backoff.
+
+    The limiter can be used from threads and from asyncio code. Calls are
+    routed through :meth:`call` / :meth:`acall` (or the :meth:`limit` /
+    :meth:`alimit` decorators), which wait for budget, retry transient
+    failures and reconcile the token estimate with the reported usage.
+
+    When the provider answers with a rate limit error, every caller sharing the
+    limiter pauses for the ``Retry-After`` period and the refill rate is halved,
+    recovering gradually as calls succeed again.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 6,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        min_rate_scale: float = 0.1,
+    ):
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_minute: Request budget per minute (None for unlimited)
+            tokens_per_minute: Token budget per minute (None for unlimited)
+            max_retries: Maximum number of retries for a single call
+            initial_backoff: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound in seconds for a single backoff delay
+            min_rate_scale: Lower bound for the adaptive refill rate multiplier
+        """
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.min_rate_scale = min_rate_scale
+        self.rate_scale = 1.0
+        self.blocked_until = 0.0
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "rate_limited": 0}
+        # Read and toggled by phoenix.evals when attached to one of its models
+        self._verbose = False
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Try to take budget for one request.
+
+        Args:
+            tokens: Estimated number of tokens for the request
+
+        Returns:
+            Seconds to wait before retrying, 0 if the budget was taken
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self.blocked_until - now
+            for bucket, amount in (
+                (self.request_bucket, 1),
+                (self.token_bucket, tokens),
+            ):
+                if bucket is not None:
+                    bucket.refill(now, self.rate_scale)
+                    wait = max(wait, bucket.wait_time(amount, self.rate_scale))
+            if wait > 0:
+                return wait
+
+            if self.request_bucket is not None:
+                self.request_bucket.level -= 1
+            if self.token_bucket is not None:
+                self.token_bucket.level -= min(tokens, self.token_bucket.capacity)
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until budget for one request is available.
+
+        Args:
+            tokens: Estimated number of tokens for the request
+        """
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Wait asynchronously until budget for one request is available.
+
+        Args:
+            tokens: Estimated number of tokens for the request
+        """
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Reconcile a token estimate with the usage reported by the provider.
+
+        Args:
+            estimated_tokens: Tokens reserved when the request was admitted
+            actual_tokens: Tokens the provider reports as used
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            self.rate_scale = min(1.0, self.rate_scale + 0.05)
+            if self.token_bucket is not None:
+                self.token_bucket.level -= actual_tokens - estimated_tokens
+
+    def _backoff(self, error: BaseException, attempt: int) -> float:
+        """Compute the delay before retrying a failed call.
+
+        Rate limit errors additionally pause every caller sharing this
+        limiter and halve the refill rate.
+
+        Args:
+            error: The error raised by the call
+            attempt: Zero-based index of the failed attempt
+
+        Returns:
+            Seconds to wait before the next attempt
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.initial_backoff * 2**attempt)
+        )
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.initial_backoff)
+
+        with self._lock:
+            self.stats["retries"] += 1
+            if isinstance(error, openai.RateLimitError):
+                self.stats["rate_limited"] += 1
+                self.rate_scale = max(self.min_rate_scale, self.rate_scale / 2)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def call(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        estimated_tokens: int = 0,
+        **kwargs: Any,
+    ) -> T:
+        """Call ``fn`` within the budget, retrying transient failures.
+
+        Args:
+            fn: Function performing the request
+            *args: Positional arguments for ``fn``
+            estimated_tokens: Estimated number of tokens for the request
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            Exception: The last error once ``max_retries`` is exhausted, or any
+                non-retryable error immediately
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                logger.warning(f"Retrying in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+                continue
+            self.record_usage(
+                estimated_tokens, get_total_tokens(result, estimated_tokens)
+            )
+            return result
+        raise RuntimeError("unreachable")
+
+    async def acall(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        estimated_tokens: int = 0,
+        **kwargs: Any,
+    ) -> T:
+        """Await ``fn`` within the budget, retrying transient failures.
+
+        Args:
+            fn: Coroutine function performing the request
+            *args: Positional arguments for ``fn``
+            estimated_tokens: Estimated number of tokens for the request
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            Exception: The last error once ``max_retries`` is exhausted, or any
+                non-retryable error immediately
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(estimated_tokens)
+            try:
+                result = await fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                logger.warning(f"Retrying in {delay:.1f}s after error: {e}")
+                await asyncio.sleep(delay)
+                continue
+            self.record_usage(
+                estimated_tokens, get_total_tokens(result, estimated_tokens)
+            )
+            return result
+        raise RuntimeError("unreachable")
+
+    def limit(self, fn: Callable[..., T]) -> Callable[..., T]:
+        """Decorate a function so that its calls go through :meth:`call`.
+
+        The tokens of each call are estimated from its ``messages`` (or
+        ``prompt``) and ``max_tokens`` keyword arguments.
+        """
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            return self.call(
+                fn, *args, estimated_tokens=estimate_call_tokens(kwargs), **kwargs
+            )
+
+        return wrapper
+
+    def alimit(self, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """Decorate a coroutine function so that its calls go through :meth:`acall`.
+
+        The tokens of each call are estimated as in :meth:`limit`.
+        """
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await self.acall(
+                fn, *args, estimated_tokens=estimate_call_tokens(kwargs), **kwargs
+            )
+
+        return wrapper
+
+    def attach_to_model(self, model: Any) -> Any:
+        """Route the completions of a phoenix.evals model through this limiter.
+
+        phoenix.evals models wrap every completion in ``self._rate_limiter.limit``
+        / ``alimit``, so replacing that attribute shares this budget with them.
+
+        Args:
+            model: A phoenix.evals model such as ``OpenAIModel``
+
+        Returns:
+            The same model, for chaining
+        """
+        if hasattr(model, "_rate_limiter"):
+            model._rate_limiter = self
+        else:
+            logger.warning(
+                f"{type(model).__name__} has no rate limiter hook, leaving it as is"
+            )
+        return model
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Extract the retry delay advertised by an API error.
+
+    Args:
+        error: Error raised by the OpenAI client
+
+    Returns:
+        Delay in seconds, or None if the response carries no usable header
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            # HTTP-date values are rare for this API; fall back to backoff
+            return None
+    return None
+
+
+def get_total_tokens(response: Any, default: int = 0) -> int:
+    """Return the total tokens reported on a completion response.
+
+    phoenix.evals models return a ``(text, ExtraInfo)`` tuple instead of the
+    response, so the usage is also looked up on the items of a tuple.
+
+    Args:
+        response: Completion response (or any object with ``usage``)
+        default: Value returned when no usage is reported
+
+    Returns:
+        Total tokens used by the request
+    """
+    candidates = response if isinstance(response, tuple) else (response,)
+    for candidate in candidates:
+        usage = getattr(candidate, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if isinstance(total_tokens, int):
+            return total_tokens
+    return default
+
+
+def estimate_request_tokens(messages: Any, max_tokens: Optional[int] = None) -> int:
+    """Roughly estimate the tokens a chat completion request will consume.
+
+    Args:
+        messages: Chat messages of the request
+        max_tokens: Maximum completion tokens requested
+
+    Returns:
+        Estimated prompt plus completion tokens
+    """
+    characters = sum(len(str(message.get("content") or "")) for message in messages)
+    return characters // CHARACTERS_PER_TOKEN + (max_tokens or 0)
+
+
+def estimate_call_tokens(kwargs: Dict[str, Any]) -> int:
+    """Estimate the tokens of a completion call from its keyword arguments.
+
+    Args:
+        kwargs: Keyword arguments of the call, as passed to the OpenAI client
+
+    Returns:
+        Estimated prompt plus completion tokens
+    """
+    messages = kwargs.get("messages") or [{"content": kwargs.get("prompt")}]
+    max_tokens = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens")
+    return estimate_request_tokens(
+        messages, max_tokens if isinstance(max_tokens, int) else None
+    )
@@ -0,0 +1,336 @@
+"""Indexed catalog of run snapshots and actions checkpoints.
+
+Finding the latest checkpoint or snapshot used to list and sort its whole
+directory. The catalog records every snapshot and checkpoint in SQLite when it
+is saved, along with its timings, token totals and evaluator score means, so
+such questions are answered by index lookups instead.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.run_record import RunRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = ".sia/catalog.sqlite"
+TOKEN_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+_RUN_COLUMNS = (
+    "run_id, kind, path, status, created_at, start_time, end_time, "
+    "duration_seconds, prompt_tokens, completion_tokens, total_tokens"
+)
+
+
+class RunCatalog:
+    """SQLite index of run snapshots and checkpoints with their aggregates."""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        """Initialize the run catalog.
+
+        Args:
+            path: Path of the SQLite database holding the catalog
+        """
+        self.path = path
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    status TEXT,
+                    created_at REAL NOT NULL,
+                    start_time REAL NOT NULL,
+                    end_time REAL,
+                    duration_seconds REAL,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    total_tokens INTEGER,
+                    PRIMARY KEY (kind, run_id)
+                )"""
+            )
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS run_scores (
+                    run_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    evaluator TEXT NOT NULL,
+                    mean REAL,
+                    PRIMARY KEY (kind, run_id, evaluator)
+                )"""
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS runs_kind_created_at "
+                "ON runs (kind, created_at)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS runs_start_time ON runs (start_time)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS run_scores_evaluator_mean "
+                "ON run_scores (evaluator, mean)"
+            )
+
+    def record_run(
+        self,
+        run_id: str,
+        kind: str,
+        path: str,
+        status: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        duration_seconds: Optional[float] = None,
+        usage: Optional[Dict[str, int]] = None,
+        scores: Optional[Dict[str, Optional[float]]] = None,
+    ) -> None:
+        """Record a saved run, or update the entry of a run saved before.
+
+        Fields left as None keep the value recorded earlier, so the snapshot
+        of a run's evaluations does not erase the token totals of its replay.
+
+        Args:
+            run_id: Run ID, or name of the checkpoint
+            kind: Kind of entry, e.g. "snapshot" or "checkpoint"
+            path: Path of the saved file
+            status: Status of the run
+            start_time: When the run started (defaults to the first save)
+            end_time: When the run ended
+            duration_seconds: Duration of the run in seconds
+            usage: Token counts keyed by prompt_tokens, completion_tokens and
+                total_tokens
+            scores: Mean score per evaluator name
+        """
+        now = time.time()
+        usage = usage or {}
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"""INSERT INTO runs ({_RUN_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, run_id) DO UPDATE SET
+                    path = excluded.path,
+                    status = COALESCE(excluded.status, status),
+                    created_at = excluded.created_at,
+                    start_time = CASE WHEN ? THEN excluded.start_time
+                        ELSE start_time END,
+                    end_time = COALESCE(excluded.end_time, end_time),
+                    duration_seconds = COALESCE(
+                        excluded.duration_seconds, duration_seconds
+                    ),
+                    prompt_tokens = COALESCE(excluded.prompt_tokens, prompt_tokens),
+                    completion_tokens = COALESCE(
+                        excluded.completion_tokens, completion_tokens
+                    ),
+                    total_tokens = COALESCE(excluded.total_tokens, total_tokens)""",
+                (
+                    run_id,
+                    kind,
+                    path,
+                    status,
+                    now,
+                    start_time.timestamp() if start_time else now,
+                    end_time.timestamp() if end_time else None,
+                    duration_seconds,
+                    *(usage.get(key) for key in TOKEN_KEYS),
+                    start_time is not None,
+                ),
+            )
+            if scores:
+                self._write_scores(run_id, kind, scores)
+
+    def record_scores(
+        self, run_id: str, scores: Dict[str, Optional[float]], kind: str = "snapshot"
+    ) -> None:
+        """Record the mean evaluator scores of a run.
+
+        Args:
+            run_id: Run ID
+            scores: Mean score per evaluator name (None if nothing was scored)
+            kind: Kind of the run's entry
+        """
+        with self._lock, self._connection:
+            self._write_scores(run_id, kind, scores)
+
+    def _write_scores(
+        self, run_id: str, kind: str, scores: Dict[str, Optional[float]]
+    ) -> None:
+        """Upsert score means; the caller holds the lock and a transaction."""
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO run_scores (run_id, kind, evaluator, mean) "
+            "VALUES (?, ?, ?, ?)",
+            [(run_id, kind, evaluator, mean) for evaluator, mean in scores.items()],
+        )
+
+    def get(self, run_id: str, kind: str = "snapshot") -> Optional[RunRecord]:
+        """Look up the entry of a run.
+
+        Args:
+            run_id: Run ID, or name of the checkpoint
+            kind: Kind of entry
+
+        Returns:
+            The entry, or None if the run is not in the catalog
+        """
+        return self._first(
+            f"SELECT {_RUN_COLUMNS} FROM runs WHERE kind = ? AND run_id = ?",
+            (kind, run_id),
+        )
+
+    def latest(self, kind: str) -> Optional[RunRecord]:
+        """Return the most recently saved entry of a kind.
+
+        Args:
+            kind: Kind of entry, e.g. "checkpoint"
+
+        Returns:
+            The latest entry, or None if the catalog has none of that kind
+        """
+        return self._first(
+            f"SELECT {_RUN_COLUMNS} FROM runs WHERE kind = ? "
+            "ORDER BY created_at DESC, run_id DESC LIMIT 1",
+            (kind,),
+        )
+
+    def latest_checkpoint(self) -> Optional[RunRecord]:
+        """Return the most recently saved actions checkpoint."""
+        return self.latest("checkpoint")
+
+    def runs_between(
+        self, start: datetime, end: datetime, kind: Optional[str] = None
+    ) -> List[RunRecord]:
+        """List the runs that started within a time window.
+
+        Checkpoints count as started when they were first saved.
+
+        Args:
+            start: Start of the window (inclusive)
+            end: End of the window (exclusive)
+            kind: Only list entries of this kind (defaults to all kinds)
+
+        Returns:
+            Entries in order of start time
+        """
+        query = (
+            f"SELECT {_RUN_COLUMNS} FROM runs WHERE start_time >= ? AND start_time < ?"
+        )
+        params: Tuple[Any, ...] = (start.timestamp(), end.timestamp())
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+        with self._lock:
+            rows = self._connection.execute(
+                query + " ORDER BY start_time", params
+            ).fetchall()
+            return [self._to_record(row) for row in rows]
+
+    def best_run(self, evaluator: str, kind: str = "snapshot") -> Optional[RunRecord]:
+        """Return the run with the highest mean score of an evaluator.
+
+        Args:
+            evaluator: Name of the evaluator
+            kind: Kind of entry
+
+        Returns:
+            The best scoring entry, or None if no run has a score for it
+        """
+        columns = ", ".join(f"runs.{column}" for column in _RUN_COLUMNS.split(", "))
+        return self._first(
+            f"""SELECT {columns} FROM run_scores
+            JOIN runs USING (kind, run_id)
+            WHERE run_scores.evaluator = ? AND run_scores.kind = ?
+                AND run_scores.mean IS NOT NULL
+            ORDER BY run_scores.mean DESC LIMIT 1""",
+            (evaluator, kind),
+        )
+
+    def index_directory(self, directory: str, kind: str, prefix: str = "") -> int:
+        """Record the files of a directory saved without a catalog.
+
+        Used once to backfill the catalog; the entries only carry the path
+        and the file's modification time.
+
+        Args:
+            directory: Directory holding the files
+            kind: Kind of the entries
+            prefix: Only index JSON files whose name starts with this prefix
+
+        Returns:
+            Number of files recorded
+        """
+        if not os.path.isdir(directory):
+            return 0
+        rows = []
+        for entry in os.scandir(directory):
+            if not (entry.name.startswith(prefix) and entry.name.endswith(".json")):
+                continue
+            modified = entry.stat().st_mtime
+            rows.append(
+                (entry.name[: -len(".json")], kind, entry.path, modified, modified)
+            )
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO runs "
+                "(run_id, kind, path, created_at, start_time) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.info(f"Indexed {len(rows)} {kind} files of {directory}")
+        return len(rows)
+
+    def remove(self, run_id: str, kind: str = "snapshot") -> None:
+        """Delete the entry of a run and its scores."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM runs WHERE kind = ? AND run_id = ?", (kind, run_id)
+            )
+            self._connection.execute(
+                "DELETE FROM run_scores WHERE kind = ? AND run_id = ?", (kind, run_id)
+            )
+
+    def _first(self, query: str, params: Tuple[Any, ...]) -> Optional[RunRecord]:
+        """Run a query on the runs table and return its first entry."""
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+            return None if row is None else self._to_record(row)
+
+    def _to_record(self, row: Tuple[Any, ...]) -> RunRecord:
+        """Build the entry of a runs row, with its scores; the caller holds the lock."""
+        (
+            run_id,
+            kind,
+            path,
+            status,
+            created_at,
+            start_time,
+            end_time,
+            duration_seconds,
+            prompt_tokens,
+            completion_tokens,
+            total_tokens,
+        ) = row
+        scores = dict(
+            self._connection.execute(
+                "SELECT evaluator, mean FROM run_scores WHERE kind = ? AND run_id = ?",
+                (kind, run_id),
+            ).fetchall()
+        )
+        return RunRecord(
+            run_id=run_id,
+            kind=kind,
+            path=path,
+            status=status,
+            created_at=datetime.fromtimestamp(created_at),
+            start_time=datetime.fromtimestamp(start_time),
+            end_time=None if end_time is None else datetime.fromtimestamp(end_time),
+            duration_seconds=duration_seconds,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            scores=scores,
+        )
@@ -0,0 +1,94 @@
+"""Token counting for prompt budgeting.
+
+This module counts tokens with the tokenizer of the target model when
+``tiktoken`` is installed, caching one tokenizer per model. Without it, counts
+fall back to a characters-per-token estimate, which is good enough to keep a
+prompt roughly within budget but not exact.
+"""
+
+import functools
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .rate_limiter import CHARACTERS_PER_TOKEN
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Encoding used for models tiktoken does not know (recent OpenAI models)
+DEFAULT_ENCODING = "o200k_base"
+# Tokens added by the chat format around every message, and to prime the reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """Return a function counting the tokens of a text for ``model``.
+
+    Counters are cached per model, so the tokenizer is loaded only once.
+
+    Args:
+        model: Name of the model, e.g. ``gpt-4o``
+
+    Returns:
+        Function mapping a text to its number of tokens
+    """
+    if tiktoken is None:
+        logger.info(
+            "tiktoken is not installed, estimating tokens from character counts"
+        )
+        return _estimate_tokens
+
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the tokens of a text for ``model``.
+
+    Args:
+        text: Text to count
+        model: Name of the model
+
+    Returns:
+        Number of tokens
+    """
+    return get_token_counter(model)(text)
+
+
+def count_message_tokens(
+    messages: List[Dict[str, Any]], model: str, max_tokens: Optional[int] = None
+) -> int:
+    """Count the tokens a chat completion request takes from the context window.
+
+    Args:
+        messages: Chat messages of the request
+        model: Name of the model
+        max_tokens: Maximum completion tokens reserved for the reply
+
+    Returns:
+        Prompt tokens, including the chat format overhead, plus ``max_tokens``
+    """
+    count = get_token_counter(model)
+    prompt_tokens = sum(
+        TOKENS_PER_MESSAGE + count(str(message.get("content") or ""))
+        for message in messages
+    )
+    return prompt_tokens + TOKENS_PER_REPLY + (max_tokens or 0)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text from its length."""
+    return -(-len(text) // CHARACTERS_PER_TOKEN)
@@ -0,0 +1,22 @@
+"""Shared test configuration."""
+import pytest
+
+# The environment and runners packages import each other; importing the
+# runners first lets the tests import any module of either package.
+import self_improving_agents.runners  # noqa: F401
+
+
+@pytest.fixture
+def environment(tmp_path, monkeypatch):
+    from self_improving_agents.environment.llm_environment import LLMEnvironment
+
+    monkeypatch.chdir(tmp_path)
+    for name in (
+        "OPENAI_API_KEY",
+        "ARIZE_API_KEY",
+        "ARIZE_DEVELOPER_KEY",
+        "ARIZE_SPACE_ID",
+        "ARIZE_MODEL_ID",
+    ):
+        monkeypatch.setenv(name, "test")
+    return LLMEnvironment()
@@ -0,0 +1,119 @@
+"""Tests the offline replay through the Batch API."""
+from typing import Any, Dict
+
+import pytest
+
+from self_improving_agents.environment.batch_replay import (
+    BatchReplayer,
+    LocalBatchClient,
+    echo_completion,
+)
+from self_improving_agents.models.state_action import Actions, Sample, StateActions
+from self_improving_agents.utils.cache import ResponseCache
+
+
+def request(content: str) -> Dict[str, Any]:
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": content}]}
+
+
+def test_submit_wait_results(tmp_path):
+    client = LocalBatchClient(polls_until_complete=2)
+    replayer = BatchReplayer(client, work_dir=str(tmp_path), poll_interval=0)
+
+    (batch_id,) = replayer.submit({"a": request("one"), "b": request("two")}, "run")
+    batch = replayer.wait(batch_id)
+    results = replayer.results(batch)
+
+    assert batch.status == "completed"
+    assert client.batches.polls[batch_id] == 2
+    assert {
+        custom_id: completion.choices[0].message.content
+        for custom_id, (completion, error) in results.items()
+    } == {"a": "one", "b": "two"}
+    assert replayer.load_manifest("run")["request_count"] == 2
+
+
+def test_failed_requests_are_reported_as_errors(tmp_path):
+    def respond(params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["messages"][-1]["content"] == "bad":
+            raise ValueError("refused")
+        return echo_completion(params)
+
+    replayer = BatchReplayer(
+        LocalBatchClient(respond), work_dir=str(tmp_path), poll_interval=0
+    )
+    (batch_id,) = replayer.submit({"a": request("ok"), "b": request("bad")}, "run")
+    results = replayer.results(replayer.wait(batch_id))
+
+    assert results["a"][1] is None
+    assert results["b"][0] is None
+    assert "refused" in results["b"][1]
+
+
+def test_wait_times_out(tmp_path):
+    replayer = BatchReplayer(
+        LocalBatchClient(polls_until_complete=100),
+        work_dir=str(tmp_path),
+        poll_interval=0,
+    )
+    (batch_id,) = replayer.submit({"a": request("one")}, "run")
+
+    with pytest.raises(TimeoutError):
+        replayer.wait(batch_id, timeout=0)
+
+
+def test_large_submissions_are_split(tmp_path):
+    client = LocalBatchClient()
+    replayer = BatchReplayer(
+        client, work_dir=str(tmp_path), poll_interval=0, max_batch_requests=2
+    )
+
+    batch_ids = replayer.submit(
+        {f"sample-{i}": request(str(i)) for i in range(5)}, "run"
+    )
+
+    assert len(batch_ids) == 3
+    manifest = replayer.load_manifest("run")
+    assert [batch["request_count"] for batch in manifest["batches"]] == [2, 2, 1]
+    results: Dict[str, Any] = {}
+    for batch_id in batch_ids:
+        results.update(replayer.results(replayer.wait(batch_id)))
+    assert sorted(results) == [f"sample-{i}" for i in range(5)]
+
+
+def test_empty_submission_creates_no_batch(tmp_path):
+    client = LocalBatchClient()
+    replayer = BatchReplayer(client, work_dir=str(tmp_path))
+
+    assert replayer.submit({}, "run") == []
+    assert client.batches.batches == {}
+    assert replayer.load_manifest("run")["batches"] == []
+
+
+def test_cached_batch_replay_is_not_submitted(environment, tmp_path):
+    client = LocalBatchClient()
+    environment.batch_replayer = BatchReplayer(
+        client, work_dir=str(tmp_path / "batches"), poll_interval=0
+    )
+    environment.response_cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    state_actions = StateActions(
+        samples=[
+            Sample(
+                chat_history=[{"role": "user", "content": content}],
+                output_generation="",
+                evals=[],
+            )
+            for content in ["one", "two"]
+        ],
+        actions=Actions(system_prompt="Be kind.", model="gpt-4o"),
+        eval_constants=[],
+    )
+
+    first = environment.emulate_llm_call(state_actions, run_id="first", batch=True)
+    second = environment.emulate_llm_call(state_actions, run_id="second", batch=True)
+
+    assert len(first["batch_ids"]) == 1
+    assert second["batch_ids"] == []
+    assert len(client.batches.batches) == 1
+    assert second["contents"] == first["contents"] == ["one", "two"]
+    assert second["cache_hits"] == 2
@@ -0,0 +1,76 @@
+"""Tests offloading large snapshot payloads to blobs."""
+import os
+
+import pandas as pd
+import pytest
+
+from self_improving_agents.environment.blob_store import BlobStore, is_blob_ref
+from self_improving_agents.environment.snapshot import EnvironmentSnapshot
+
+RESULTS = pd.DataFrame({"label": ["good", "bad", "good"], "score": [1.0, 0.0, 1.0]})
+
+
+def blob_files(blob_store: BlobStore) -> list:
+    return [
+        name
+        for _, _, names in os.walk(blob_store.root_dir)
+        for name in names
+        if not name.endswith(".tmp")
+    ]
+
+
+def save_snapshot(tmp_path, blob_store: BlobStore, run_id: str) -> EnvironmentSnapshot:
+    snapshot = EnvironmentSnapshot(
+        run_id=run_id, snapshot_dir=str(tmp_path / "snapshots"), blob_store=blob_store
+    )
+    snapshot.start({"model": "gpt-4o"})
+    snapshot.end(
+        {
+            "results": RESULTS,
+            "records": RESULTS.to_dict(orient="records"),
+            "head": RESULTS.head(2),
+        }
+    )
+    return snapshot
+
+
+def test_payloads_from_min_rows_round_trip_through_blobs(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"), min_rows=3)
+    snapshot = save_snapshot(tmp_path, blob_store, "run")
+
+    snapshot_data = snapshot.load(os.path.join(snapshot.snapshot_dir, "run.json"))
+
+    metadata = snapshot_data.metadata
+    assert is_blob_ref(metadata["results"]) and metadata["results"]["rows"] == 3
+    assert is_blob_ref(metadata["records"]) and metadata["records"]["format"] == "jsonl"
+    # Below min_rows, data frames are stored inline as records
+    assert metadata["head"] == RESULTS.head(2).to_dict(orient="records")
+    assert metadata["model"] == "gpt-4o"
+    for key in ("results", "records"):
+        rows = snapshot.load_payload(snapshot_data, key)
+        assert rows == RESULTS.to_dict(orient="records")
+
+
+def test_identical_payloads_are_stored_once(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"), min_rows=3)
+
+    first = save_snapshot(tmp_path, blob_store, "first")
+    second = save_snapshot(tmp_path, blob_store, "second")
+
+    assert first.metadata["results"] == second.metadata["results"]
+    # One Parquet blob for the data frame and one JSONL blob for the records
+    assert sorted(name.split(".", 1)[1] for name in blob_files(blob_store)) == [
+        "jsonl.zst",
+        "parquet",
+    ]
+
+
+def test_offloaded_payloads_need_a_blob_store(tmp_path):
+    snapshot = save_snapshot(tmp_path, BlobStore(str(tmp_path / "blobs"), 3), "run")
+    reader = EnvironmentSnapshot(snapshot_dir=snapshot.snapshot_dir)
+
+    snapshot_data = reader.load(os.path.join(snapshot.snapshot_dir, "run.json"))
+
+    assert reader.load_payload(snapshot_data, "model") == "gpt-4o"
+    with pytest.raises(ValueError):
+        reader.load_payload(snapshot_data, "results")
@@ -0,0 +1,142 @@
+"""Tests the racing of candidate policies."""
+import math
+import threading
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+
+from self_improving_agents.models.state_action import Actions, Sample, StateActions
+from self_improving_agents.runners.candidate_racing import CandidateRacer
+
+
+class FakeEnvironment:
+    """Environment scoring the samples of a candidate from its prompt.
+
+    The score of sample ``i`` is ``scores[prompt][i % len(scores[prompt])]``,
+    and replaying a prompt without scores fails.
+    """
+
+    def __init__(self, scores: Dict[str, List[float]]):
+        self.scores = scores
+        self.run_ids: List[str] = []
+        self.lock = threading.Lock()
+
+    def emulate_llm_call(self, state_actions: StateActions, **kwargs: Any) -> Dict:
+        with self.lock:
+            self.run_ids.append(kwargs["run_id"])
+        prompt = state_actions.actions.system_prompt
+        if prompt not in self.scores:
+            raise RuntimeError(f"replay of '{prompt}' failed")
+        return {"prompt": prompt}
+
+    def evaluate_replay(
+        self, state_actions: StateActions, replay_result: Dict, *args: Any
+    ) -> pd.DataFrame:
+        pattern = self.scores[replay_result["prompt"]]
+        indices = [
+            int(sample.chat_history[0]["content"][1:])
+            for sample in state_actions.samples
+        ]
+        return pd.DataFrame({"score": [pattern[i % len(pattern)] for i in indices]})
+
+
+def make_state_actions(n_samples: int) -> StateActions:
+    samples = [
+        Sample(
+            chat_history=[{"role": "user", "content": f"q{i}"}],
+            output_generation="a",
+            evals=[],
+        )
+        for i in range(n_samples)
+    ]
+    return StateActions(
+        samples=samples,
+        actions=Actions(system_prompt="base", model="m"),
+        eval_constants=[],
+    )
+
+
+def make_racer(environment: FakeEnvironment, **kwargs: Any) -> CandidateRacer:
+    return CandidateRacer(
+        environment=environment,  # type: ignore[arg-type]
+        evaluator=lambda: None,
+        evaluator_names=["quality"],
+        model=None,  # type: ignore[arg-type]
+        **kwargs,
+    )
+
+
+def candidates(prompts: str) -> List[Actions]:
+    return [Actions(system_prompt=prompt, model="m") for prompt in prompts]
+
+
+def test_race_replays_every_candidate_round_under_its_own_run_id():
+    environment = FakeEnvironment({"a": [0.2], "b": [0.9], "c": [0.5], "d": [0.4]})
+    racer = make_racer(environment, initial_budget=2, keep_fraction=0.5)
+
+    result = racer.race(make_state_actions(16), candidates("abcd"), race_id="race")
+
+    assert result.best.system_prompt == "b"
+    assert len(environment.run_ids) == len(set(environment.run_ids))
+    assert "race-r1-c0" in environment.run_ids
+    assert all(run_id.startswith("race-r") for run_id in environment.run_ids)
+
+
+def test_successive_halving_keeps_the_best_fraction_on_growing_budgets():
+    # Noisy scores, so that no candidate is dropped on confidence bounds
+    environment = FakeEnvironment(
+        {p: [mean - 0.4, mean + 0.4] for p, mean in zip("abcd", [0.4, 0.5, 0.7, 0.6])}
+    )
+    racer = make_racer(environment, initial_budget=2, growth=2.0, keep_fraction=0.5)
+
+    result = racer.race(make_state_actions(16), candidates("abcd"))
+
+    assert result.best.system_prompt == "c"
+    assert result.best_score == pytest.approx(0.7)
+    assert result.rounds == 2
+    # Four candidates on samples 0-2, then the best two on samples 2-4
+    assert result.replays == 4 * 2 + 2 * 2
+    assert result.replays < result.full_replays == 64
+    standings = {
+        standing.actions.system_prompt: standing for standing in result.standings
+    }
+    assert [standings[p].eliminated_round for p in "abcd"] == [1, 1, None, 2]
+    assert [standings[p].samples for p in "abcd"] == [2, 2, 4, 4]
+
+
+def test_candidates_confidently_worse_are_dropped_whatever_their_rank():
+    environment = FakeEnvironment({"a": [0.8, 0.9], "b": [0.1, 0.2], "c": [0.75, 0.85]})
+    racer = make_racer(environment, initial_budget=2, keep_fraction=1.0)
+
+    result = racer.race(make_state_actions(16), candidates("abc"))
+
+    standings = {
+        standing.actions.system_prompt: standing for standing in result.standings
+    }
+    assert standings["b"].eliminated_round == 1
+    assert standings["c"].eliminated_round is None
+    assert result.best.system_prompt == "a"
+    assert result.rounds == 4
+    assert result.replays == 3 * 2 + 2 * (2 + 4 + 8) < result.full_replays
+    # Unbiased standard error of 16 scores alternating 0.8 and 0.9
+    half_width = racer.z * math.sqrt(0.0025 / 15)
+    assert standings["a"].count == 16
+    assert standings["a"].mean == pytest.approx(0.85)
+    assert standings["a"].lower == pytest.approx(0.85 - half_width)
+    assert standings["a"].upper == pytest.approx(0.85 + half_width)
+
+
+def test_a_failing_candidate_is_dropped_with_its_error():
+    environment = FakeEnvironment({"a": [0.3], "c": [0.6]})
+    racer = make_racer(environment, initial_budget=2, keep_fraction=1.0)
+
+    result = racer.race(make_state_actions(4), candidates("abc"))
+
+    standings = {
+        standing.actions.system_prompt: standing for standing in result.standings
+    }
+    assert standings["b"].error == "replay of 'b' failed"
+    assert standings["b"].eliminated_round == 1
+    assert standings["b"].mean is None
+    assert result.best.system_prompt == "c"
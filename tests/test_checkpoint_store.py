@@ -0,0 +1,59 @@
+"""Tests the content-addressed checkpoint store."""
+import pytest
+
+from self_improving_agents.models.state_action import Actions
+from self_improving_agents.policy.checkpoint_store import CheckpointStore
+
+
+def actions(prompt: str) -> Actions:
+    return Actions(system_prompt=prompt, model="gpt-4o")
+
+
+def test_head_and_lineage(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.head() is None
+
+    first = store.save(actions("first"))
+    second = store.save(actions("second"))
+    third = store.save(actions("third"))
+
+    assert store.head() == third.checkpoint_id
+    assert store.load() == actions("third")
+    assert [record.checkpoint_id for record in store.lineage()] == [
+        third.checkpoint_id,
+        second.checkpoint_id,
+        first.checkpoint_id,
+    ]
+    assert first.parent is None
+
+
+def test_saving_a_stored_policy_moves_the_head_only(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    first = store.save(actions("first"))
+    store.save(actions("second"))
+
+    again = store.save(actions("first"))
+
+    assert again == first
+    assert store.head() == first.checkpoint_id
+    assert [record.checkpoint_id for record in store.lineage()] == [first.checkpoint_id]
+
+
+def test_save_without_moving_the_head(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    first = store.save(actions("first"))
+
+    candidate = store.save(actions("candidate"), move_head=False)
+
+    assert store.head() == first.checkpoint_id
+    assert candidate.parent == first.checkpoint_id
+    assert store.load(candidate.checkpoint_id) == actions("candidate")
+
+
+def test_loading_an_unknown_checkpoint_fails(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        store.load()
+    with pytest.raises(FileNotFoundError):
+        store.load("0" * 64)
@@ -0,0 +1,115 @@
+"""Tests the collection of state-action pairs in bounded batches."""
+import json
+from datetime import datetime
+from typing import Any, Iterator, List
+
+import pandas as pd
+import pytest
+
+from self_improving_agents.evaluator_handler.evaluator_saver import EvaluatorSaver
+from self_improving_agents.runners.data_collection_runner import (
+    DataCollectionRunner,
+)
+
+START = datetime(2026, 1, 1)
+END = datetime(2026, 1, 2)
+
+
+def spans(outputs: List[str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "attributes.input.value": [
+                json.dumps({"messages": [{"role": "user", "content": "hi"}]})
+            ]
+            * len(outputs),
+            "attributes.llm.input_messages": [
+                [{"message.role": "system", "message.content": "Be kind."}]
+            ]
+            * len(outputs),
+            "attributes.llm.output_messages": [
+                [{"message.content": output}] for output in outputs
+            ],
+            "attributes.llm.model_name": ["gpt-4o"] * len(outputs),
+        }
+    )
+
+
+class FakeConnector:
+    """Connector exporting fixed chunks and counting the exports."""
+
+    def __init__(self, chunks: List[List[str]]) -> None:
+        self.chunks = chunks
+        self.exported = 0
+
+    def iter_telemetry_chunks(self, **kwargs: Any) -> Iterator[pd.DataFrame]:
+        for outputs in self.chunks:
+            self.exported += 1
+            yield spans(outputs)
+
+
+@pytest.fixture
+def connector() -> FakeConnector:
+    return FakeConnector([["a", "b", "c"], [], ["d", "e", "f", "g"]])
+
+
+@pytest.fixture
+def runner(connector, tmp_path) -> DataCollectionRunner:
+    return DataCollectionRunner(
+        EvaluatorSaver(str(tmp_path / "evaluators")),
+        arize_connector=connector,  # type: ignore[arg-type]
+    )
+
+
+def collect(runner: DataCollectionRunner, **kwargs: Any) -> List[List[str]]:
+    return [
+        [sample.output_generation for sample in state_actions.samples]
+        for state_actions in runner.collect_data_batches(
+            start_date=START, end_date=END, **kwargs
+        )
+    ]
+
+
+def test_batches_do_not_span_chunk_boundaries(runner):
+    batches = collect(runner, batch_size=2)
+
+    assert batches == [["a", "b"], ["c"], ["d", "e"], ["f", "g"]]
+
+
+def test_limit_is_applied_across_chunks(runner, connector):
+    batches = collect(runner, batch_size=2, limit=4)
+
+    assert batches == [["a", "b"], ["c"], ["d"]]
+    assert connector.exported == 3
+
+
+def test_limit_at_a_chunk_boundary_stops_exporting(runner, connector):
+    batches = collect(runner, batch_size=5, limit=3)
+
+    assert batches == [["a", "b", "c"]]
+    assert connector.exported == 1
+
+
+def test_zero_limit_yields_nothing(runner, connector):
+    assert collect(runner, limit=0) == []
+    assert connector.exported == 0
+
+
+def test_iter_samples_flattens_the_batches(runner):
+    samples = runner.iter_samples(start_date=START, end_date=END, batch_size=2, limit=5)
+
+    assert [sample.output_generation for sample in samples] == list("abcde")
+
+
+def test_batch_size_must_be_positive(runner):
+    with pytest.raises(ValueError):
+        collect(runner, batch_size=0)
+
+
+def test_actions_are_shared_by_every_batch(runner):
+    batches = list(
+        runner.collect_data_batches(start_date=START, end_date=END, batch_size=2)
+    )
+
+    assert {state_actions.actions.system_prompt for state_actions in batches} == {
+        "Be kind."
+    }
@@ -0,0 +1,63 @@
+"""Tests the column-backed container of samples."""
+import numpy as np
+
+from self_improving_agents.models.state_action import (
+    ColumnarSamples,
+    EvalMetrics,
+    Sample,
+)
+
+
+def make_samples() -> list:
+    return [
+        Sample(
+            chat_history=[{"role": "user", "content": f"question {i}"}],
+            output_generation=f"answer {i}",
+            evals=[
+                EvalMetrics(
+                    name="quality",
+                    eval_score=None if i == 2 else float(i),
+                    eval_label="good" if i % 2 else "bad",
+                    eval_reasoning=f"because {i}",
+                )
+            ],
+            weight=i + 1,
+        )
+        for i in range(5)
+    ]
+
+
+def test_round_trip_through_columns():
+    samples = make_samples()
+
+    columnar = ColumnarSamples.from_samples(samples)
+
+    assert len(columnar) == 5
+    assert columnar.to_samples() == samples
+    assert columnar[3] == samples[3]
+
+
+def test_slices_and_take_are_views_in_order():
+    samples = make_samples()
+    columnar = ColumnarSamples.from_samples(samples)
+
+    view = columnar[1:4]
+    taken = view.take([2, 0], weights=[7, 9])
+
+    assert view.to_samples() == samples[1:4]
+    assert [sample.output_generation for sample in taken] == ["answer 3", "answer 1"]
+    assert taken.weights().tolist() == [7, 9]
+    assert taken.labels("quality") == ["good", "good"]
+    assert np.array_equal(taken.scores("quality"), [3.0, 1.0])
+    # Views share the parent's columns and leave its weights unchanged
+    assert taken._chat_histories is columnar._chat_histories
+    assert columnar.weights().tolist() == [1, 2, 3, 4, 5]
+
+
+def test_missing_scores_stay_missing():
+    columnar = ColumnarSamples.from_samples(make_samples())
+
+    assert np.isnan(columnar.scores("quality")[2])
+    assert columnar[2].evals[0].eval_score is None
+    assert columnar.label_categories("quality") == ["bad", "good"]
+    assert columnar.label_codes("quality").tolist() == [0, 1, 0, 1, 0]
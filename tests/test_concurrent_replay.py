@@ -0,0 +1,122 @@
+"""Tests the concurrent replay of samples."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from self_improving_agents.environment.batch_replay import echo_completion
+from self_improving_agents.models.state_action import Actions, Sample, StateActions
+from self_improving_agents.utils.rate_limiter import RateLimiter
+
+
+class FakeAsyncClient:
+    """Async client answering with the last message after a per-sample delay.
+
+    Like the OpenAI client, it may only be used on the event loop it was
+    first used on.
+    """
+
+    def __init__(self, delays: Dict[str, float]) -> None:
+        self.delays = delays
+        self.loop: Any = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+        self.chat = self
+        self.completions = self
+
+    async def __aenter__(self) -> "FakeAsyncClient":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.closed = True
+
+    async def create(self, **params: Any) -> ChatCompletion:
+        loop = asyncio.get_running_loop()
+        if self.closed or self.loop not in (None, loop):
+            raise RuntimeError("Connection error.")
+        self.loop = loop
+        content = params["messages"][-1]["content"]
+        if content == "fail":
+            raise ValueError("bad request")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(content, 0.01))
+        finally:
+            self.in_flight -= 1
+        return ChatCompletion.model_validate(echo_completion(params))
+
+
+@pytest.fixture
+def clients(environment, monkeypatch) -> List[FakeAsyncClient]:
+    clients: List[FakeAsyncClient] = []
+
+    def create_async_client() -> FakeAsyncClient:
+        clients.append(FakeAsyncClient({"slow": 0.2, "hang": 10.0}))
+        return clients[-1]
+
+    monkeypatch.setattr(environment, "_create_async_client", create_async_client)
+    environment.rate_limiter = RateLimiter(max_retries=0)
+    return clients
+
+
+def state_actions(contents: List[str]) -> StateActions:
+    return StateActions(
+        samples=[
+            Sample(
+                chat_history=[{"role": "user", "content": content}],
+                output_generation="",
+                evals=[],
+            )
+            for content in contents
+        ],
+        actions=Actions(system_prompt="Be kind.", model="gpt-4o"),
+        eval_constants=[],
+    )
+
+
+def test_results_are_in_sample_order_within_the_cap(environment, clients):
+    contents = ["slow"] + [str(i) for i in range(9)]
+
+    result = environment.emulate_llm_call(
+        state_actions(contents), max_concurrency=3, trace=False
+    )
+
+    assert result["contents"] == contents
+    assert clients[0].max_in_flight == 3
+
+
+def test_failures_are_isolated_to_their_sample(environment, clients):
+    result = environment.emulate_llm_call(
+        state_actions(["a", "fail", "hang", "b"]),
+        max_concurrency=4,
+        request_timeout=0.1,
+        trace=False,
+    )
+
+    assert result["contents"] == ["a", None, None, "b"]
+    assert result["errors"] == 2
+
+
+def test_each_call_and_thread_uses_its_own_client(environment, clients):
+    samples = state_actions(["a", "b", "c"])
+
+    for _ in range(2):
+        result = environment.emulate_llm_call(samples, max_concurrency=2, trace=False)
+        assert result["contents"] == ["a", "b", "c"]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(
+            pool.map(
+                lambda _: environment.emulate_llm_call(
+                    samples, max_concurrency=2, trace=False
+                ),
+                range(3),
+            )
+        )
+
+    assert [result["contents"] for result in results] == [["a", "b", "c"]] * 3
+    assert len(clients) == 5
+    assert all(client.closed for client in clients)
@@ -0,0 +1,53 @@
+"""Tests the deduplication of collected samples."""
+from self_improving_agents.models.state_action import ColumnarSamples, Sample
+from self_improving_agents.runners.deduplication import deduplicate_samples
+
+TEXT = (
+    "Could you please summarize the quarterly revenue report for the board "
+    "meeting and highlight the three largest changes compared to last year"
+)
+
+
+def sample(content: str, weight: int = 1) -> Sample:
+    return Sample(
+        chat_history=[{"role": "user", "content": content}],
+        output_generation="",
+        evals=[],
+        weight=weight,
+    )
+
+
+def test_exact_duplicates_add_up_their_weights():
+    samples = [sample("a"), sample("b", weight=2), sample("a", weight=3)]
+
+    deduplicated = deduplicate_samples(samples, threshold=1.0)
+
+    assert [(s.chat_history[0]["content"], s.weight) for s in deduplicated] == [
+        ("a", 4),
+        ("b", 2),
+    ]
+
+
+def test_near_duplicates_are_collapsed():
+    samples = [
+        sample(TEXT),
+        sample("What is the weather like in Paris tomorrow afternoon?"),
+        sample(TEXT + " please"),
+    ]
+
+    deduplicated = deduplicate_samples(samples, threshold=0.7)
+
+    assert [s.weight for s in deduplicated] == [2, 1]
+    assert deduplicated[0] == samples[0].model_copy(update={"weight": 2})
+    assert sum(s.weight for s in deduplicated) == len(samples)
+
+
+def test_columnar_samples_are_deduplicated_into_a_view():
+    samples = ColumnarSamples.from_samples(
+        [sample("a"), sample("b"), sample("a"), sample("a")]
+    )
+
+    deduplicated = deduplicate_samples(samples, threshold=1.0)
+
+    assert isinstance(deduplicated, ColumnarSamples)
+    assert deduplicated.weights().tolist() == [3, 1]
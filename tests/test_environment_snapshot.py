@@ -0,0 +1,54 @@
+"""Tests the environment snapshots and their event logs."""
+import os
+import threading
+
+from self_improving_agents.environment.snapshot import (
+    EnvironmentSnapshot,
+    compact_event_log,
+)
+
+
+def test_default_run_ids_are_unique(tmp_path):
+    run_ids = {
+        EnvironmentSnapshot(snapshot_dir=str(tmp_path)).run_id for _ in range(100)
+    }
+    assert len(run_ids) == 100
+
+
+def test_concurrent_event_log_runs_do_not_interfere(tmp_path):
+    errors = []
+
+    def run() -> None:
+        try:
+            snapshot = EnvironmentSnapshot(snapshot_dir=str(tmp_path), event_log=True)
+            snapshot.start({"model": "m"})
+            for index in range(50):
+                snapshot.progress({"sample_index": index})
+            snapshot.end({"done": True})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(f.endswith(".json") for f in os.listdir(tmp_path)) == [True] * 8
+
+
+def test_compacting_an_already_compacted_log_returns_its_snapshot(tmp_path):
+    snapshot = EnvironmentSnapshot(
+        run_id="run", snapshot_dir=str(tmp_path), event_log=True
+    )
+    snapshot.start({"model": "m"})
+    snapshot.progress({"sample_index": 0})
+    snapshot.flush()
+
+    first = compact_event_log(snapshot.event_log_path)
+    second = compact_event_log(snapshot.event_log_path)
+
+    assert first == second
+    assert first.status == "running"
+    assert first.metadata["progress"] == [{"sample_index": 0}]
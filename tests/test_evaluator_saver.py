@@ -0,0 +1,48 @@
+"""Tests the evaluator saver shared between processes."""
+import multiprocessing
+
+from self_improving_agents.evaluator_handler.evaluator_saver import EvaluatorSaver
+
+
+def save_in_process(save_dir: str, index: int) -> None:
+    # Even workers save the evaluation kwargs, odd ones the telemetry kwargs
+    kwargs = {"worker": index}
+    EvaluatorSaver(save_dir).save_evaluator(
+        "quality",
+        eval_kwargs=None if index % 2 else kwargs,
+        get_telemetry_kwargs=kwargs if index % 2 else None,
+    )
+
+
+def run_processes(save_dir: str, indices: range) -> None:
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=save_in_process, args=(save_dir, index))
+        for index in indices
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+
+def test_saves_of_another_process_are_merged_and_reloaded(tmp_path):
+    saver = EvaluatorSaver(str(tmp_path))
+    saver.save_evaluator("quality", get_telemetry_kwargs={"model_id": "m"})
+    assert saver.load_evaluator("quality").eval_kwargs == {}
+
+    run_processes(str(tmp_path), range(0, 1))
+
+    # The cached evaluator is re-read and kept this process's kwargs
+    evaluator = saver.load_evaluator("quality")
+    assert evaluator.eval_kwargs == {"worker": 0}
+    assert evaluator.get_telemetry_kwargs == {"model_id": "m"}
+
+
+def test_concurrent_saves_keep_every_kind_of_kwargs(tmp_path):
+    run_processes(str(tmp_path), range(6))
+
+    evaluator = EvaluatorSaver(str(tmp_path)).load_evaluator("quality")
+    assert evaluator.eval_kwargs["worker"] in (0, 2, 4)
+    assert evaluator.get_telemetry_kwargs["worker"] in (1, 3, 5)
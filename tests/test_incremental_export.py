@@ -0,0 +1,97 @@
+"""Tests the incremental export of telemetry."""
+from datetime import datetime, timezone
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from self_improving_agents.evaluator_handler.eval_pipeline import EvalPipeline
+from self_improving_agents.evaluator_handler.evaluator_saver import EvaluatorSaver
+from self_improving_agents.models.telemetry import TelemetryCursor
+from self_improving_agents.runners.arize_connector import ArizeConnector
+
+T1 = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+T2 = datetime(2026, 1, 1, 11, tzinfo=timezone.utc)
+
+
+class FakeExportClient:
+    """Export client returning spans newer than the requested start time."""
+
+    def __init__(self) -> None:
+        self.spans_df = pd.DataFrame(
+            {
+                "context.span_id": ["a", "b", "c", "d"],
+                "start_time": [T1, T1, T1, T2],
+            }
+        )
+
+    def export_model_to_df(self, start_time: datetime, **kwargs: Any) -> pd.DataFrame:
+        since = pd.Timestamp(start_time)
+        if since.tzinfo is None:
+            since = since.tz_localize("UTC")
+        return self.spans_df[self.spans_df["start_time"] >= since]
+
+
+@pytest.fixture
+def connector(tmp_path) -> ArizeConnector:
+    connector = ArizeConnector(
+        developer_key="key",
+        space_id="space",
+        model_id="model",
+        cursor_dir=str(tmp_path / "cursors"),
+    )
+    connector.client = FakeExportClient()  # type: ignore[assignment]
+    return connector
+
+
+def test_cursor_does_not_skip_spans_sharing_the_boundary(connector):
+    batches = [
+        connector.export_incremental(
+            "model", limit=2, start_time=datetime(2026, 1, 1), end_time=T2
+        )["context.span_id"].tolist()
+        for _ in range(3)
+    ]
+
+    assert batches == [["a", "b"], ["c", "d"], []]
+    cursor = connector.load_cursor("model")
+    assert cursor.last_timestamp == T2
+    assert cursor.last_span_ids == ["d"]
+
+
+def test_new_cursor_is_empty(tmp_path):
+    cursor = TelemetryCursor(key="model")
+
+    assert cursor.last_timestamp is None
+    assert cursor.last_span_ids == []
+    assert cursor.updated_at is None
+
+
+def test_cursor_is_saved_only_after_the_evaluator_succeeds(connector, tmp_path):
+    pipeline = EvalPipeline(EvaluatorSaver(str(tmp_path / "evaluators")), connector)
+    evaluated = []
+
+    def evaluator(dataframe: pd.DataFrame, fail: bool) -> pd.DataFrame:
+        if fail:
+            raise RuntimeError("evaluator failed")
+        evaluated.append(dataframe["context.span_id"].tolist())
+        return pd.DataFrame({"score": [1.0] * len(dataframe)})
+
+    def run(fail: bool) -> pd.DataFrame:
+        return pipeline.run_pipeline(
+            evaluator=evaluator,
+            evaluator_name="judge",
+            evaluator_kwargs={"fail": fail},
+            get_telemetry_kwargs={"model_id": "model"},
+            start_date=datetime(2026, 1, 1),
+            end_date=T2,
+            incremental=True,
+        )
+
+    with pytest.raises(RuntimeError):
+        run(fail=True)
+    assert connector.load_cursor("model.judge").last_timestamp is None
+
+    run(fail=False)
+    assert run(fail=False).empty
+    assert evaluated == [["a", "b", "c", "d"]]
+    assert connector.load_cursor("model.judge").last_span_ids == ["d"]
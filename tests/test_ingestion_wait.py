@@ -0,0 +1,115 @@
+"""Tests waiting for replayed spans to be ingested."""
+from datetime import datetime
+from typing import Any, List
+
+import pandas as pd
+import pytest
+
+from self_improving_agents.models.state_action import Actions, StateActions
+from self_improving_agents.runners import arize_connector
+from self_improving_agents.runners.arize_connector import ArizeConnector
+from self_improving_agents.runners.orchestrator import WorkflowOrchestrator
+from self_improving_agents.utils.run_catalog import RunCatalog
+
+START = datetime(2026, 1, 1)
+
+
+class FakeClock:
+    """Monotonic clock advanced by sleeping."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeExportClient:
+    """Export client making one more span visible on every poll."""
+
+    def __init__(self, span_ids: List[str], failures: int = 0) -> None:
+        self.span_ids = span_ids
+        self.failures = failures
+        self.polls: List[dict] = []
+
+    def export_model_to_df(self, **kwargs: Any) -> pd.DataFrame:
+        self.polls.append(kwargs)
+        if len(self.polls) <= self.failures:
+            raise ConnectionError("export failed")
+        visible = self.span_ids[: len(self.polls) - self.failures]
+        return pd.DataFrame({"context.span_id": visible})
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(arize_connector, "time", clock)
+    return clock
+
+
+def make_connector(client: FakeExportClient) -> ArizeConnector:
+    connector = ArizeConnector(developer_key="key", space_id="space", model_id="m")
+    connector.client = client  # type: ignore[assignment]
+    return connector
+
+
+def test_polls_back_off_until_every_span_is_visible(clock):
+    client = FakeExportClient(["a", "b", "c"], failures=1)
+    connector = make_connector(client)
+
+    assert connector.wait_for_spans(["a", "b", "c"], START, initial_interval=2.0)
+
+    assert clock.sleeps == [2.0, 4.0, 8.0]
+    assert all(poll["columns"] == ["context.span_id"] for poll in client.polls)
+
+
+def test_polling_stops_at_the_deadline(clock):
+    client = FakeExportClient([])
+    connector = make_connector(client)
+
+    assert not connector.wait_for_spans(
+        ["a"], START, timeout=10.0, initial_interval=2.0, max_interval=4.0
+    )
+
+    assert clock.sleeps == [2.0, 4.0, 4.0]
+    assert len(client.polls) == 4
+
+
+def test_local_ingestion_evaluates_the_replayed_outputs(environment, monkeypatch):
+    replay_result = {"run_id": "r", "span_ids": ["a"]}
+    eval_kwargs: List[dict] = []
+    state_actions = StateActions(
+        samples=[],
+        actions=Actions(system_prompt="Be kind.", model="m"),
+        eval_constants=[],
+    )
+    monkeypatch.setattr(
+        environment.data_collector, "collect_data", lambda **kwargs: state_actions
+    )
+    monkeypatch.setattr(
+        environment, "emulate_llm_call", lambda *args, **kwargs: replay_result
+    )
+    monkeypatch.setattr(
+        environment,
+        "emulate_evals",
+        lambda **kwargs: eval_kwargs.append(kwargs) or {},
+    )
+    orchestrator = WorkflowOrchestrator.__new__(WorkflowOrchestrator)
+    orchestrator.environment = environment
+    orchestrator.evaluation_summaries = {}
+    orchestrator.run_catalog = RunCatalog("catalog.sqlite")
+
+    orchestrator.validate_policy(
+        evaluator=lambda: None,
+        evaluator_names=["quality"],
+        model=None,  # type: ignore[arg-type]
+        start_time=START,
+        ingestion_mode="local",
+    )
+
+    assert eval_kwargs[0]["replay_result"] is replay_result
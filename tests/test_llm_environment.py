@@ -0,0 +1,56 @@
+"""Tests the LLM environment."""
+import json
+import threading
+from typing import Any, Dict
+
+import pandas as pd
+
+from self_improving_agents.environment.snapshot import EnvironmentSnapshot
+
+
+def test_concurrent_evaluators_save_separate_snapshots(environment, monkeypatch):
+    run_ids: Dict[str, Any] = {}
+
+    def emulate_eval(**kwargs: Any) -> Dict[str, Any]:
+        run_ids[kwargs["evaluator_name"]] = kwargs["run_id"]
+        return {"results": []}
+
+    monkeypatch.setattr(environment, "emulate_eval", emulate_eval)
+    monkeypatch.setattr(
+        environment,
+        "_export_primary_dfs",
+        lambda names, *args: {name: pd.DataFrame() for name in names},
+    )
+
+    environment.emulate_evals(
+        state_actions=None,
+        evaluator=lambda: None,
+        model=None,
+        evaluator_names=["correctness", "tone"],
+        run_id="run",
+    )
+
+    assert run_ids == {"correctness": "run.correctness", "tone": "run.tone"}
+
+
+def test_concurrent_saves_of_one_snapshot_are_never_partial(tmp_path):
+    errors = []
+    path = tmp_path / "run.json"
+
+    def save() -> None:
+        snapshot = EnvironmentSnapshot(run_id="run", snapshot_dir=str(tmp_path))
+        snapshot.start({"rows": list(range(2000))})
+        for _ in range(20):
+            snapshot.end()
+            try:
+                json.loads(path.read_text())
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
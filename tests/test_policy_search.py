@@ -0,0 +1,68 @@
+"""Tests the multi-candidate policy search."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from self_improving_agents.models.policy_update import (
+    CandidateScore,
+    PolicySearchResult,
+)
+from self_improving_agents.models.state_action import Actions, Sample, StateActions
+from self_improving_agents.runners.orchestrator import WorkflowOrchestrator
+
+
+class FakeEnvironment:
+    """Environment recording the run IDs of the replays."""
+
+    def __init__(self) -> None:
+        self.run_ids: List[str] = []
+        self.lock = threading.Lock()
+
+    def emulate_llm_call(self, state_actions: StateActions, **kwargs: Any) -> Dict:
+        with self.lock:
+            self.run_ids.append(kwargs["run_id"])
+        return {}
+
+    def evaluate_replay(self, state_actions: StateActions, *args: Any) -> pd.DataFrame:
+        return pd.DataFrame({"score": [len(state_actions.actions.system_prompt)]})
+
+
+class FakePolicyUpdater:
+    """Policy updater scoring fixed candidates concurrently."""
+
+    def search(self, state_actions: StateActions, scorer: Any, **kwargs: Any):
+        candidates = [
+            CandidateScore(actions=Actions(system_prompt=prompt, model="m"))
+            for prompt in ["a", "bb", "bb", "ccc"]
+        ]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            scores = list(pool.map(lambda c: scorer(c.actions), candidates))
+        for candidate, candidate_scores in zip(candidates, scores):
+            candidate.scores = candidate_scores
+            candidate.score = candidate_scores["quality"]
+        return PolicySearchResult(best=candidates[-1].actions, candidates=candidates)
+
+
+def test_search_replays_every_candidate_under_its_own_run_id():
+    orchestrator = WorkflowOrchestrator.__new__(WorkflowOrchestrator)
+    orchestrator.environment = FakeEnvironment()  # type: ignore[assignment]
+    orchestrator.policy_updater = FakePolicyUpdater()  # type: ignore[assignment]
+    state_actions = StateActions(
+        samples=[Sample(chat_history=[], output_generation="a", evals=[])],
+        actions=Actions(system_prompt="a", model="m"),
+        eval_constants=[],
+    )
+
+    result = orchestrator.search_policy(
+        state_actions,
+        evaluator=lambda: None,
+        evaluator_names=["quality"],
+        model=None,  # type: ignore[arg-type]
+        search_id="search",
+    )
+
+    run_ids = orchestrator.environment.run_ids  # type: ignore[attr-defined]
+    assert sorted(run_ids) == ["search-c0", "search-c1", "search-c2", "search-c3"]
+    assert result.best.system_prompt == "ccc"
@@ -0,0 +1,105 @@
+"""Tests the rate limiter's backoff."""
+from typing import List
+
+import httpx
+import openai
+import pytest
+from phoenix.evals.models.base import ExtraInfo, Usage
+
+from self_improving_agents.utils import rate_limiter
+from self_improving_agents.utils.rate_limiter import RateLimiter, get_retry_after
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+class FakeClock:
+    """Monotonic clock advanced by sleeping."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    # Jitter takes the upper bound of its range
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def rate_limit_error(headers: dict) -> openai.RateLimitError:
+    response = httpx.Response(429, headers=headers, request=REQUEST)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def failing(errors: list):
+    def fn() -> str:
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return fn
+
+
+def test_backoff_doubles_up_to_the_maximum(clock):
+    limiter = RateLimiter(initial_backoff=1.0, max_backoff=3.0)
+    errors = [openai.APITimeoutError(request=REQUEST) for _ in range(3)]
+
+    assert limiter.call(failing(errors)) == "ok"
+
+    assert clock.sleeps == [1.0, 2.0, 3.0]
+    assert limiter.stats["retries"] == 3
+
+
+def test_retries_are_bounded(clock):
+    limiter = RateLimiter(max_retries=2)
+    errors = [openai.APITimeoutError(request=REQUEST) for _ in range(3)]
+
+    with pytest.raises(openai.APITimeoutError):
+        limiter.call(failing(errors))
+    assert len(clock.sleeps) == 2
+
+
+def test_retry_after_pauses_every_caller(clock):
+    limiter = RateLimiter(initial_backoff=0.5)
+
+    assert limiter.call(failing([rate_limit_error({"retry-after": "2"})])) == "ok"
+
+    assert clock.sleeps == [2.5]
+    assert limiter.blocked_until == 2.5
+    assert limiter.stats["rate_limited"] == 1
+    # Halved by the rate limit error, then recovering with the success
+    assert limiter.rate_scale == pytest.approx(0.55)
+
+
+def test_retry_after_headers():
+    assert get_retry_after(rate_limit_error({"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(rate_limit_error({"retry-after": "3"})) == 3.0
+    assert get_retry_after(rate_limit_error({"retry-after": "soon"})) is None
+    assert get_retry_after(rate_limit_error({})) is None
+
+
+def test_limit_estimates_tokens_and_reads_phoenix_usage(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    reserved = []
+
+    @limiter.limit
+    def completion(**kwargs):
+        reserved.append(1000 - limiter.token_bucket.level)
+        return "ok", ExtraInfo(usage=Usage(20, 10, 30))
+
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert completion(messages=messages, max_tokens=50)[0] == "ok"
+
+    # 100 prompt tokens plus max_tokens, reconciled with the reported usage
+    assert reserved == [150]
+    assert limiter.token_bucket.level == 970
@@ -0,0 +1,68 @@
+"""Tests the evaluation of replayed outputs without exporting spans."""
+import pandas as pd
+
+from self_improving_agents.models.state_action import Actions, Sample, StateActions
+
+
+def stub_evaluator(dataframe: pd.DataFrame, model, threshold: int) -> pd.DataFrame:
+    """Score an output 1.0 when it is longer than ``threshold`` characters."""
+    lengths = dataframe["attributes.output.value"].str.len()
+    return pd.DataFrame(
+        {"score": (lengths > threshold).astype(float), "label": "length"},
+        index=dataframe.index,
+    )
+
+
+def make_state_actions() -> StateActions:
+    return StateActions(
+        samples=[
+            Sample(
+                chat_history=[{"role": "user", "content": f"q{i}"}],
+                output_generation="",
+                evals=[],
+            )
+            for i in range(3)
+        ],
+        actions=Actions(system_prompt="Be brief.", model="gpt-4o"),
+        eval_constants=[],
+    )
+
+
+REPLAY_RESULT = {
+    "run_id": "replay",
+    "model": "gpt-4o",
+    "contents": ["a long answer", None, "short"],
+}
+
+
+def test_replay_dataframe_has_the_span_columns_of_the_replayed_samples(environment):
+    replay_df = environment.build_replay_dataframe(make_state_actions(), REPLAY_RESULT)
+
+    assert replay_df.index.tolist() == [0, 2]
+    assert replay_df["context.span_id"].tolist() == ["replay-0", "replay-2"]
+    assert replay_df["attributes.output.value"].tolist() == ["a long answer", "short"]
+    assert replay_df["attributes.llm.input_messages"][2] == [
+        {"message.role": "system", "message.content": "Be brief."},
+        {"message.role": "user", "message.content": "q2"},
+    ]
+
+
+def test_replay_outputs_are_evaluated_by_sample_position(environment):
+    environment.evaluator_saver.save_evaluator("length", {"threshold": 8})
+
+    results = environment.evaluate_replay(
+        make_state_actions(), REPLAY_RESULT, stub_evaluator, "length", model=None
+    )
+    eval_results = environment.emulate_evals(
+        make_state_actions(),
+        stub_evaluator,
+        model=None,
+        evaluator_names=["length"],
+        replay_result=REPLAY_RESULT,
+        upsert=True,
+    )
+
+    assert results["score"].to_dict() == {0: 1.0, 2: 0.0}
+    assert results["context.span_id"].tolist() == ["replay-0", "replay-2"]
+    assert [row["score"] for row in eval_results["length"]["results"]] == [1.0, 0.0]
+    assert environment.run_catalog.get("replay.length") is not None
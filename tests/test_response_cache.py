@@ -0,0 +1,77 @@
+"""Tests the response cache's expiry and eviction."""
+import pytest
+
+from self_improving_agents.utils import cache
+from self_improving_agents.utils.cache import ResponseCache
+
+
+class FakeClock:
+    """Wall clock set by the tests."""
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def request(content: str) -> dict:
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": content}]}
+
+
+def test_entries_expire_after_the_ttl(clock, tmp_path):
+    response_cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    response_cache.set(request("a"), {"content": "A"})
+
+    clock.now += 60
+    assert response_cache.get(request("a")) == {"content": "A"}
+    clock.now += 1
+    assert response_cache.get(request("a")) is None
+    assert response_cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock, tmp_path):
+    # Room for two entries of 23 bytes
+    response_cache = ResponseCache(
+        str(tmp_path / "cache.sqlite"), max_bytes=50, ttl_seconds=None
+    )
+    for content in ["a", "b"]:
+        clock.now += 1
+        response_cache.set(request(content), {"content": content * 8})
+    clock.now += 1
+    response_cache.get(request("a"))
+
+    clock.now += 1
+    response_cache.set(request("c"), {"content": "c" * 8})
+
+    assert response_cache.get(request("b")) is None
+    assert response_cache.get(request("a")) == {"content": "aaaaaaaa"}
+    assert response_cache.get(request("c")) == {"content": "cccccccc"}
+    assert response_cache.stats()["evictions"] == 1
+
+
+def test_total_size_follows_every_write(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    response_cache = ResponseCache(path, max_bytes=50, ttl_seconds=60)
+    response_cache.set(request("a"), {"content": "a" * 8})
+    response_cache.set(request("a"), {"content": "a" * 4})
+    response_cache.set(request("b"), {"content": "b" * 8})
+    assert response_cache.stats()["bytes"] == 19 + 23
+
+    # Evicted over the size bound, then expired
+    response_cache.set(request("c"), {"content": "c" * 8})
+    assert response_cache.stats()["bytes"] == 23 + 23
+    clock.now += 61
+    response_cache.set(request("d"), {"content": ""})
+    assert response_cache.stats()["bytes"] == 15
+    assert ResponseCache(path).stats()["bytes"] == 15
+
+    response_cache.clear()
+    assert response_cache.stats()["bytes"] == 0
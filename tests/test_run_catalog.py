@@ -0,0 +1,127 @@
+"""Tests the run catalog's upserts and lookups."""
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from self_improving_agents.models.state_action import Actions, StateActions
+from self_improving_agents.policy.base import BasePolicy
+from self_improving_agents.policy.checkpoint_store import CheckpointStore
+from self_improving_agents.utils import run_catalog
+from self_improving_agents.utils.run_catalog import RunCatalog
+
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+
+class FakeClock:
+    """Wall clock set by the tests."""
+
+    def __init__(self) -> None:
+        self.now = datetime(2026, 1, 1).timestamp()
+
+    def time(self) -> float:
+        return self.now
+
+
+class Policy(BasePolicy):
+    """Policy only loading checkpoints."""
+
+    def update(self, state_actions: StateActions) -> Actions:
+        return state_actions.actions
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(run_catalog, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def catalog(tmp_path) -> RunCatalog:
+    return RunCatalog(str(tmp_path / "catalog.sqlite"))
+
+
+def test_updates_keep_the_fields_they_leave_out(clock, catalog):
+    started = datetime(2025, 12, 31, 23)
+    catalog.record_run(
+        "run", "snapshot", "a.json", status="running", start_time=started, usage=USAGE
+    )
+    clock.now += 60
+    catalog.record_run(
+        "run",
+        "snapshot",
+        "b.json",
+        status="completed",
+        end_time=datetime(2026, 1, 1, 0, 1),
+        scores={"quality": 0.5},
+    )
+
+    record = catalog.get("run")
+    assert record is not None
+    assert (record.path, record.status) == ("b.json", "completed")
+    assert record.start_time == started
+    assert record.end_time == datetime(2026, 1, 1, 0, 1)
+    assert record.created_at == datetime(2026, 1, 1, 0, 1)
+    assert (record.prompt_tokens, record.total_tokens) == (10, 15)
+    assert record.scores == {"quality": 0.5}
+    assert catalog.get("run", kind="checkpoint") is None
+
+
+def test_latest_checkpoint_is_the_last_saved(clock, catalog):
+    for run_id, kind in [("c1", "checkpoint"), ("c2", "checkpoint"), ("s", "snapshot")]:
+        clock.now += 1
+        catalog.record_run(run_id, kind, f"{run_id}.json")
+
+    latest = catalog.latest_checkpoint()
+    assert latest is not None and latest.run_id == "c2"
+    clock.now += 1
+    catalog.record_run("c1", "checkpoint", "c1.json")
+    latest = catalog.latest_checkpoint()
+    assert latest is not None and latest.run_id == "c1"
+
+
+def test_runs_between_is_ordered_by_start_time(catalog):
+    runs = [("b", "snapshot", 3), ("a", "snapshot", 1), ("c", "checkpoint", 2)]
+    for run_id, kind, hour in runs + [("late", "snapshot", 4)]:
+        catalog.record_run(
+            run_id, kind, f"{run_id}.json", start_time=datetime(2026, 1, 1, hour)
+        )
+
+    window = (datetime(2026, 1, 1, 1), datetime(2026, 1, 1, 4))
+    assert [r.run_id for r in catalog.runs_between(*window)] == ["a", "c", "b"]
+    snapshots = catalog.runs_between(*window, kind="snapshot")
+    assert [r.run_id for r in snapshots] == ["a", "b"]
+
+
+def test_best_run_has_the_highest_mean(catalog):
+    for run_id, mean in [("low", 0.2), ("high", 0.9), ("unscored", None)]:
+        catalog.record_run(run_id, "snapshot", f"{run_id}.json")
+        catalog.record_scores(run_id, {"quality": mean, "tone": 0.5})
+    catalog.record_run("best", "checkpoint", "best.json", scores={"quality": 1.0})
+
+    best = catalog.best_run("quality")
+    assert best is not None and best.run_id == "high"
+    assert best.scores == {"quality": 0.9, "tone": 0.5}
+    assert catalog.best_run("missing") is None
+
+
+def test_legacy_checkpoints_are_indexed_on_first_load(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoint"))
+    saved_at = datetime(2026, 1, 1).timestamp()
+    for index, prompt in enumerate(["old", "new"]):
+        path = os.path.join(store.root_dir, f"actions_{index}.json")
+        with open(path, "w") as f:
+            json.dump({"system_prompt": prompt, "model": "gpt-4o"}, f)
+        os.utime(path, (saved_at + index, saved_at + index))
+    policy = Policy()
+    policy.checkpoint_store = store
+    policy.catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+
+    assert policy.load_checkpoint().system_prompt == "new"
+
+    latest = policy.catalog.latest_checkpoint()
+    assert latest is not None and latest.run_id == "actions_1"
+    assert latest.created_at == datetime(2026, 1, 1, 0, 0, 1)
+    assert len(policy.catalog.runs_between(datetime(2026, 1, 1), datetime.now())) == 2
@@ -0,0 +1,66 @@
+"""Tests the selection of samples for the policy update prompt."""
+from typing import Dict, List, Optional, Tuple
+
+from self_improving_agents.models.state_action import EvalMetrics, Sample
+from self_improving_agents.policy.sample_selection import (
+    DiverseSelector,
+    StratifiedLabelSelector,
+    WorstKSelector,
+)
+
+
+def make_sample(
+    output: str, evals: Dict[str, Tuple[Optional[float], Optional[str]]]
+) -> Sample:
+    return Sample(
+        chat_history=[{"role": "user", "content": "Describe the weather today"}],
+        output_generation=output,
+        evals=[
+            EvalMetrics(name=name, eval_score=score, eval_label=label)
+            for name, (score, label) in evals.items()
+        ],
+    )
+
+
+def scored(scores: List[Tuple[Optional[float], Optional[float]]]) -> List[Sample]:
+    return [
+        make_sample(f"output {i}", {"quality": (quality, None), "tone": (tone, None)})
+        for i, (quality, tone) in enumerate(scores)
+    ]
+
+
+def test_worst_k_interleaves_the_worst_samples_of_each_evaluator():
+    samples = scored([(0.9, 0.1), (0.1, 0.8), (0.5, 0.2), (0.2, None), (0.1, 0.9)])
+
+    # quality ranks 1, 4 (ties in order), 3; tone ranks 0, 2, 1
+    assert WorstKSelector(k=3).select(samples) == [1, 0, 4, 2, 3]
+    assert WorstKSelector(k=1, evaluator_names=["tone"]).select(samples) == [0]
+
+
+def test_stratified_selection_alternates_labels():
+    labels = ["good", "good", "bad", "good", None, "bad", "bad"]
+    samples = [
+        make_sample(f"output {i}", {"quality": (None, label)})
+        for i, label in enumerate(labels)
+    ]
+
+    selector = StratifiedLabelSelector("quality", per_label=2)
+
+    assert selector.select(samples) == [0, 2, 4, 1, 5]
+
+
+def test_diverse_selection_drops_near_duplicates():
+    words = " ".join(f"word{i}" for i in range(40))
+    samples = [
+        make_sample(f"{words} sunny", {}),
+        make_sample("A completely different answer about heavy rain and wind", {}),
+        make_sample(f"{words} cloudy", {}),
+        make_sample(f"{words} sunny", {}),
+    ]
+
+    assert list(DiverseSelector().select(samples)) == [0, 1]
+    # Diversifies the ranking of the base selector
+    base = WorstKSelector(k=4)
+    for sample, score in zip(samples, [0.9, 0.5, 0.1, 0.2]):
+        sample.evals = [EvalMetrics(name="quality", eval_score=score)]
+    assert list(DiverseSelector(base=base).select(samples)) == [2, 1]
@@ -0,0 +1,40 @@
+"""Tests the summary statistics of evaluation results."""
+import numpy as np
+import pytest
+
+from self_improving_agents.evaluator_handler.summary import (
+    PERCENTILES,
+    summarize_evaluations,
+)
+from self_improving_agents.models.state_action import EvalMetrics, Sample
+
+
+def sample(score, weight: int) -> Sample:
+    return Sample(
+        chat_history=[],
+        output_generation="",
+        evals=[EvalMetrics(name="quality", eval_score=score)],
+        weight=weight,
+    )
+
+
+def test_weighted_summary_matches_repeated_scores():
+    scores = [1.0, 4.0, None, 2.0, 5.0, 3.0]
+    weights = [3, 1, 2, 5, 1, 2]
+
+    summary = summarize_evaluations(
+        [sample(score, weight) for score, weight in zip(scores, weights)]
+    )["quality"]
+
+    repeated = np.repeat(
+        np.array([np.nan if s is None else s for s in scores]), weights
+    )
+    scored = repeated[~np.isnan(repeated)]
+    assert summary.samples == len(repeated)
+    assert summary.count == len(scored)
+    assert summary.mean == pytest.approx(scored.mean())
+    assert summary.std == pytest.approx(scored.std())
+    assert (summary.min, summary.max) == (scored.min(), scored.max())
+    assert [summary.percentiles[f"p{q}"] for q in PERCENTILES] == pytest.approx(
+        np.percentile(scored, PERCENTILES).tolist()
+    )
@@ -0,0 +1,111 @@
+"""Tests the telemetry shared by the stages of a workflow."""
+import json
+from datetime import datetime
+from typing import Any, List
+
+import pandas as pd
+
+from self_improving_agents.evaluator_handler import eval_pipeline
+from self_improving_agents.runners.orchestrator import WorkflowOrchestrator
+from self_improving_agents.runners.telemetry_context import TelemetryContext
+from self_improving_agents.utils.run_catalog import RunCatalog
+
+START = datetime(2026, 1, 1)
+END = datetime(2026, 1, 2)
+
+
+class FakeConnector:
+    """Connector exporting fixed spans and counting the exports."""
+
+    ARIZE_MODEL_ID = "test"
+    ARIZE_SPACE_ID = "test"
+    ARIZE_API_KEY = "test"
+    ARIZE_DEVELOPER_KEY = "test"
+
+    def __init__(self) -> None:
+        self.exports: List[dict] = []
+
+    def export_spans(self, **kwargs: Any) -> pd.DataFrame:
+        self.exports.append(kwargs)
+        return pd.DataFrame(
+            {
+                "context.span_id": ["a", "b"],
+                "start_time": pd.to_datetime(
+                    ["2026-01-01 10:00", "2026-01-01 11:00"]
+                ).tz_localize("UTC"),
+                "attributes.input.value": [
+                    json.dumps({"messages": [{"role": "user", "content": "hi"}]})
+                ]
+                * 2,
+                "attributes.llm.input_messages": [
+                    [{"message.role": "system", "message.content": "Be kind."}]
+                ]
+                * 2,
+                "attributes.llm.output_messages": [[{"message.content": "hello"}]] * 2,
+                "attributes.llm.model_name": ["gpt-4o"] * 2,
+            }
+        )
+
+    def invalidate_spans(self, spans_df: pd.DataFrame) -> None:
+        pass
+
+
+class FakeClient:
+    """Arize client accepting uploaded evaluations."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        pass
+
+    def log_evaluations_sync(self, **kwargs: Any) -> None:
+        pass
+
+
+def evaluator(dataframe: pd.DataFrame, **kwargs: Any) -> pd.DataFrame:
+    return pd.DataFrame({"score": [1.0] * len(dataframe)}, index=dataframe.index)
+
+
+def test_validation_exports_the_window_once(environment, monkeypatch, tmp_path):
+    connector = FakeConnector()
+    environment.arize_connector = connector
+    environment.evaluator_saver.save_evaluator("quality", {}, {})
+    monkeypatch.setattr(
+        environment, "emulate_llm_call", lambda *args, **kwargs: {"run_id": "r"}
+    )
+    monkeypatch.setattr(environment, "wait_for_ingestion", lambda *args, **kw: True)
+    monkeypatch.setattr(eval_pipeline, "Client", FakeClient)
+    orchestrator = WorkflowOrchestrator.__new__(WorkflowOrchestrator)
+    orchestrator.environment = environment
+    orchestrator.evaluation_summaries = {}
+    orchestrator.run_catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+    ctx = TelemetryContext(connector)  # type: ignore[arg-type]
+
+    for _ in range(2):
+        orchestrator.validate_policy(
+            evaluator=evaluator,
+            evaluator_names=["quality"],
+            model=None,  # type: ignore[arg-type]
+            start_time=START,
+            end_time=END,
+            upsert=True,
+            telemetry_context=ctx,
+        )
+        assert ctx.exports == 1
+
+    # Only the time window is passed on, the defaults are left to the connector
+    assert [sorted(kwargs) for kwargs in connector.exports] == [
+        ["end_time", "start_time"]
+    ]
+    spans_df = ctx.export_spans(start_time=START, end_time=END)
+    assert spans_df["eval.quality.score"].tolist() == [1.0, 1.0]
+
+
+def test_default_export_arguments_share_telemetry():
+    connector = FakeConnector()
+    ctx = TelemetryContext(connector)  # type: ignore[arg-type]
+
+    ctx.export_spans(start_time=START, end_time=END)
+    ctx.export_spans(start_time=START, end_time=END, model_id="test", space_id="test")
+    ctx.export_spans(start_time=START, end_time=END, model_id="other")
+
+    assert ctx.exports == 2
+    assert connector.exports[1]["model_id"] == "other"
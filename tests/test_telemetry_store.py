@@ -0,0 +1,64 @@
+"""Tests the local telemetry store."""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from self_improving_agents.runners.telemetry_store import TelemetryStore
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+END = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+def spans(label: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "context.span_id": ["a", "b"],
+            "start_time": [START + timedelta(hours=1), END],
+            "label": [label, label],
+        }
+    )
+
+
+def parquet_files(root: str) -> list:
+    return [
+        name
+        for _, _, names in os.walk(root)
+        for name in names
+        if name.endswith("parquet")
+    ]
+
+
+def test_rewritten_spans_replace_their_copies(tmp_path):
+    store = TelemetryStore(str(tmp_path))
+
+    for label in ["first", "second", "third"]:
+        store.write("model", spans(label), START, END)
+
+    spans_df = store.read("model", START, END)
+    assert spans_df["label"].tolist() == ["third", "third"]
+    # One file per date partition, however often the range is written
+    assert len(parquet_files(str(tmp_path))) == 2
+
+
+def test_read_includes_the_end_of_the_window(tmp_path):
+    store = TelemetryStore(str(tmp_path))
+    store.write("model", spans("first"), START, END)
+
+    spans_df = store.read("model", START, END)
+
+    assert spans_df["context.span_id"].tolist() == ["a", "b"]
+    assert store.read("model", START, END - timedelta(seconds=1)).shape[0] == 1
+
+
+def test_coverage_excludes_unsettled_ranges(tmp_path):
+    store = TelemetryStore(str(tmp_path))
+    now = datetime.now(timezone.utc)
+
+    store.write("model", pd.DataFrame(), now - timedelta(hours=1), now)
+
+    ((missing_start, missing_end),) = store.missing_ranges(
+        "model", now - timedelta(hours=1), now
+    )
+    assert missing_start >= now - store.ingestion_lag
+    assert missing_end == now
@@ -0,0 +1,112 @@
+"""Tests the packing of samples into the policy update prompt."""
+from typing import List
+
+import pytest
+
+from self_improving_agents.models.state_action import (
+    Actions,
+    EvalMetrics,
+    Sample,
+    StateActions,
+)
+from self_improving_agents.policy import llm_policy_updater
+from self_improving_agents.policy.llm_policy_updater import (
+    PROMPT_TOKEN_MARGIN,
+    LLMPolicyUpdater,
+)
+from self_improving_agents.utils import tokenizer
+from self_improving_agents.utils.tokenizer import count_message_tokens
+
+
+def make_samples(count: int) -> List[Sample]:
+    return [
+        Sample(
+            chat_history=[{"role": "user", "content": "Write a haiku"}],
+            output_generation="An old silent pond",
+            evals=[EvalMetrics(name="quality", eval_score=0.5)],
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def updater(tmp_path) -> LLMPolicyUpdater:
+    return LLMPolicyUpdater(
+        client=object(),  # type: ignore[arg-type]
+        checkpoint_dir=str(tmp_path / "checkpoint"),
+    )
+
+
+def make_state_actions(count: int) -> StateActions:
+    return StateActions(
+        samples=make_samples(count),
+        actions=Actions(system_prompt="Be kind.", model="gpt-4o"),
+        eval_constants=[],
+    )
+
+
+def test_samples_are_cut_off_at_the_budget(updater):
+    samples = make_samples(5)
+    size = len(updater._format_sample(samples[0], 0))
+    # Equal samples are all kept, each under its own index
+    assert updater._format_samples_within_budget(samples, 3 * size) == [
+        updater._format_sample(sample, index)
+        for index, sample in enumerate(samples[:3])
+    ]
+    assert len(updater._format_samples_within_budget(samples, 3 * size - 1)) == 2
+    assert updater._format_samples_within_budget(samples, size - 1) == []
+
+
+def test_samples_after_the_cut_off_are_not_formatted(updater):
+    remaining = iter(make_samples(5))
+    size = len(updater._format_sample(make_samples(1)[0], 0))
+
+    updater._format_samples_within_budget(remaining, 2 * size)
+
+    # The two samples that fit and the first that does not
+    assert len(list(remaining)) == 2
+
+
+def test_character_budget_limits_the_prompt_samples(updater):
+    state_actions = make_state_actions(5)
+    size = len(updater._format_sample(state_actions.samples[0], 0))
+
+    messages = updater._compose_update_messages(
+        state_actions, samples_max_character_length=2 * size
+    )
+
+    assert "showing 2 of 5" in messages[1]["content"]
+    assert "<SAMPLE_1>" in messages[1]["content"]
+    assert "<SAMPLE_2>" not in messages[1]["content"]
+
+
+@pytest.mark.parametrize(
+    "extra_reply_tokens, spare_tokens, expected", [(0, 0, 2), (0, -1, 1), (1, 0, 1)]
+)
+def test_token_budget_reserves_the_prompt_reply_and_margin(
+    updater, monkeypatch, extra_reply_tokens, spare_tokens, expected
+):
+    # One token per character, whether or not tiktoken is installed
+    monkeypatch.setattr(tokenizer, "get_token_counter", lambda model: len)
+    monkeypatch.setattr(llm_policy_updater, "get_token_counter", lambda model: len)
+    state_actions = make_state_actions(5)
+    summary = updater._create_evaluation_summary(state_actions.samples)
+    reserved = count_message_tokens(
+        updater._build_update_messages(state_actions, summary, []),
+        "gpt-4o",
+        max_tokens=updater.max_tokens,
+    )
+    sample_tokens = len(updater._format_sample(state_actions.samples[0], 0) + "\n")
+    # Room for exactly two samples besides the prompt, reply and margin
+    context_window = reserved + PROMPT_TOKEN_MARGIN + 2 * sample_tokens + spare_tokens
+    updater.max_tokens += extra_reply_tokens
+
+    messages = updater._compose_update_messages(
+        state_actions, context_window=context_window
+    )
+
+    assert f"showing {expected} of 5" in messages[1]["content"]
+    assert (
+        count_message_tokens(messages, "gpt-4o", max_tokens=updater.max_tokens)
+        <= context_window - PROMPT_TOKEN_MARGIN
+    )